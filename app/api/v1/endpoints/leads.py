@@ -1,40 +1,135 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+import base64
+import json
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
+from sqlalchemy import or_, select, type_coerce
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.schemas.schemas import LeadResponse, LeadUpdate
 from app.models.models import Lead
-from app.db.session import get_db
+from sqlalchemy.orm import Session
+from app.db.session import get_async_read_db, get_db
 
 router = APIRouter()
 
+LIST_FIELDS = {
+    "id", "source_item_id", "clinic_id", "scores", "labels", "evidence_snippets",
+    "status", "lead_score", "tier", "is_sp_region", "created_at"
+}
+DEFAULT_LIST_FIELDS = ["id", "source_item_id", "clinic_id", "scores", "labels", "status", "created_at"]
+JSON_FIELDS = {"scores", "labels"}
+
+def encode_cursor(lead_score: Optional[float], lead_id: int) -> str:
+    # lead_score NULL vira null no JSON: o cursor continua na fase dos leads sem score
+    return base64.urlsafe_b64encode(json.dumps([lead_score, lead_id]).encode()).decode()
+
+def decode_cursor(cursor: str):
+    try:
+        lead_score, lead_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return (None if lead_score is None else float(lead_score)), int(lead_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def label_filter(dialect_name: str, name: str, value: str):
+    """labels[name] == value; no PostgreSQL vira `labels @> {...}`, servido pelo índice GIN."""
+    if dialect_name == "postgresql":
+        return type_coerce(Lead.labels, JSONB).contains({name: value})
+    return Lead.labels[name].as_string() == value
+
 @router.get("/")
-def read_leads(db: Session = Depends(get_db), skip: int = 0, limit: int = 100):
-    leads = db.query(Lead).offset(skip).limit(limit).all()
-    # Retorna JSON diretamente sem validação Pydantic
+async def read_leads(
+    db: AsyncSession = Depends(get_async_read_db),
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    tier: Optional[str] = None,
+    is_sp_region: Optional[bool] = None,
+    min_score: Optional[float] = None,
+    pain_point: Optional[str] = None,
+    intent_stage: Optional[str] = None,
+    fields: Optional[str] = None
+):
+    """
+    Lista leads por lead_score decrescente (desempate por id); leads sem score vêm no fim.
+    Paginação por cursor: envie o header X-Next-Cursor da resposta anterior em `cursor`
+    (`skip` continua aceito, mas degrada em páginas profundas). `fields` projeta as colunas
+    retornadas, ex.: fields=id,lead_score,tier. `pain_point`/`intent_stage` filtram pelo conteúdo de labels.
+    """
+    selected = [f.strip() for f in fields.split(",") if f.strip()] if fields else DEFAULT_LIST_FIELDS
+    unknown = set(selected) - LIST_FIELDS
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+
+    # id e lead_score sempre vêm do banco: são a chave do cursor
+    columns = list(dict.fromkeys(["id", "lead_score", *selected]))
+    query = select(*[getattr(Lead, name) for name in columns])
+    if status is not None:
+        query = query.where(Lead.status == status)
+    if tier is not None:
+        query = query.where(Lead.tier == tier)
+    if is_sp_region is not None:
+        query = query.where(Lead.is_sp_region == is_sp_region)
+    if min_score is not None:
+        query = query.where(Lead.lead_score >= min_score)
+    for name, value in (("pain_point", pain_point), ("intent_stage", intent_stage)):
+        if value is not None:
+            query = query.where(label_filter(db.bind.dialect.name, name, value))
+    if skip and not cursor:
+        # skip legado: uma consulta só, leads sem score no fim (como na paginação por cursor)
+        query = query.order_by(Lead.lead_score.desc().nulls_last(), Lead.id.desc()).offset(skip)
+        rows = (await db.execute(query.limit(limit))).all()
+    else:
+        rows = await _page_by_cursor(db, query, cursor, limit, scored_only=min_score is not None)
+
     result = []
-    for lead in leads:
-        result.append({
-            "id": lead.id,
-            "source_item_id": lead.source_item_id,
-            "clinic_id": lead.clinic_id,
-            "scores": lead.scores or {},
-            "labels": lead.labels or {},
-            "status": lead.status,
-            "created_at": lead.created_at.isoformat() if lead.created_at else None
-        })
-    return JSONResponse(content=result)
+    for row in rows:
+        item = {name: getattr(row, name) for name in selected}
+        for name in JSON_FIELDS.intersection(item):
+            item[name] = item[name] or {}
+        if "created_at" in item:
+            item["created_at"] = item["created_at"].isoformat() if item["created_at"] else None
+        result.append(item)
+
+    headers = {}
+    if len(rows) == limit:
+        headers["X-Next-Cursor"] = encode_cursor(rows[-1].lead_score, rows[-1].id)
+    return JSONResponse(content=result, headers=headers)
+
+async def _page_by_cursor(db: AsyncSession, query, cursor: Optional[str], limit: int, scored_only: bool):
+    """
+    Leads com score por (lead_score, id) decrescente e, depois deles, os sem score (NULL) por id
+    decrescente. Duas consultas em vez de NULLS LAST: a ordem de NULL muda entre SQLite e
+    PostgreSQL, e a faixa por lead_score continua servida pelo índice; a segunda só roda na
+    página em que os leads com score acabam.
+    """
+    last_score, last_id = decode_cursor(cursor) if cursor else (None, None)
+    rows = []
+    if last_id is None or last_score is not None:
+        scored = query.where(Lead.lead_score.is_not(None))
+        if last_id is not None:
+            # Forma "<= AND (< OR <)": com parâmetros bind, o OR simples faz o SQLite varrer o índice inteiro
+            scored = scored.where(Lead.lead_score <= last_score, or_(Lead.lead_score < last_score, Lead.id < last_id))
+        rows = (await db.execute(scored.order_by(Lead.lead_score.desc(), Lead.id.desc()).limit(limit))).all()
+    if len(rows) < limit and not scored_only:
+        unscored = query.where(Lead.lead_score.is_(None))
+        if last_score is None and last_id is not None:
+            unscored = unscored.where(Lead.id < last_id)
+        rows += (await db.execute(unscored.order_by(Lead.id.desc()).limit(limit - len(rows)))).all()
+    return rows
 
 @router.get("/{lead_id}", response_model=LeadResponse)
-def read_lead(lead_id: int, db: Session = Depends(get_db)):
-    db_lead = db.query(Lead).filter(Lead.id == lead_id).first()
+async def read_lead(lead_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    db_lead = await db.get(Lead, lead_id)
     if db_lead is None:
         raise HTTPException(status_code=404, detail="Lead not found")
     return db_lead
 
 @router.put("/{lead_id}", response_model=LeadResponse)
 def update_lead(lead_id: int, lead_in: LeadUpdate, db: Session = Depends(get_db)):
-    db_lead = db.query(Lead).filter(Lead.id == lead_id).first()
+    """Síncrono de propósito: grava pelo writer único do processo (get_db), no threadpool."""
+    db_lead = db.get(Lead, lead_id)
     if db_lead is None:
         raise HTTPException(status_code=404, detail="Lead not found")
     
@@ -1,30 +1,96 @@
-from fastapi import APIRouter, BackgroundTasks
-from app.services.collector import SignalsCollector
-import asyncio
+import gzip
+from typing import List, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, Response
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.session import get_db, get_read_db
+from app.models.models import MissionJob, MissionProfile
+from app.schemas.schemas import MissionRequest
+from app.services.jobs import create_job, request_cancel, fail_job, job_to_dict, execute_job
 
 router = APIRouter()
 
 @router.post("/run")
-async def run_mission(background_tasks: BackgroundTasks):
+def run_mission(background_tasks: BackgroundTasks, streaming: bool = True,
+                mission_in: Optional[MissionRequest] = None, db: Session = Depends(get_db)):
     """
-    Dispara a missão de captura em background.
+    Enfileira a missão de captura para os workers (ou roda no processo da API com MISSION_EXECUTOR=inline).
+    Por padrão usa o pipeline streaming (classifica enquanto ainda busca).
+    Síncrono de propósito: commit e publicação no broker bloqueiam, então rodam no threadpool.
     """
-    collector = SignalsCollector()
-    queries = [
-        "Ultraformer MPT", 
-        "Morpheus 8", 
-        "Lavieen", 
-        "Bioestimuladores de colágeno", 
-        "Sculptra Itaim Bibi"
-    ]
-    
-    background_tasks.add_task(collector.fetch_and_process, queries)
-    
-    return {"message": "Missão de captura iniciada em segundo plano."}
-
-# Adicionar método auxiliar ao SignalsCollector se não existir
-async def fetch_and_process_wrapper(queries):
-    from app.services.collector import SignalsCollector
-    collector = SignalsCollector()
-    signals = await collector.fetch_signals(queries)
-    await collector.process_and_save_signals(signals)
+    job = create_job(db, queries=mission_in.queries if mission_in else None, streaming=streaming)
+
+    if settings.MISSION_EXECUTOR == "inline":
+        background_tasks.add_task(execute_job, job.id)
+    else:
+        from app.worker import run_mission_job
+        try:
+            run_mission_job.delay(job.id)
+        except Exception as e:
+            # Broker fora do ar: o job não pode ficar "queued" para sempre
+            fail_job(db, job, f"Falha ao enfileirar: {e}")
+            raise HTTPException(status_code=503, detail=f"Job queue unavailable (job {job.id} marked as failed)")
+
+    return {"message": "Missão de captura enfileirada.", "job_id": job.id, "status": job.status}
+
+@router.get("/jobs")
+def list_jobs(db: Session = Depends(get_read_db), status: Optional[str] = None, limit: int = 20):
+    query = db.query(MissionJob)
+    if status:
+        query = query.filter(MissionJob.status == status)
+    return [job_to_dict(job) for job in query.order_by(MissionJob.created_at.desc()).limit(limit).all()]
+
+@router.get("/jobs/{job_id}")
+def read_job(job_id: str, db: Session = Depends(get_read_db)):
+    job = db.get(MissionJob, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_to_dict(job)
+
+@router.post("/jobs/{job_id}/cancel")
+def cancel_job(job_id: str, db: Session = Depends(get_db)):
+    job = db.get(MissionJob, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_to_dict(request_cancel(db, job))
+
+@router.get("/{mission_id}/profile")
+def read_mission_profile(mission_id: str, request: Request, summary: bool = False, db: Session = Depends(get_read_db)):
+    """
+    Timeline da missão no formato trace-event do Chrome (abrir em ui.perfetto.dev ou chrome://tracing).
+    O caminho crítico e a utilização da concorrência ficam em "otherData"; `?summary=true` devolve só esse resumo.
+    """
+    profile = db.get(MissionProfile, mission_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if summary:
+        return profile.summary
+
+    # A resposta depende do Accept-Encoding: caches intermediários precisam do Vary nas duas formas
+    headers = {"Content-Disposition": f'attachment; filename="mission-{mission_id}.trace.json"',
+               "Vary": "Accept-Encoding"}
+    # O trace já está comprimido no banco: sai como está para quem aceita gzip
+    if accepts_gzip(request.headers.get("accept-encoding", "")):
+        return Response(profile.trace, media_type="application/json", headers={**headers, "Content-Encoding": "gzip"})
+    return Response(gzip.decompress(profile.trace), media_type="application/json", headers=headers)
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """Accept-Encoding com q-values: "gzip;q=0" recusa; "*" vale para gzip quando ele não é citado."""
+    weights = {}
+    for part in accept_encoding.split(","):
+        coding, *params = [piece.strip() for piece in part.split(";")]
+        if not coding:
+            continue
+        weight = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[coding.lower()] = weight
+    for coding in ("gzip", "x-gzip", "*"):
+        if coding in weights:
+            return weights[coding] > 0
+    return False
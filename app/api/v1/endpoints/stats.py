@@ -1,39 +1,32 @@
 from fastapi import APIRouter, Depends
 from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
-from app.db.session import get_db
-from app.models.models import Lead
+from app.db.session import get_async_read_db
+from app.models.models import LeadStats, LEAD_STATUSES, aggregate_lead_stats
 
 router = APIRouter()
 
 @router.get("/")
-def get_stats(db: Session = Depends(get_db)):
+async def get_stats(db: AsyncSession = Depends(get_async_read_db)):
     """
     Retorna estatísticas consolidadas para o dashboard.
     """
     try:
-        total_leads = db.query(Lead).count()
+        # Contadores incrementais (O(1)); sem a linha de lead_stats, agrega no banco
+        stats = await db.get(LeadStats, 1)
+        if stats is not None:
+            counters = {column.name: getattr(stats, column.name) for column in LeadStats.__table__.columns}
+        else:
+            counters = await db.run_sync(lambda session: aggregate_lead_stats(session.connection()))
         
-        # Contar VIP leads (lead_score > 30)
-        vip_leads = 0
-        total_revenue = 0.0
-        
-        leads = db.query(Lead).all()
-        for lead in leads:
-            score = 0
-            if lead.scores and isinstance(lead.scores, dict):
-                score = lead.scores.get('lead_score', 0)
-            
-            if score > 30:
-                vip_leads += 1
-            
-            # Calcular revenue estimado baseado no score
-            total_revenue += float(score) * 1000  # R$ 1000 por ponto de score
+        # Revenue estimado baseado no score
+        total_revenue = float(counters["score_sum"]) * 1000  # R$ 1000 por ponto de score
         
         return {
-            "total_leads": total_leads,
-            "vip_leads": vip_leads,
+            "total_leads": counters["total_leads"],
+            "vip_leads": counters["vip_leads"],
+            "leads_by_status": {status: counters[f"{status}_leads"] for status in LEAD_STATUSES},
             "potential_revenue": total_revenue,
             "region_coverage": "Grande São Paulo",
             "last_update": datetime.now().isoformat()
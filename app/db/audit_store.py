@@ -0,0 +1,341 @@
+import glob
+import gzip
+import hashlib
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional
+from sqlalchemy import delete, select
+from sqlalchemy.engine import Engine
+from app.core.config import settings
+from app.models.models import AuditLog, AuditOutbox, Lead
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_SUFFIX = ".jsonl.gz"
+INDEX_SUFFIX = ".idx"
+COMPRESS_LEVEL = 9  # membros pequenos (um lote): o custo extra de CPU é desprezível
+IMPORT_BATCH_SIZE = 1_000
+OUTBOX_MIN_AGE_SECONDS = 300  # lotes mais novos podem ser de um writer ainda em execução
+
+class AuditStore:
+    """
+    Trilha de auditoria só de acréscimo, fora do banco principal.
+
+    Cada lote gravado vira um membro gzip no segmento ativo do processo
+    (`audit-<inicio>-<host>-<pid>-<n>.jsonl.gz`) e uma linha no índice ao lado (`.idx`)
+    com offset, tamanho, faixa de lead_id e de horário do membro. Consultas por faixa
+    descomprimem só os membros que interessam. Acima de `segment_max_bytes` o processo
+    passa a gravar num segmento novo; a retenção apaga segmentos inteiros.
+
+    O índice é gravado depois dos dados: um membro sem linha no índice (queda no meio
+    da gravação) fica invisível para as consultas, nunca corrompido.
+    """
+    def __init__(self, path: str = None, segment_max_bytes: int = None, retention_days: int = None):
+        self.path = path or settings.AUDIT_STORE_PATH
+        self.segment_max_bytes = segment_max_bytes or settings.AUDIT_SEGMENT_MAX_BYTES
+        self.retention_days = retention_days if retention_days is not None else settings.AUDIT_RETENTION_DAYS
+        os.makedirs(self.path, exist_ok=True)
+        self._lock = threading.Lock()
+        self._segment: Optional[str] = None
+        self._segment_pid = 0
+        self._sequence = 0
+
+    def append(self, records: List[Dict[str, Any]]):
+        """Grava um lote de registros (com "ts" e "lead_id") como um membro gzip."""
+        if not records:
+            return
+        data = gzip.compress(
+            "".join(json.dumps(r, ensure_ascii=False, separators=(",", ":")) + "\n" for r in records).encode("utf-8"),
+            compresslevel=COMPRESS_LEVEL
+        )
+        timestamps = [_epoch(r["ts"]) for r in records]
+        lead_ids = [r["lead_id"] for r in records if r.get("lead_id") is not None]
+        with self._lock:
+            segment = self._active_segment(len(data))
+            with open(segment, "ab") as f:
+                offset = f.seek(0, os.SEEK_END)
+                f.write(data)
+            entry = {
+                "offset": offset, "length": len(data), "records": len(records),
+                "first_ts": min(timestamps), "last_ts": max(timestamps),
+                "min_lead_id": min(lead_ids) if lead_ids else None,
+                "max_lead_id": max(lead_ids) if lead_ids else None,
+            }
+            with open(segment[:-len(SEGMENT_SUFFIX)] + INDEX_SUFFIX, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+
+    def _active_segment(self, incoming: int) -> str:
+        # Processos filhos (fork do Celery) nunca herdam o segmento do pai
+        rotate = self._segment is None or self._segment_pid != os.getpid()
+        if not rotate and os.path.exists(self._segment):
+            rotate = os.path.getsize(self._segment) + incoming > self.segment_max_bytes
+        if rotate:
+            if self._segment is not None and self._segment_pid == os.getpid():
+                self.apply_retention()
+            self._sequence += 1
+            self._segment_pid = os.getpid()
+            started = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+            name = f"audit-{started}-{socket.gethostname()}-{self._segment_pid}-{self._sequence}{SEGMENT_SUFFIX}"
+            self._segment = os.path.join(self.path, name)
+        return self._segment
+
+    def segments(self) -> List[Dict[str, Any]]:
+        """Segmentos com o resumo do índice, do mais antigo para o mais novo."""
+        result = []
+        for index_path in glob.glob(os.path.join(self.path, "audit-*" + INDEX_SUFFIX)):
+            members = _read_index(index_path)
+            if not members:
+                continue
+            lead_ids = [m[k] for m in members for k in ("min_lead_id", "max_lead_id") if m[k] is not None]
+            result.append({
+                "name": os.path.basename(index_path)[:-len(INDEX_SUFFIX)] + SEGMENT_SUFFIX,
+                "path": index_path[:-len(INDEX_SUFFIX)] + SEGMENT_SUFFIX,
+                "index_path": index_path,
+                "members": members,
+                "records": sum(m["records"] for m in members),
+                "bytes": sum(m["length"] for m in members),
+                "first_ts": min(m["first_ts"] for m in members),
+                "last_ts": max(m["last_ts"] for m in members),
+                "min_lead_id": min(lead_ids) if lead_ids else None,
+                "max_lead_id": max(lead_ids) if lead_ids else None,
+            })
+        return sorted(result, key=lambda s: (s["first_ts"], s["name"]))
+
+    def scan(self, since: datetime = None, until: datetime = None,
+             lead_from: int = None, lead_to: int = None) -> Iterator[Dict[str, Any]]:
+        """
+        Registros com `since <= ts < until` e `lead_from <= lead_id <= lead_to` (limites
+        opcionais), em ordem de gravação por segmento.
+        """
+        start = _epoch(since) if since is not None else None
+        end = _epoch(until) if until is not None else None
+        for segment in self.segments():
+            if not _overlaps(segment, start, end, lead_from, lead_to):
+                continue
+            try:
+                f = open(segment["path"], "rb")
+            except FileNotFoundError:  # apagado pela retenção durante a leitura
+                continue
+            with f:
+                for member in segment["members"]:
+                    if not _overlaps(member, start, end, lead_from, lead_to):
+                        continue
+                    f.seek(member["offset"])
+                    for line in gzip.decompress(f.read(member["length"])).splitlines():
+                        record = json.loads(line)
+                        ts = _epoch(record["ts"])
+                        lead_id = record.get("lead_id")
+                        if start is not None and ts < start or end is not None and ts >= end:
+                            continue
+                        if lead_from is not None and (lead_id is None or lead_id < lead_from):
+                            continue
+                        if lead_to is not None and (lead_id is None or lead_id > lead_to):
+                            continue
+                        yield record
+
+    def history(self, lead_id: int) -> List[Dict[str, Any]]:
+        return list(self.scan(lead_from=lead_id, lead_to=lead_id))
+
+    def apply_retention(self, days: int = None, now: float = None) -> Dict[str, int]:
+        """Apaga os segmentos cujo registro mais novo passou da retenção (0 dias = guardar tudo)."""
+        days = self.retention_days if days is None else days
+        removed = {"segments": 0, "records": 0, "bytes": 0}
+        if days <= 0:
+            return removed
+        cutoff = (now if now is not None else time.time()) - days * 86400
+        for segment in self.segments():
+            if segment["last_ts"] >= cutoff:
+                continue
+            for path in (segment["path"], segment["index_path"]):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            removed["segments"] += 1
+            removed["records"] += segment["records"]
+            removed["bytes"] += segment["bytes"]
+        if removed["segments"]:
+            logger.info(f"Retenção da auditoria: {removed['segments']} segmentos ({removed['records']} registros) apagados")
+        return removed
+
+def _read_index(index_path: str) -> List[Dict[str, Any]]:
+    members = []
+    try:
+        with open(index_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    members.append(json.loads(line))
+                except ValueError:  # linha parcial de uma gravação interrompida
+                    continue
+    except FileNotFoundError:
+        pass
+    return members
+
+def _overlaps(entry: Dict[str, Any], start, end, lead_from, lead_to) -> bool:
+    if start is not None and entry["last_ts"] < start or end is not None and entry["first_ts"] >= end:
+        return False
+    if lead_from is not None or lead_to is not None:
+        if entry["min_lead_id"] is None:
+            return False
+        if lead_from is not None and entry["max_lead_id"] < lead_from:
+            return False
+        if lead_to is not None and entry["min_lead_id"] > lead_to:
+            return False
+    return True
+
+def _epoch(value) -> float:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+def lead_digest(scores: Dict[str, Any], labels: Dict[str, Any], evidence: List[Any]) -> str:
+    """Impressão digital do que o lead gravou na decisão (scores, labels, evidências)."""
+    content = json.dumps([scores, labels, evidence], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+
+def compact_audit_record(audit: Dict[str, Any], lead_id: int, lead: Dict[str, Any], ts: datetime = None) -> Dict[str, Any]:
+    """
+    Registro de auditoria que referencia o lead em vez de copiá-lo: guarda o score e o tier
+    do momento da decisão, o digest de scores/labels/evidências (um re-score posterior muda o
+    digest, o score da decisão continua em final_score) e só o que a análise produziu e não
+    foi gravado no lead (confianças, sinais de risco, geolocalização...).
+    """
+    scores = lead.get("scores") or {}
+    labels = lead.get("labels") or {}
+    evidence = lead.get("evidence_snippets") or []
+    payload = dict(audit.get("payload") or {})
+    payload.pop("lead_id", None)
+    ts = ts or datetime.now(timezone.utc)
+    if ts.tzinfo is None:  # SQLite devolve o server_default (UTC) sem fuso
+        ts = ts.replace(tzinfo=timezone.utc)
+    record = {
+        "ts": ts.astimezone(timezone.utc).isoformat(timespec="seconds"),
+        "lead_id": lead_id,
+        "event": audit.get("event"),
+        "actor": audit.get("actor"),
+        "model_version": audit.get("model_version"),
+        "prompt_version": audit.get("prompt_version"),
+        "final_score": payload.pop("final_score", scores.get("lead_score")),
+        "tier": labels.get("tier"),
+        "lead_digest": lead_digest(scores, labels, evidence),
+    }
+    delta = _payload_delta(payload, scores, labels, evidence)
+    if delta:
+        record["payload"] = delta
+    return record
+
+def _payload_delta(payload: Dict[str, Any], scores, labels, evidence) -> Dict[str, Any]:
+    # Remove só o que é igual ao gravado no lead; o que divergir fica no registro
+    text = dict(payload.pop("text_analysis", None) or {})
+    if text.get("scores") == scores:
+        text.pop("scores")
+    if text.get("evidence") == evidence:
+        text.pop("evidence")
+    for key in ("pain_point", "intent_stage", "maturity"):
+        value = text.get(key)
+        if isinstance(value, dict) and "label" in value and value["label"] == labels.get(key):
+            rest = {k: v for k, v in value.items() if k != "label"}
+            if rest:
+                text[key] = rest
+            else:
+                text.pop(key)
+
+    visual = dict(payload.pop("visual_analysis", None) or {})
+    stored = {"visual_fit": scores.get("visual_fit"), "justification": scores.get("visual_justification"),
+              "attributes": labels.get("visual_profile"), "tier": labels.get("tier")}
+    for key, value in stored.items():
+        if key in visual and visual[key] == value:
+            visual.pop(key)
+
+    if text:
+        payload["text_analysis"] = text
+    if visual:
+        payload["visual_analysis"] = visual
+    return payload
+
+def import_audit_logs(engine: Engine, store: AuditStore, batch_size: int = IMPORT_BATCH_SIZE, delete_rows: bool = True) -> int:
+    """
+    Move as linhas antigas de audit_logs para o store, em lotes por id. Os registros são
+    compactados contra o lead atual; se o lead mudou desde a decisão (re-score, edição),
+    os campos divergentes continuam no registro. Com delete_rows=True as linhas migradas
+    saem da tabela no mesmo passo (rode VACUUM depois para devolver o espaço no SQLite).
+    """
+    moved, last_id = 0, 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(
+                select(AuditLog).where(AuditLog.id > last_id).order_by(AuditLog.id).limit(batch_size)
+            ).all()
+            if not rows:
+                return moved
+            lead_ids = {row.payload.get("lead_id") for row in rows if row.payload}
+            leads = {
+                lead.id: {"scores": lead.scores, "labels": lead.labels, "evidence_snippets": lead.evidence_snippets}
+                for lead in conn.execute(
+                    select(Lead.id, Lead.scores, Lead.labels, Lead.evidence_snippets).where(Lead.id.in_(lead_ids - {None}))
+                )
+            }
+            records = []
+            for row in rows:
+                audit = {"event": row.event, "actor": row.actor, "model_version": row.model_version,
+                         "prompt_version": row.prompt_version, "payload": row.payload or {}}
+                lead_id = audit["payload"].get("lead_id")
+                records.append(compact_audit_record(audit, lead_id, leads.get(lead_id, {}), ts=row.timestamp))
+            # Store antes do DELETE: uma falha no meio deixa no máximo registros duplicados, nunca perdidos
+            store.append(records)
+            if delete_rows:
+                conn.execute(delete(AuditLog).where(AuditLog.id.in_([row.id for row in rows])))
+        moved += len(rows)
+        last_id = rows[-1].id
+
+def reconcile_audit_outbox(engine: Engine, store: AuditStore, min_age_seconds: float = OUTBOX_MIN_AGE_SECONDS) -> Dict[str, int]:
+    """
+    Reenvia ao store os lotes que ficaram em audit_outbox: o processo caiu entre o commit dos
+    leads e o append (ou antes de apagar a linha). Registros que já estão no store, pela chave
+    (lead_id, ts, event), não são regravados; a linha da outbox sai depois do append.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=min_age_seconds)
+    totals = {"batches": 0, "records": 0, "skipped": 0}
+    with engine.connect() as conn:
+        rows = conn.execute(
+            select(AuditOutbox.id, AuditOutbox.records, AuditOutbox.created_at).order_by(AuditOutbox.id)
+        ).all()
+    for row in rows:
+        created_at = row.created_at
+        if created_at is not None and created_at.tzinfo is None:  # SQLite: UTC sem fuso
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        if created_at is not None and created_at > cutoff:
+            continue
+        records = row.records or []
+        lead_ids = [r["lead_id"] for r in records if r.get("lead_id") is not None]
+        stored = set()
+        if lead_ids:
+            stored = {(r.get("lead_id"), r["ts"], r.get("event"))
+                      for r in store.scan(lead_from=min(lead_ids), lead_to=max(lead_ids))}
+        missing = [r for r in records if (r.get("lead_id"), r["ts"], r.get("event")) not in stored]
+        if missing:
+            store.append(missing)
+        with engine.begin() as conn:
+            conn.execute(delete(AuditOutbox).where(AuditOutbox.id == row.id))
+        totals["batches"] += 1
+        totals["records"] += len(missing)
+        totals["skipped"] += len(records) - len(missing)
+    return totals
+
+_store: Optional[AuditStore] = None
+
+def get_audit_store() -> Optional[AuditStore]:
+    """Store do processo (None com AUDIT_STORE_ENABLED=false: auditoria volta para a tabela audit_logs)."""
+    global _store
+    if not settings.AUDIT_STORE_ENABLED:
+        return None
+    if _store is None or os.path.abspath(_store.path) != os.path.abspath(settings.AUDIT_STORE_PATH):
+        _store = AuditStore()
+    return _store
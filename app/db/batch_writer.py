@@ -0,0 +1,182 @@
+import asyncio
+import logging
+import time
+from typing import List, Dict, Any
+from app.core.config import settings
+from app.db.audit_store import AuditStore, compact_audit_record, get_audit_store
+from sqlalchemy import delete
+from app.models.models import SourceItem, Lead, AuditLog, AuditOutbox, OutreachDraft
+from app.services.metrics import DB_COMMIT_SECONDS, PIPELINE_SIGNALS
+from app.services.profiler import MissionProfiler
+
+class LeadBatchWriter:
+    """
+    Grava SourceItem + Lead + auditoria em lote: uma transação (um commit / fsync)
+    para até `batch_size` leads, ou quando `flush_interval` segundos se passam desde
+    o primeiro registro pendente.
+
+    Cada registro é um dict com os kwargs de "source_item", "lead" e "audit"
+    (source_item_id e o lead_id da auditoria são preenchidos aqui).
+    Se o lote falhar no banco, ele é regravado registro a registro para isolar
+    o item problemático sem perder o restante da missão.
+
+    A auditoria vai compactada para o AuditStore depois do commit (só leads gravados
+    entram na trilha); sem store (AUDIT_STORE_ENABLED=false), ou se o store falhar,
+    ela vai para a tabela audit_logs como antes. Os registros também entram em
+    audit_outbox na transação dos leads; a linha é apagada na transação do lote
+    seguinte (ou no close) depois do append, então uma queda entre o commit e o
+    append deixa a auditoria na outbox para o `audit_admin.py reconcile`.
+
+    Com `profiler`, cada flush vira um span "db_write" com os trace_id dos sinais do lote.
+
+    Em código assíncrono use aadd/aflush/aclose: o lote é separado no loop e a gravação
+    (commit + append da auditoria) roda numa thread, sem travar o loop de eventos.
+    """
+    def __init__(self, session_factory, batch_size: int = None, flush_interval: float = None,
+                 audit_store: AuditStore = None, profiler: MissionProfiler = None):
+        self.session_factory = session_factory
+        self.profiler = profiler
+        self.audit_store = audit_store if audit_store is not None else get_audit_store()
+        self.batch_size = batch_size or settings.DB_WRITE_BATCH_SIZE
+        self.flush_interval = flush_interval if flush_interval is not None else settings.DB_WRITE_FLUSH_INTERVAL
+        self.logger = logging.getLogger(__name__)
+        self.results: List[Dict[str, Any]] = []
+        self.failed = 0
+        self._pending: List[Dict[str, Any]] = []
+        self._delivered: List[int] = []  # linhas de audit_outbox já gravadas no store
+        self._first_pending_at = 0.0
+
+    def add(self, record: Dict[str, Any]):
+        if self._append(record):
+            self.flush()
+
+    async def aadd(self, record: Dict[str, Any]):
+        if self._append(record):
+            await self.aflush()
+
+    def flush(self):
+        batch = self._take()
+        if batch:
+            self._write_batch(batch)
+
+    async def aflush(self):
+        batch = self._take()
+        if batch:
+            await asyncio.to_thread(self._write_batch, batch)
+
+    async def aclose(self) -> List[Dict[str, Any]]:
+        await self.aflush()
+        return await asyncio.to_thread(self.close)
+
+    def _append(self, record: Dict[str, Any]) -> bool:
+        """Enfileira o registro; True quando o lote deve ser gravado."""
+        if not self._pending:
+            self._first_pending_at = time.monotonic()
+        self._pending.append(record)
+        return len(self._pending) >= self.batch_size or time.monotonic() - self._first_pending_at >= self.flush_interval
+
+    def _take(self) -> List[Dict[str, Any]]:
+        batch, self._pending = self._pending, []
+        return batch
+
+    def _write_batch(self, batch: List[Dict[str, Any]]):
+        start = time.perf_counter()
+        try:
+            self.results.extend(self._write(batch))
+        except Exception as e:
+            self.logger.warning(f"Falha ao gravar lote de {len(batch)} leads ({e}); regravando individualmente")
+            for record in batch:
+                try:
+                    self.results.extend(self._write([record]))
+                except Exception as record_error:
+                    self.failed += 1
+                    PIPELINE_SIGNALS.labels("write_failed").inc()
+                    self.logger.error(f"Lead descartado por erro de gravação: {record_error}")
+        if self.profiler is not None:
+            self.profiler.add("db_write", "write", start, leads=len(batch), signals=[r.get("trace_id") for r in batch])
+
+    def close(self) -> List[Dict[str, Any]]:
+        self.flush()
+        if self._delivered:
+            db = self.session_factory()
+            try:
+                self._clear_outbox(db, self._delivered)
+                db.commit()
+                self._delivered = []
+            except Exception as e:
+                # Sem perda: o reconcile ignora registros que já estão no store
+                db.rollback()
+                self.logger.warning(f"Falha ao limpar audit_outbox ({e})")
+            finally:
+                db.close()
+        return self.results
+
+    @staticmethod
+    def _clear_outbox(db, outbox_ids: List[int]):
+        db.execute(delete(AuditOutbox).where(AuditOutbox.id.in_(outbox_ids)))
+
+    def _write(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        db = self.session_factory()
+        try:
+            source_items = [SourceItem(**r["source_item"]) for r in batch]
+            db.add_all(source_items)
+            db.flush()
+
+            leads = [Lead(source_item_id=item.id, **r["lead"]) for item, r in zip(source_items, batch)]
+            db.add_all(leads)
+            db.flush()
+
+            audit_records = []
+            for lead, r in zip(leads, batch):
+                if self.audit_store is None:
+                    db.add(self._audit_row(lead.id, r["audit"]))
+                else:
+                    audit_records.append(compact_audit_record(r["audit"], lead.id, r["lead"]))
+                if r.get("outreach"):
+                    db.add(OutreachDraft(lead_id=lead.id, **r["outreach"]))
+            results = [{"lead_id": lead.id, "score": lead.scores["lead_score"]} for lead in leads]
+            outbox_id = None
+            if audit_records:
+                outbox = AuditOutbox(records=audit_records)
+                db.add(outbox)
+                db.flush()
+                outbox_id = outbox.id
+            delivered = list(self._delivered)
+            if delivered:
+                self._clear_outbox(db, delivered)
+            start = time.perf_counter()
+            db.commit()
+            self._delivered = [i for i in self._delivered if i not in delivered]
+            DB_COMMIT_SECONDS.observe(time.perf_counter() - start)
+            PIPELINE_SIGNALS.labels("saved").inc(len(results))
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        if audit_records:
+            self._append_audit(audit_records, batch, outbox_id)
+        return results
+
+    @staticmethod
+    def _audit_row(lead_id: int, audit: Dict[str, Any]) -> AuditLog:
+        return AuditLog(**{**audit, "payload": {"lead_id": lead_id, **audit.get("payload", {})}})
+
+    def _append_audit(self, audit_records: List[Dict[str, Any]], batch: List[Dict[str, Any]], outbox_id: int):
+        # Os leads já estão gravados: uma falha aqui não pode fazer o lote ser regravado
+        try:
+            self.audit_store.append(audit_records)
+            self._delivered.append(outbox_id)
+        except Exception as e:
+            self.logger.error(f"Falha ao gravar auditoria no store ({e}); gravando {len(batch)} registros em audit_logs")
+            db = self.session_factory()
+            try:
+                db.add_all([self._audit_row(a["lead_id"], r["audit"]) for a, r in zip(audit_records, batch)])
+                db.execute(delete(AuditOutbox).where(AuditOutbox.id == outbox_id))
+                db.commit()
+            except Exception as fallback_error:
+                db.rollback()
+                self.logger.error(f"Auditoria de {len(batch)} leads não gravada: {fallback_error}")
+            finally:
+                db.close()
@@ -0,0 +1,208 @@
+import logging
+from typing import Dict
+from sqlalchemy import Integer, inspect, select, text, update, delete, insert, func
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from app.models.models import Base, Lead, LeadStats, OutreachDraft, SourceItem, aggregate_lead_stats
+from app.core.config import settings
+from app.services.dedup import TextNormalizer
+from app.services.lead_artifacts import build_lead_artifacts
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_BATCH_SIZE = 10_000
+FINGERPRINT_BATCH_SIZE = 1_000
+ARTIFACTS_BATCH_SIZE = 1_000
+COPY_BATCH_SIZE = 5_000
+
+def run_migrations(engine: Engine):
+    """
+    Migração idempotente do schema: cria tabelas novas, adiciona colunas novas em bancos
+    antigos (ex.: lead_score, tier, is_sp_region, estimated_revenue), cria os índices,
+    preenche as colunas tipadas a partir do JSON de scores/labels e os artefatos de
+    ROI/SDR dos leads antigos e a impressão digital de deduplicação dos itens de origem
+    recentes. Por fim ressincroniza lead_stats.
+    """
+    Base.metadata.create_all(bind=engine)
+    for table in Base.metadata.sorted_tables:
+        _add_missing_columns(engine, table)
+        _upgrade_json_columns(engine, table)
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    backfilled = backfill_lead_columns(engine)
+    backfill_lead_artifacts(engine)
+    backfill_source_fingerprints(engine)
+    rebuild_lead_stats(engine)
+    return backfilled
+
+def rebuild_lead_stats(engine: Engine):
+    """
+    Recalcula lead_stats a partir de leads. Necessário após escritas fora do ORM
+    (SQL direto, bulk inserts de Core), que não passam pelo contador incremental.
+    """
+    with engine.begin() as conn:
+        conn.execute(delete(LeadStats))
+        conn.execute(insert(LeadStats).values(id=1, **aggregate_lead_stats(conn)))
+
+def _add_missing_columns(engine: Engine, table):
+    existing = {column["name"] for column in inspect(engine).get_columns(table.name)}
+    with engine.begin() as conn:
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            column_type = column.type.compile(dialect=engine.dialect)
+            conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+            logger.info(f"Coluna adicionada: {table.name}.{column.name}")
+
+def _upgrade_json_columns(engine: Engine, table):
+    """PostgreSQL: colunas criadas como json viram jsonb (os índices GIN e o operador @> exigem jsonb)."""
+    if engine.dialect.name != "postgresql":
+        return
+    existing = {column["name"]: column["type"] for column in inspect(engine).get_columns(table.name)}
+    with engine.begin() as conn:
+        for column in table.columns:
+            if not isinstance(column.type.dialect_impl(engine.dialect), JSONB) or isinstance(existing.get(column.name), JSONB):
+                continue
+            conn.execute(text(f"ALTER TABLE {table.name} ALTER COLUMN {column.name} TYPE JSONB USING {column.name}::jsonb"))
+            logger.info(f"Coluna convertida para jsonb: {table.name}.{column.name}")
+
+def backfill_lead_columns(engine: Engine, batch_size: int = BACKFILL_BATCH_SIZE) -> int:
+    """Preenche em lotes (um commit por lote) os leads ainda sem lead_score. Retorna o total atualizado."""
+    pending = select(Lead.id).where(Lead.lead_score.is_(None)).limit(batch_size).scalar_subquery()
+    stmt = (
+        update(Lead)
+        .where(Lead.id.in_(pending))
+        .values(
+            lead_score=func.coalesce(Lead.scores["lead_score"].as_float(), 0.0),
+            tier=func.coalesce(Lead.labels["tier"].as_string(), "Standard"),
+            is_sp_region=func.coalesce(Lead.scores["is_sp_region"].as_boolean(), True)
+        )
+        .execution_options(synchronize_session=False)
+    )
+    total = 0
+    while True:
+        with engine.begin() as conn:
+            updated = conn.execute(stmt).rowcount
+        total += updated
+        if updated < batch_size:
+            break
+    if total:
+        # Estatísticas atualizadas para o planner escolher entre os novos índices
+        with engine.begin() as conn:
+            conn.execute(text(f"ANALYZE {Lead.__tablename__}"))
+        logger.info(f"Backfill de colunas tipadas: {total} leads atualizados")
+    return total
+
+def backfill_lead_artifacts(engine: Engine, batch_size: int = ARTIFACTS_BATCH_SIZE) -> int:
+    """Calcula faturamento estimado e rascunho SDR (OutreachDraft) dos leads salvos antes do pré-cálculo."""
+    total = 0
+    while True:
+        with Session(engine) as db:
+            rows = (
+                db.query(Lead.id, Lead.labels, Lead.scores, SourceItem.author_handle)
+                .outerjoin(SourceItem, Lead.source_item_id == SourceItem.id)
+                .filter(Lead.estimated_revenue.is_(None))
+                .order_by(Lead.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not rows:
+                break
+            lead_ids = [row.id for row in rows]
+            with_draft = {lead_id for (lead_id,) in db.query(OutreachDraft.lead_id).filter(OutreachDraft.lead_id.in_(lead_ids))}
+
+            updates, drafts = [], []
+            for row in rows:
+                artifacts = build_lead_artifacts(row.labels, row.scores, row.author_handle)
+                updates.append({"id": row.id, **artifacts["lead"]})
+                if row.id not in with_draft:
+                    drafts.append({"lead_id": row.id, **artifacts["outreach"]})
+            # UPDATE em massa por chave primária (não passa pelo flush; lead_stats é reconstruído ao final)
+            db.execute(update(Lead), updates)
+            if drafts:
+                db.execute(insert(OutreachDraft), drafts)
+            db.commit()
+            total += len(rows)
+    if total:
+        logger.info(f"Backfill de artefatos ROI/SDR: {total} leads")
+    return total
+
+def backfill_source_fingerprints(engine: Engine, lookback: int = None, batch_size: int = FINGERPRINT_BATCH_SIZE) -> int:
+    """
+    Grava text_hash/minhash dos itens de origem salvos antes da coluna existir. Só os últimos
+    DEDUP_LOOKBACK itens entram no índice de duplicatas, então os mais antigos ficam nulos.
+    """
+    lookback = lookback or settings.DEDUP_LOOKBACK
+    normalizer = TextNormalizer()
+    window = select(SourceItem.id).order_by(SourceItem.id.desc()).limit(lookback).scalar_subquery()
+    total = 0
+    while True:
+        with Session(engine) as db:
+            rows = (
+                db.query(SourceItem.id, SourceItem.text)
+                .filter(SourceItem.id.in_(window), SourceItem.text_hash.is_(None))
+                .order_by(SourceItem.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not rows:
+                break
+            db.execute(update(SourceItem), [
+                {"id": row.id, "text_hash": normalizer.text_hash(row.text or ""),
+                 "minhash": normalizer.pack(normalizer.minhash(row.text or ""))}
+                for row in rows
+            ])
+            db.commit()
+            total += len(rows)
+    if total:
+        logger.info(f"Backfill da deduplicação: {total} itens de origem")
+    return total
+
+def copy_database(source: Engine, target: Engine, batch_size: int = COPY_BATCH_SIZE) -> Dict[str, int]:
+    """
+    Migração de banco (ex.: sql_app.db -> PostgreSQL): copia todas as tabelas em lotes por chave
+    primária, preservando os ids. O destino precisa estar vazio. Colunas que ainda não existem no
+    banco de origem ficam nulas e são preenchidas pelo run_migrations do destino, que também
+    reconstrói lead_stats. Retorna o total de linhas copiadas por tabela.
+    """
+    Base.metadata.create_all(bind=target)
+    tables = [table for table in Base.metadata.sorted_tables if table.name != LeadStats.__tablename__]
+    with target.connect() as conn:
+        for table in tables:
+            if conn.execute(select(table).limit(1)).first() is not None:
+                raise RuntimeError(f"Banco de destino não está vazio (tabela {table.name})")
+
+    source_tables = set(inspect(source).get_table_names())
+    copied = {}
+    for table in tables:
+        if table.name not in source_tables:
+            continue
+        present = {column["name"] for column in inspect(source).get_columns(table.name)}
+        columns = [column for column in table.columns if column.name in present]
+        (pk,) = table.primary_key.columns
+        query = select(*columns).order_by(pk).limit(batch_size)
+        copied[table.name], last = 0, None
+        while True:
+            with source.connect() as conn:
+                rows = conn.execute(query if last is None else query.where(pk > last)).mappings().all()
+            if not rows:
+                break
+            with target.begin() as conn:
+                conn.execute(insert(table), [dict(row) for row in rows])
+            copied[table.name] += len(rows)
+            last = rows[-1][pk.name]
+        logger.info(f"Copiados {copied[table.name]} registros de {table.name}")
+
+    if target.dialect.name == "postgresql":
+        # ids foram copiados explicitamente: as sequências precisam continuar do maior id
+        with target.begin() as conn:
+            for table in tables:
+                (pk,) = table.primary_key.columns
+                if isinstance(pk.type, Integer):
+                    conn.execute(text(
+                        f"SELECT setval(pg_get_serial_sequence('{table.name}', '{pk.name}'), "
+                        f"COALESCE(MAX({pk.name}), 1), MAX({pk.name}) IS NOT NULL) FROM {table.name}"
+                    ))
+    run_migrations(target)
+    return copied
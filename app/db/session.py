@@ -1,17 +1,105 @@
-from sqlalchemy import create_engine
+from typing import Any, Dict
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
 
-# Para desenvolvimento simples, vamos usar SQLite se a URL for a padrão ou não estiver configurada
-database_url = settings.DATABASE_URL
-if database_url.startswith("postgresql") or not database_url:
-    # Para simplificar o passo a passo, usaremos SQLite síncrono inicialmente
-    database_url = "sqlite:///./sql_app.db"
+# SQLite (arquivo local) continua o padrão em desenvolvimento; em produção DATABASE_URL aponta
+# para o PostgreSQL compartilhado por todos os workers da API e do Celery.
+SYNC_DRIVERS = {"postgresql": "postgresql+psycopg2", "sqlite": "sqlite"}
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
 
-engine = create_engine(
-    database_url, connect_args={"check_same_thread": False} if "sqlite" in database_url else {}
-)
+def database_url(url: str, is_async: bool = False) -> str:
+    """Normaliza DATABASE_URL para o driver síncrono (psycopg2) ou assíncrono (asyncpg/aiosqlite)."""
+    url = url or "sqlite:///./sql_app.db"
+    if url.startswith("postgres://"):  # formato de Heroku/Render
+        url = "postgresql://" + url[len("postgres://"):]
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    drivers = ASYNC_DRIVERS if is_async else SYNC_DRIVERS
+    if backend not in drivers:
+        raise ValueError(f"Banco não suportado: {backend}")
+    return parsed.set(drivername=drivers[backend]).render_as_string(hide_password=False)
+
+def uses_sqlite_profile(url: str) -> bool:
+    """Perfil WAL + writer único: só para SQLite em arquivo (bancos em memória não compartilham conexões)."""
+    parsed = make_url(url)
+    return settings.SQLITE_WAL and parsed.get_backend_name() == "sqlite" and parsed.database not in (None, "", ":memory:")
+
+def engine_options(url: str, is_async: bool = False, read_only: bool = False) -> Dict[str, Any]:
+    if make_url(url).get_backend_name() == "sqlite":
+        options = {} if is_async else {"connect_args": {"check_same_thread": False}}
+        if uses_sqlite_profile(url):
+            # Writer: uma conexão, serializando as escritas do processo sem disputar o lock do arquivo
+            pool_size = settings.SQLITE_READ_POOL_SIZE if read_only else 1
+            options.update(pool_size=pool_size, max_overflow=0, pool_timeout=settings.DB_POOL_TIMEOUT)
+        return options
+    options = {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": True,
+    }
+    if settings.DB_STATEMENT_TIMEOUT_MS:
+        timeout = str(settings.DB_STATEMENT_TIMEOUT_MS)
+        options["connect_args"] = (
+            {"server_settings": {"statement_timeout": timeout}} if is_async
+            else {"options": f"-c statement_timeout={timeout}"}
+        )
+    return options
+
+def sqlite_pragmas(read_only: bool = False):
+    pragmas = [
+        f"busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}",
+        f"cache_size=-{settings.SQLITE_CACHE_SIZE_KB}",
+        f"mmap_size={settings.SQLITE_MMAP_SIZE}",
+        "temp_store=MEMORY",
+    ]
+    if read_only:
+        return pragmas + ["query_only=ON"]
+    # WAL fica gravado no arquivo: leitores não bloqueiam o writer (nem o contrário)
+    return ["journal_mode=WAL", f"synchronous={settings.SQLITE_SYNCHRONOUS}"] + pragmas
+
+def _apply_sqlite_profile(engine, read_only: bool = False):
+    pragmas = sqlite_pragmas(read_only)
+
+    @event.listens_for(engine.sync_engine if hasattr(engine, "sync_engine") else engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(f"PRAGMA {pragma}")
+        cursor.close()
+    return engine
+
+def make_engine(url: str, read_only: bool = False):
+    url = database_url(url)
+    engine = create_engine(url, **engine_options(url, read_only=read_only))
+    return _apply_sqlite_profile(engine, read_only) if uses_sqlite_profile(url) else engine
+
+def make_async_engine(url: str, read_only: bool = False):
+    url = database_url(url, is_async=True)
+    engine = create_async_engine(url, **engine_options(url, is_async=True, read_only=read_only))
+    return _apply_sqlite_profile(engine, read_only) if uses_sqlite_profile(url) else engine
+
+def make_read_engine(url: str, engine):
+    """Pool somente-leitura no perfil SQLite; nos demais casos as leituras usam o próprio engine."""
+    if not uses_sqlite_profile(database_url(url)):
+        return engine
+    return make_engine(url, read_only=True)
+
+# Engine síncrono: workers Celery, scripts, pipeline de coleta e as escritas da API (endpoints `def`,
+# no threadpool). No SQLite é a única conexão de escrita do processo.
+engine = make_engine(settings.DATABASE_URL)
+read_engine = make_read_engine(settings.DATABASE_URL, engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)  # dashboards e consultas
+
+# Engine assíncrono só para leitura: GETs da API (não ocupam o threadpool esperando o banco). Não há
+# writer assíncrono: um segundo pool de escrita seria outro writer disputando o lock do arquivo SQLite.
+async_read_engine = make_async_engine(settings.DATABASE_URL, read_only=uses_sqlite_profile(database_url(settings.DATABASE_URL)))
+AsyncReadSessionLocal = async_sessionmaker(async_read_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 
 def get_db():
     db = SessionLocal()
@@ -19,3 +107,14 @@ def get_db():
         yield db
     finally:
         db.close()
+
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_read_db():
+    async with AsyncReadSessionLocal() as db:
+        yield db
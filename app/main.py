@@ -1,7 +1,8 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.v1 import api_router
 from app.core.config import settings
+from app.services.metrics import HTTPMetricsMiddleware, render_metrics
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -15,10 +16,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # cursor de paginação de /leads
 )
+app.add_middleware(HTTPMetricsMiddleware)  # latência por rota, exposta em /metrics
 
 @app.get("/")
 def root():
     return {"message": "Agente de Captação por Intenção - Estética Médica API"}
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Métricas no formato Prometheus (pipeline, LLM, Serper, banco e API)."""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
@@ -1,9 +1,19 @@
-from sqlalchemy import Column, Integer, String, JSON, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, JSON, DateTime, ForeignKey, Text, Boolean, Float, Index, LargeBinary, event
+from sqlalchemy import inspect, insert, select, update
+from sqlalchemy.dialects.postgresql import JSONB, insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import Session
 from sqlalchemy.sql import func
 
 Base = declarative_base()
 
+# JSON no SQLite; JSONB no PostgreSQL (indexável por GIN e consultável com @>)
+JSONDocument = JSON().with_variant(JSONB(), "postgresql")
+
+VIP_SCORE_THRESHOLD = 30
+LEAD_STATUSES = ("pending", "approved", "rejected")
+
 class SourceItem(Base):
     __tablename__ = "source_items"
     id = Column(Integer, primary_key=True, index=True)
@@ -12,7 +22,11 @@ class SourceItem(Base):
     author_handle = Column(String)
     timestamp = Column(DateTime)
     text = Column(Text)
-    raw_metadata = Column(JSON)
+    raw_metadata = Column(JSONDocument)
+    # Impressão digital da deduplicação (TextNormalizer), gravada junto com o item: a missão seguinte
+    # carrega hash e assinatura MinHash prontos em vez de recalcular a partir do texto
+    text_hash = Column(String(40), index=True)
+    minhash = Column(LargeBinary)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 class Lead(Base):
@@ -20,19 +34,131 @@ class Lead(Base):
     id = Column(Integer, primary_key=True, index=True)
     source_item_id = Column(Integer, ForeignKey("source_items.id"))
     clinic_id = Column(Integer)
-    scores = Column(JSON)  # {fit, intent, urgency, maturity, risk, visual_fit, lead_score}
-    labels = Column(JSON)  # {pain_point, intent_stage, maturity, visual_profile}
-    evidence_snippets = Column(JSON)
-    status = Column(String, default="pending")  # pending, approved, rejected
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    scores = Column(JSONDocument)  # {fit, intent, urgency, maturity, risk, visual_fit, lead_score}
+    labels = Column(JSONDocument)  # {pain_point, intent_stage, maturity, visual_profile}
+    evidence_snippets = Column(JSONDocument)
+    status = Column(String, default="pending", index=True)  # pending, approved, rejected
+    # Cópias tipadas de scores/labels para ordenar e filtrar por índice (sincronizadas em _sync_lead_columns)
+    lead_score = Column(Float, index=True)
+    tier = Column(String, index=True)
+    is_sp_region = Column(Boolean, index=True)
+    # Artefatos pré-calculados ao salvar (ver app/services/lead_artifacts.py)
+    estimated_revenue = Column(Float)
+    revenue_service = Column(String)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+    __table_args__ = (
+        Index("ix_leads_status_lead_score", "status", "lead_score"),
+        # Só no PostgreSQL: filtros por conteúdo de scores/labels (ex.: labels @> '{"pain_point": "melasma"}')
+        Index("ix_leads_scores_gin", "scores", postgresql_using="gin", postgresql_ops={"scores": "jsonb_path_ops"}).ddl_if(dialect="postgresql"),
+        Index("ix_leads_labels_gin", "labels", postgresql_using="gin", postgresql_ops={"labels": "jsonb_path_ops"}).ddl_if(dialect="postgresql"),
+    )
+
+@event.listens_for(Lead, "before_insert")
+@event.listens_for(Lead, "before_update")
+def _sync_lead_columns(mapper, connection, lead):
+    scores = lead.scores or {}
+    labels = lead.labels or {}
+    lead.lead_score = float(scores.get("lead_score") or 0)
+    lead.tier = labels.get("tier") or "Standard"
+    lead.is_sp_region = bool(scores.get("is_sp_region", True))
+
+class LeadStats(Base):
+    """Contadores agregados de leads (linha única, id=1), mantidos incrementalmente a cada flush."""
+    __tablename__ = "lead_stats"
+    id = Column(Integer, primary_key=True)
+    total_leads = Column(Integer, nullable=False, default=0)
+    vip_leads = Column(Integer, nullable=False, default=0)  # lead_score > VIP_SCORE_THRESHOLD
+    score_sum = Column(Float, nullable=False, default=0.0)
+    revenue_sum = Column(Float, nullable=False, default=0.0)  # soma de Lead.estimated_revenue (pipeline)
+    pending_leads = Column(Integer, nullable=False, default=0)
+    approved_leads = Column(Integer, nullable=False, default=0)
+    rejected_leads = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+def aggregate_lead_stats(connection):
+    """Recalcula os contadores de LeadStats direto da tabela leads (usado no bootstrap e em rebuilds)."""
+    columns = [
+        func.count(Lead.id).label("total_leads"),
+        func.count(Lead.id).filter(Lead.lead_score > VIP_SCORE_THRESHOLD).label("vip_leads"),
+        func.coalesce(func.sum(Lead.lead_score), 0.0).label("score_sum"),
+        func.coalesce(func.sum(Lead.estimated_revenue), 0.0).label("revenue_sum")
+    ] + [func.count(Lead.id).filter(Lead.status == status).label(f"{status}_leads") for status in LEAD_STATUSES]
+    return dict(connection.execute(select(*columns)).mappings().one())
+
+def _lead_contribution(score, status, revenue, sign: int):
+    score = score or 0.0
+    contribution = {
+        "total_leads": sign,
+        "vip_leads": sign if score > VIP_SCORE_THRESHOLD else 0,
+        "score_sum": sign * score,
+        "revenue_sum": sign * (revenue or 0.0)
+    }
+    if (status or "pending") in LEAD_STATUSES:
+        contribution[f"{status or 'pending'}_leads"] = sign
+    return contribution
+
+@event.listens_for(Session, "after_flush")
+def _update_lead_stats(session, flush_context):
+    """
+    Aplica em LeadStats o delta de inserções, mudanças de score/status e remoções de leads do flush.
+    Todo flush que grava leads atualiza a mesma linha: no PostgreSQL, transações concorrentes que
+    gravam leads se serializam no lock dessa linha até o commit (mantenha as transações curtas).
+    """
+    contributions = []
+    for lead in session.new:
+        if isinstance(lead, Lead):
+            contributions.append(_lead_contribution(lead.lead_score, lead.status, lead.estimated_revenue, 1))
+    for lead in session.dirty:
+        if not isinstance(lead, Lead):
+            continue
+        attrs = inspect(lead).attrs
+        tracked = ("lead_score", "status", "estimated_revenue")
+        histories = [getattr(attrs, name).history for name in tracked]
+        if not any(history.deleted for history in histories):
+            continue
+        old = [history.deleted[0] if history.deleted else getattr(lead, name) for name, history in zip(tracked, histories)]
+        contributions.append(_lead_contribution(*old, -1))
+        contributions.append(_lead_contribution(lead.lead_score, lead.status, lead.estimated_revenue, 1))
+    for lead in session.deleted:
+        if isinstance(lead, Lead):
+            contributions.append(_lead_contribution(lead.lead_score, lead.status, lead.estimated_revenue, -1))
+
+    delta = {}
+    for contribution in contributions:
+        for name, value in contribution.items():
+            delta[name] = delta.get(name, 0) + value
+    if not any(delta.values()):
+        return
+
+    # Incremento atômico no banco: várias sessões/workers podem gravar ao mesmo tempo
+    connection = session.connection()
+    stmt = update(LeadStats).where(LeadStats.id == 1).values(
+        {name: getattr(LeadStats, name) + value for name, value in delta.items() if value}
+    )
+    if connection.execute(stmt).rowcount == 0:
+        # Primeiro flush neste banco: os leads recém-gravados já entram na agregação. Dois
+        # primeiros flushes concorrentes: o perdedor não insere (ON CONFLICT DO NOTHING) e,
+        # com a linha do vencedor já commitada (que não viu os leads dele), aplica o delta
+        bootstrap = _insert_ignore(connection).values(id=1, **aggregate_lead_stats(connection))
+        if connection.execute(bootstrap).rowcount == 0:
+            connection.execute(stmt)
+
+def _insert_ignore(connection):
+    if connection.dialect.name == "postgresql":
+        return postgresql_insert(LeadStats).on_conflict_do_nothing(index_elements=["id"])
+    if connection.dialect.name == "sqlite":
+        return sqlite_insert(LeadStats).on_conflict_do_nothing(index_elements=["id"])
+    return insert(LeadStats)
 
 class OutreachDraft(Base):
     __tablename__ = "outreach_drafts"
     id = Column(Integer, primary_key=True, index=True)
-    lead_id = Column(Integer, ForeignKey("leads.id"))
+    lead_id = Column(Integer, ForeignKey("leads.id"), index=True)
     strategy = Column(String)
-    messages = Column(JSON)
-    triage_questions = Column(JSON)
+    opening_statement = Column(Text)
+    messages = Column(JSONDocument)
+    triage_questions = Column(JSONDocument)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 class AuditLog(Base):
@@ -42,5 +168,38 @@ class AuditLog(Base):
     actor = Column(String)
     model_version = Column(String)
     prompt_version = Column(String)
-    payload = Column(JSON)
+    payload = Column(JSONDocument)
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
+
+class AuditOutbox(Base):
+    """
+    Registros de auditoria de um lote, gravados na mesma transação dos leads e apagados depois
+    que chegam ao AuditStore: uma queda entre o commit e o append não perde a trilha
+    (python audit_admin.py reconcile reenvia o que ficou aqui).
+    """
+    __tablename__ = "audit_outbox"
+    id = Column(Integer, primary_key=True)
+    records = Column(JSONDocument)  # registros compactos (compact_audit_record)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class MissionJob(Base):
+    __tablename__ = "mission_jobs"
+    id = Column(String, primary_key=True, index=True)  # uuid4 hex
+    status = Column(String, default="queued", index=True)  # queued, running, succeeded, failed, cancelled
+    queries = Column(JSONDocument)
+    streaming = Column(Boolean, default=True)
+    progress = Column(JSONDocument)  # {signals, duplicates_skipped, leads_saved, ...}
+    result = Column(JSONDocument)
+    error = Column(Text)
+    cancel_requested = Column(Boolean, default=False)
+    worker = Column(String)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+
+class MissionProfile(Base):
+    __tablename__ = "mission_profiles"
+    mission_id = Column(String, primary_key=True, index=True)  # id do job em mission_jobs (ou uuid de missões avulsas)
+    summary = Column(JSONDocument)  # caminho crítico, utilização e tempo por estágio
+    trace = Column(LargeBinary)  # trace-event JSON do Chrome, comprimido com gzip
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
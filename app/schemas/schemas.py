@@ -33,3 +33,6 @@ class LeadResponse(LeadBase):
 
     class Config:
         from_attributes = True
+
+class MissionRequest(BaseModel):
+    queries: Optional[List[str]] = None
@@ -0,0 +1,248 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+from app.core.config import settings
+
+ACCESS_FLUSH_BATCH = 256  # acessos pendentes antes de gravar last_access em lote
+
+class CacheStats:
+    """Contadores de acerto/erro do cache (acumulados no processo)."""
+    def __init__(self):
+        self.hits = 0
+        self.memory_hits = 0
+        self.misses = 0
+
+    def snapshot(self) -> Dict[str, int]:
+        return {"hits": self.hits, "memory_hits": self.memory_hits, "misses": self.misses}
+
+    @staticmethod
+    def delta(before: Dict[str, int], after: Dict[str, int]) -> Dict[str, Any]:
+        diff = {k: after[k] - before[k] for k in after}
+        lookups = diff["hits"] + diff["misses"]
+        diff["hit_rate"] = diff["hits"] / lookups if lookups else 0.0
+        return diff
+
+class ClassificationCache:
+    """
+    Cache endereçado por conteúdo para o IntentEngine.classify.
+    Chave = sha256(texto normalizado + modelo + versão do prompt).
+    Backend SQLite com TTL e limite de entradas (evicção LRU por último acesso),
+    com uma camada LRU opcional em memória na frente.
+
+    Acertos (inclusive os da camada em memória) não escrevem no SQLite: o horário do
+    acesso fica pendente e é gravado em lote a cada ACCESS_FLUSH_BATCH acessos, junto com
+    o próximo `set` e sempre antes de uma evicção, que assim enxerga o LRU atualizado.
+
+    Código assíncrono usa aget/aget_many/aset_many: o SQLite roda em thread, fora do loop.
+    """
+    def __init__(self, path: str = None, ttl_seconds: int = None, max_entries: int = None, memory_entries: int = None):
+        self.path = path or settings.CLASSIFICATION_CACHE_PATH
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.CLASSIFICATION_CACHE_TTL
+        self.max_entries = max_entries if max_entries is not None else settings.CLASSIFICATION_CACHE_MAX_ENTRIES
+        self.memory_entries = memory_entries if memory_entries is not None else settings.CLASSIFICATION_CACHE_MEMORY_ENTRIES
+        self.stats = CacheStats()
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (value_json, created_at)
+        self._accessed: Dict[str, float] = {}  # key -> last_access ainda não gravado
+        self._lock = threading.Lock()  # conexão SQLite
+        self._memory_lock = threading.Lock()  # camada em memória, acessos pendentes e stats (nunca espera I/O)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS classification_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_last_access ON classification_cache (last_access)")
+        self._conn.commit()
+        self._size = self._conn.execute("SELECT COUNT(*) FROM classification_cache").fetchone()[0]
+
+    @staticmethod
+    def make_key(text: str, model_name: str, prompt_version: str) -> str:
+        normalized = " ".join(text.split()).casefold()
+        return hashlib.sha256(f"{model_name}\0{prompt_version}\0{normalized}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        value = self._memory_get(key, now)
+        if value is not None:
+            if self._accesses_due():
+                self.flush()
+            return value
+        with self._lock:
+            value = self._sqlite_get(key, now)
+            if self._accesses_due():
+                self._write_accesses()
+                self._conn.commit()
+            return value
+
+    def get_many(self, keys: List[str]) -> List[Optional[Dict[str, Any]]]:
+        return [self.get(key) for key in keys]
+
+    async def aget_many(self, keys: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """
+        get para código assíncrono: acertos em memória respondem no próprio loop; o SQLite
+        (leitura, remoção de vencidos, gravação dos acessos) roda numa thread, e o loop nunca
+        espera pelo lock da conexão enquanto outra thread faz commit.
+        """
+        now = time.time()
+        results = [self._memory_get(key, now) for key in keys]
+        missing = [i for i, value in enumerate(results) if value is None]
+        if missing:
+            found = await asyncio.to_thread(self.get_many, [keys[i] for i in missing])
+            for i, value in zip(missing, found):
+                results[i] = value
+        elif self._accesses_due():
+            await asyncio.to_thread(self.flush)
+        return results
+
+    async def aget(self, key: str) -> Optional[Dict[str, Any]]:
+        return (await self.aget_many([key]))[0]
+
+    def set(self, key: str, value: Dict[str, Any]):
+        self.set_many([(key, value)])
+
+    def set_many(self, items: List[Tuple[str, Dict[str, Any]]]):
+        """Grava várias entradas numa transação só (um commit)."""
+        now = time.time()
+        payloads = [(key, json.dumps(value, ensure_ascii=False)) for key, value in items]
+        with self._lock:
+            for key, payload in payloads:
+                exists = self._conn.execute("SELECT 1 FROM classification_cache WHERE key = ?", (key,)).fetchone()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO classification_cache (key, value, created_at, last_access) VALUES (?, ?, ?, ?)",
+                    (key, payload, now, now)
+                )
+                if not exists:
+                    self._size += 1
+            with self._memory_lock:
+                for key, _ in payloads:
+                    self._accessed.pop(key, None)
+            self._write_accesses()
+            if self._size > self.max_entries:
+                self._evict(self._size - self.max_entries)
+            self._conn.commit()
+            for key, payload in payloads:
+                self._remember(key, payload, now)
+
+    async def aset_many(self, items: List[Tuple[str, Dict[str, Any]]]):
+        """set_many numa thread: o INSERT e o commit (fsync) não bloqueiam o loop."""
+        if items:
+            await asyncio.to_thread(self.set_many, items)
+
+    async def aset(self, key: str, value: Dict[str, Any]):
+        await self.aset_many([(key, value)])
+
+    def flush(self):
+        """Grava os horários de acesso pendentes."""
+        with self._lock:
+            if self._accessed:
+                self._write_accesses()
+                self._conn.commit()
+
+    def purge_expired(self) -> int:
+        """Remove entradas com TTL vencido. Retorna quantas foram removidas."""
+        with self._lock:
+            self._write_accesses()
+            cursor = self._conn.execute(
+                "DELETE FROM classification_cache WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+            )
+            self._conn.commit()
+            self._size -= cursor.rowcount
+            with self._memory_lock:
+                self._memory.clear()
+            return cursor.rowcount
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _memory_get(self, key: str, now: float) -> Optional[Dict[str, Any]]:
+        """Acerto na camada em memória (sem I/O; só o lock curto da memória)."""
+        with self._memory_lock:
+            entry = self._memory.get(key)
+            if not entry or now - entry[1] > self.ttl_seconds:
+                return None
+            self._memory.move_to_end(key)
+            self._accessed[key] = now
+            self.stats.hits += 1
+            self.stats.memory_hits += 1
+            payload = entry[0]
+        return json.loads(payload)
+
+    def _sqlite_get(self, key: str, now: float) -> Optional[Dict[str, Any]]:
+        # Com self._lock; outra thread pode ter trazido a chave para a memória nesse meio-tempo
+        value = self._memory_get(key, now)
+        if value is not None:
+            return value
+        row = self._conn.execute(
+            "SELECT value, created_at FROM classification_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or now - row[1] > self.ttl_seconds:
+            if row is not None:
+                self._delete(key)
+            with self._memory_lock:
+                self.stats.misses += 1
+            return None
+        self._remember(key, row[0], row[1])
+        with self._memory_lock:
+            self._accessed[key] = now
+            self.stats.hits += 1
+        return json.loads(row[0])
+
+    def _accesses_due(self) -> bool:
+        return len(self._accessed) >= ACCESS_FLUSH_BATCH
+
+    def _write_accesses(self):
+        """UPDATE em lote dos acessos pendentes (com self._lock; o commit fica com quem chama)."""
+        with self._memory_lock:
+            pending, self._accessed = self._accessed, {}
+        if pending:
+            self._conn.executemany(
+                "UPDATE classification_cache SET last_access = ? WHERE key = ?",
+                [(at, key) for key, at in pending.items()]
+            )
+
+    def _remember(self, key: str, payload: str, created_at: float):
+        if self.memory_entries <= 0:
+            return
+        with self._memory_lock:
+            self._memory[key] = (payload, created_at)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _delete(self, key: str):
+        cursor = self._conn.execute("DELETE FROM classification_cache WHERE key = ?", (key,))
+        self._conn.commit()
+        self._size -= cursor.rowcount
+        with self._memory_lock:
+            self._memory.pop(key, None)
+            self._accessed.pop(key, None)
+
+    def _evict(self, count: int):
+        # Remove as entradas acessadas há mais tempo (acessos pendentes já gravados pelo set)
+        keys = [r[0] for r in self._conn.execute(
+            "SELECT key FROM classification_cache ORDER BY last_access ASC LIMIT ?", (count,)
+        )]
+        self._conn.executemany("DELETE FROM classification_cache WHERE key = ?", [(k,) for k in keys])
+        self._size -= len(keys)
+        with self._memory_lock:
+            for k in keys:
+                self._memory.pop(k, None)
+
+_cache: Optional[ClassificationCache] = None
+
+def get_classification_cache() -> Optional[ClassificationCache]:
+    """Cache compartilhado do processo (None se CLASSIFICATION_CACHE_ENABLED=False)."""
+    global _cache
+    if not settings.CLASSIFICATION_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        _cache = ClassificationCache()
+    return _cache
@@ -1,71 +1,143 @@
 import logging
 import asyncio
-from typing import List, Dict, Any
+import itertools
+import random
+import time
+from contextlib import nullcontext
+from typing import List, Dict, Any, Optional
 from datetime import datetime
-from app.services.engine import IntentEngine, VisionEngine
-from app.models.models import SourceItem, Lead
+import httpx
+from app.core.config import settings
+from app.services.engine import IntentEngine, VisionEngine, LeadScorer
+from app.services.llm_clients import get_http_client
+from app.services.rate_limiter import get_rate_limiter
+from app.services.cache import CacheStats
+from app.services.prefilter import SignalPrefilter
+from app.services.dedup import TextNormalizer
+from app.services.lead_artifacts import build_lead_artifacts
+from app.services.metrics import PIPELINE_SIGNALS, SERPER_REQUEST_SECONDS
+from app.services.profiler import MissionProfiler
+from app.models.models import SourceItem
 from app.db.session import SessionLocal
+from app.db.batch_writer import LeadBatchWriter
+
+_STREAM_END = object()  # Sentinela de fim de fluxo entre estágios do pipeline
 
 class SignalsCollector:
     """
     Componente A: Coleta (Signals Collector)
     Conectores por fonte (rede social / web / fóruns).
     """
-    def __init__(self):
+    def __init__(self, session_factory=None):
         self.logger = logging.getLogger(__name__)
+        self.session_factory = session_factory or SessionLocal
+        self.mission_stats: Dict[str, Any] = {}  # Métricas da última missão (cache, etc.)
+        self.progress_callback = None  # callable(mission_stats, force=False); pode levantar para interromper
+        self.profiler: Optional[MissionProfiler] = None  # timeline da missão (spans por estágio e por sinal)
         self.engine = IntentEngine()
         self.vision = VisionEngine()
+        self.prefilter = SignalPrefilter() if settings.PREFILTER_ENABLED else None
 
     async def fetch_signals(self, queries: List[str]) -> List[Dict[str, Any]]:
         """
         Coleta sinais reais usando Serper.dev (Google Search/News/Social).
+        As queries são buscadas em paralelo sobre o pool httpx compartilhado,
+        limitadas a SERPER_MAX_CONCURRENCY requisições simultâneas ao host.
         """
-        from app.core.config import settings
-        import httpx
-        
         self.logger.info(f"Buscando sinais REAIS para queries: {queries}")
-        
-        # Se não houver chave de API, usa o simulador de alta fidelidade como fallback
-        if not settings.SERPER_API_KEY:
-            self.logger.warning("SERPER_API_KEY ausente. Usando simulador de elite.")
-            return await self._fetch_simulated_signals(queries)
-
-        all_results = []
-        async with httpx.AsyncClient() as client:
-            for query in queries:
-                try:
-                    # Busca específica para encontrar intenção de compra e comentários
-                    payload = {
-                        "q": f"{query} \"são paulo\" (comentários OR fórum OR recomendação)",
-                        "gl": "br",
-                        "hl": "pt-br",
-                        "autocorrect": True
-                    }
-                    headers = {
-                        'X-API-KEY': settings.SERPER_API_KEY,
-                        'Content-Type': 'application/json'
-                    }
-                    response = await client.post("https://google.serper.dev/search", json=payload, headers=headers)
-                    data = response.json()
-                    
-                    # Transformar resultados do Google em sinais para o agente
-                    for item in data.get('organic', []):
-                        all_results.append({
-                            "source": "google_web",
-                            "url": item.get('link'),
-                            "author_handle": "Web User",
-                            "author_image": None,
-                            "text": f"{item.get('title')}: {item.get('snippet')}",
-                            "timestamp": datetime.now(),
-                            "raw_metadata": {"title": item.get('title')}
-                        })
-                except Exception as e:
-                    self.logger.error(f"Erro na busca real: {e}")
 
-        return all_results if all_results else await self._fetch_simulated_signals(queries)
+        with self._span("fetch", "pipeline", queries=len(queries)):
+            # Se não houver chave de API, usa o simulador de alta fidelidade como fallback
+            if not settings.SERPER_API_KEY:
+                self.logger.warning("SERPER_API_KEY ausente. Usando simulador de elite.")
+                return await self._fetch_simulated_signals(queries)
+
+            client = get_http_client()
+            semaphore = asyncio.Semaphore(settings.SERPER_MAX_CONCURRENCY)
+            per_query = await asyncio.gather(*[self._fetch_query(client, semaphore, query) for query in queries])
+            all_results = [sig for results in per_query for sig in results]
+
+            return all_results if all_results else await self._fetch_simulated_signals(queries)
+
+    async def _fetch_query(self, client: httpx.AsyncClient, semaphore: asyncio.Semaphore, query: str) -> List[Dict[str, Any]]:
+        results = []
+        if self.profiler is not None:
+            self.profiler.capacity["fetch"] = settings.SERPER_MAX_CONCURRENCY
+        query_start = time.perf_counter()
+        try:
+            for page in range(1, settings.SERPER_PAGES + 1):
+                # Busca específica para encontrar intenção de compra e comentários
+                payload = {
+                    "q": f"{query} \"são paulo\" (comentários OR fórum OR recomendação)",
+                    "gl": "br",
+                    "hl": "pt-br",
+                    "autocorrect": True,
+                    "page": page
+                }
+                wait_start = time.perf_counter()
+                async with semaphore:
+                    self._record("wait_slot", "fetch", query, wait_start)
+                    data = await self._serper_post(client, payload, trace_key=query)
+
+                organic = data.get('organic', [])
+                # Transformar resultados do Google em sinais para o agente
+                for item in organic:
+                    results.append({
+                        "source": "google_web",
+                        "url": item.get('link'),
+                        "author_handle": "Web User",
+                        "author_image": None,
+                        "text": f"{item.get('title')}: {item.get('snippet')}",
+                        "timestamp": datetime.now(),
+                        "raw_metadata": {"title": item.get('title'), "query": query, "page": page}
+                    })
+                if not organic:
+                    break
+        except Exception as e:
+            self.logger.error(f"Erro na busca real ({query}): {e}")
+        PIPELINE_SIGNALS.labels("fetched").inc(len(results))
+        self._record("serper_query", "fetch", query, query_start, query=query, results=len(results))
+        self._mark_fetched(results, query)
+        return results
+
+    async def _serper_post(self, client: httpx.AsyncClient, payload: Dict[str, Any], trace_key: str = None) -> Dict[str, Any]:
+        """POST no Serper com timeout e backoff exponencial com jitter em 429/5xx/erros de rede."""
+        headers = {
+            'X-API-KEY': settings.SERPER_API_KEY,
+            'Content-Type': 'application/json'
+        }
+        for attempt in range(settings.SERPER_MAX_RETRIES + 1):
+            retry_after = None
+            start = time.perf_counter()
+            try:
+                response = await client.post(
+                    f"{settings.SERPER_BASE_URL}/search", json=payload, headers=headers, timeout=settings.SERPER_TIMEOUT
+                )
+                SERPER_REQUEST_SECONDS.labels(str(response.status_code)).observe(time.perf_counter() - start)
+                self._record("serper_request", "fetch", trace_key, start, status=response.status_code, attempt=attempt)
+                if response.status_code != 429 and response.status_code < 500:
+                    response.raise_for_status()
+                    return response.json()
+                error = httpx.HTTPStatusError(f"Serper retornou {response.status_code}", request=response.request, response=response)
+                retry_after = response.headers.get("Retry-After")
+            except httpx.TransportError as e:
+                SERPER_REQUEST_SECONDS.labels("error").observe(time.perf_counter() - start)
+                self._record("serper_request", "fetch", trace_key, start, status="error", attempt=attempt)
+                error = e
+
+            if attempt == settings.SERPER_MAX_RETRIES:
+                raise error
+            delay = random.uniform(0, settings.SERPER_BACKOFF_BASE * 2 ** attempt)  # "full jitter"
+            if retry_after and retry_after.isdigit():
+                delay = max(delay, float(retry_after))
+            self.logger.warning(f"Serper: {error}; nova tentativa em {delay:.2f}s")
+            backoff_start = time.perf_counter()
+            await asyncio.sleep(delay)
+            self._record("backoff", "fetch", trace_key, backoff_start)
 
     async def _fetch_simulated_signals(self, queries: List[str]) -> List[Dict[str, Any]]:
         """Simulador de alta fidelidade para testes sem API Key de busca."""
+        simulated_start = time.perf_counter()
         await asyncio.sleep(1) 
         real_signals = [
             {
@@ -87,110 +159,471 @@ class SignalsCollector:
                 "raw_metadata": {"rating": 5}
             }
         ]
+        PIPELINE_SIGNALS.labels("fetched").inc(len(real_signals))
+        self._record("simulated_fetch", "pipeline", None, simulated_start, results=len(real_signals))
+        self._mark_fetched(real_signals)
         return real_signals
 
-    async def process_and_save_signals(self, signals: List[Dict[str, Any]], clinic_id: int = 1):
-        db = SessionLocal()
-        results = []
-        try:
+    def _span(self, name: str, track: str, key: Any = None, **args):
+        """Span no perfil da missão (no-op sem profiler)."""
+        return self.profiler.span(name, track, key, **args) if self.profiler is not None else nullcontext(args)
+
+    def _record(self, name: str, track: str, key: Any, start: float, **args):
+        """Span de `start` (time.perf_counter) até agora no perfil da missão."""
+        if self.profiler is not None:
+            self.profiler.add(name, track, start, key=key, **args)
+
+    def _trace_id(self, sig: Dict[str, Any]) -> Optional[int]:
+        return self.profiler.signal_id(sig) if self.profiler is not None else None
+
+    def _mark_fetched(self, signals: List[Dict[str, Any]], query: str = None):
+        if self.profiler is not None:
             for sig in signals:
-                # 1. Salvar item de origem
-                source_item = SourceItem(
-                    source=sig["source"],
-                    url=sig["url"],
-                    author_handle=sig["author_handle"],
-                    text=sig["text"],
-                    timestamp=sig["timestamp"],
-                    raw_metadata=sig.get("raw_metadata", {})
-                )
-                db.add(source_item)
-                db.commit()
-                db.refresh(source_item)
+                self.profiler.mark("fetched", "signal", self.profiler.signal_id(sig), query=query)
+
+    async def _analyze_signal(self, sig: Dict[str, Any], semaphore: asyncio.Semaphore, classification: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        Classificação + Visão + Scoring de um único sinal.
+        O semáforo limita as chamadas em voo; o rate limiter respeita o limite de cada provider.
+        `classification` pode vir pronta do modo batch.
+        """
+        key = self._trace_id(sig)
+        with self._span("signal", "signal", key, url=sig.get("url")):
+            return await self._analyze_traced(sig, semaphore, classification, key)
 
-                # 2. Classificação de Texto com IntentEngine
+    async def _analyze_traced(self, sig: Dict[str, Any], semaphore: asyncio.Semaphore, classification, key) -> Dict[str, Any]:
+        wait_start = time.perf_counter()
+        async with semaphore:
+            slot_start = time.perf_counter()
+            self._record("wait_slot", "signal", key, wait_start)
+            # 1. Classificação de Texto com IntentEngine
+            if classification is None:
+                await get_rate_limiter(self.engine.provider).acquire()
+                self._record("rate_limit", "signal", key, slot_start)
+                classify_start = time.perf_counter()
                 classification = await self.engine.classify(sig["text"])
+                self._record("classify", "signal", key, classify_start)
 
-                # 3. NOVO: Análise Visual se houver imagem do autor
-                visual_data = {
-                    "visual_fit": 50, # Neutro se não houver imagem
-                    "attributes": [],
-                    "justification": "Sem imagem disponível"
-                }
-                if sig.get("author_image"):
-                    visual_analysis = await self.vision.analyze_profile_image(sig["author_image"])
-                    visual_data["visual_fit"] = visual_analysis["visual_fit"]
-                    visual_data["attributes"] = visual_analysis.get("detected_luxury_indicators", [])
-                    visual_data["justification"] = visual_analysis["justification"]
-                    visual_data["tier"] = visual_analysis.get("socioeconomic_tier", "Standard")
-
-                # 4. Atualizar Scores com Visão
-                final_scores = classification["scores"]
-                final_scores["visual_fit"] = visual_data["visual_fit"]
-                final_scores["visual_justification"] = visual_data["justification"]
-                
-                # Recalcular score final considerando visão
-                from app.services.engine import LeadScorer
-                scorer = LeadScorer()
-                final_scores["lead_score"] = scorer.calculate_score(final_scores)
-
-                # 5. Criar Lead
-                lead = Lead(
-                    source_item_id=source_item.id,
-                    clinic_id=clinic_id,
-                    scores=final_scores,
-                    labels={
-                        "pain_point": classification["pain_point"]["label"],
-                        "intent_stage": classification["intent_stage"]["label"],
-                        "maturity": classification["maturity"]["label"],
-                        "visual_profile": visual_data["attributes"],
-                        "tier": visual_data.get("tier", "Standard")
-                    },
-                    evidence_snippets=classification["evidence"],
-                    status="pending"
-                )
-                db.add(lead)
-                db.commit()
-                db.refresh(lead)
-
-                # 6. Gravar AuditLog para Compliance
-                from app.models.models import AuditLog
-                audit = AuditLog(
-                    event="lead_qualification",
-                    actor="AI_Agent_Tier1",
-                    model_version=self.engine.model_name,
-                    payload={
-                        "lead_id": lead.id,
-                        "text_analysis": classification,
-                        "visual_analysis": visual_data,
-                        "final_score": final_scores["lead_score"]
-                    }
-                )
-                db.add(audit)
-                db.commit()
-                
-                results.append({"lead_id": lead.id, "score": lead.scores["lead_score"]})
-                self.logger.info(f"Lead processado e salvo (com Visão): {lead.id} com score {lead.scores['lead_score']}")
-            
-            return results
-        except Exception as e:
-            self.logger.error(f"Erro ao processar sinais: {e}")
-            db.rollback()
-            return []
+            # 2. Análise Visual se houver imagem do autor
+            visual_data = {
+                "visual_fit": 50, # Neutro se não houver imagem
+                "attributes": [],
+                "justification": "Sem imagem disponível"
+            }
+            if sig.get("author_image"):
+                limit_start = time.perf_counter()
+                await get_rate_limiter(self.vision.provider).acquire()
+                self._record("rate_limit", "signal", key, limit_start)
+                vision_start = time.perf_counter()
+                visual_analysis = await self.vision.analyze_profile_image(sig["author_image"])
+                self._record("vision", "signal", key, vision_start)
+                visual_data["visual_fit"] = visual_analysis["visual_fit"]
+                visual_data["attributes"] = visual_analysis.get("detected_luxury_indicators", [])
+                visual_data["justification"] = visual_analysis.get("justification", visual_data["justification"])
+                visual_data["tier"] = visual_analysis.get("socioeconomic_tier", "Standard")
+            self._record("in_slot", "signal", key, slot_start)
+
+        # 3. Atualizar Scores com Visão e recalcular score final
+        score_start = time.perf_counter()
+        final_scores = classification["scores"]
+        final_scores["visual_fit"] = visual_data["visual_fit"]
+        final_scores["visual_justification"] = visual_data["justification"]
+        final_scores["lead_score"] = LeadScorer().calculate_score(final_scores)
+        self._record("score", "signal", key, score_start)
+
+        return {"classification": classification, "visual_data": visual_data, "final_scores": final_scores}
+
+    async def _classify_in_batches(self, texts: List[str], semaphore: asyncio.Semaphore) -> List[Dict[str, Any]]:
+        """Modo batch: uma requisição ao LLM para cada LLM_BATCH_SIZE textos."""
+        size = settings.LLM_BATCH_SIZE
+        chunks = await asyncio.gather(*[
+            self._classify_chunk(i // size, texts[i:i + size], semaphore) for i in range(0, len(texts), size)
+        ])
+        return [result for chunk in chunks for result in chunk]
+
+    async def _classify_chunk(self, index: int, texts: List[str], semaphore: asyncio.Semaphore) -> List[Dict[str, Any]]:
+        with self._span("classify_batch", "batch", index, texts=len(texts)):
+            async with semaphore:
+                await get_rate_limiter(self.engine.provider).acquire()
+                return await self.engine.classify_batch(texts, batch_size=len(texts))
+
+    def _load_normalizer(self) -> TextNormalizer:
+        """
+        TextNormalizer já alimentado com os últimos DEDUP_LOOKBACK itens de origem do banco.
+        Usa o hash e a assinatura gravados com cada item; só itens antigos (sem impressão
+        digital, anteriores ao run_migrations) são recalculados a partir do texto.
+        Síncrono e com CPU: quem está no event loop chama via asyncio.to_thread.
+        """
+        normalizer = TextNormalizer()
+        db = self.session_factory()
+        try:
+            recent = (
+                db.query(SourceItem.text_hash, SourceItem.minhash, SourceItem.text)
+                .order_by(SourceItem.id.desc()).limit(settings.DEDUP_LOOKBACK).all()
+            )
         finally:
             db.close()
+        for text_hash, minhash, text in recent:
+            signature = normalizer.unpack(minhash)
+            if text_hash and signature is not None:
+                normalizer.add_fingerprint(text_hash, signature)
+            else:
+                normalizer.add(text or "")
+        return normalizer
+
+    def _is_duplicate(self, normalizer: TextNormalizer, sig: Dict[str, Any]) -> bool:
+        """Como TextNormalizer.check_and_add, guardando a impressão digital no sinal para gravá-la com o item."""
+        text_hash = normalizer.text_hash(sig["text"])
+        if normalizer.is_duplicate(text_hash):
+            return True
+        signature = normalizer.minhash(sig["text"])
+        if normalizer.is_near_duplicate(signature):
+            return True
+        normalizer.add_fingerprint(text_hash, signature)
+        sig["_fingerprint"] = (text_hash, normalizer.pack(signature))
+        return False
+
+    def _drop_duplicates(self, signals: List[Dict[str, Any]], normalizer: TextNormalizer) -> List[Dict[str, Any]]:
+        """
+        Remove sinais já vistos (exatos ou quase-duplicatas), tanto dentro do lote quanto
+        em relação aos últimos DEDUP_LOOKBACK itens de origem já salvos no banco.
+        """
+        unique = [sig for sig in signals if not self._is_duplicate(normalizer, sig)]
+        self.mission_stats["duplicates_skipped"] = len(signals) - len(unique)
+        PIPELINE_SIGNALS.labels("duplicate").inc(len(signals) - len(unique))
+        if len(unique) < len(signals):
+            self.logger.info(f"Deduplicação: {len(signals) - len(unique)} sinais repetidos ignorados")
+        return unique
+
+    def _is_prefiltered(self, sig: Dict[str, Any]) -> bool:
+        """Aplica o pré-filtro local e contabiliza descartes e chamadas ao LLM evitadas."""
+        reason = self.prefilter.check(sig) if self.prefilter is not None else None
+        if reason is None:
+            return False
+        self.mission_stats["prefiltered"] += 1
+        PIPELINE_SIGNALS.labels("prefiltered").inc()
+        self.mission_stats["llm_calls_avoided"] += SignalPrefilter.llm_calls(sig)
+        reasons = self.mission_stats["prefilter_reasons"]
+        reasons[reason] = reasons.get(reason, 0) + 1
+        return True
+
+    def _log_prefilter(self):
+        if self.mission_stats["prefiltered"]:
+            self.logger.info(
+                f"Pré-filtro: {self.mission_stats['prefiltered']} sinais descartados "
+                f"({self.mission_stats['llm_calls_avoided']} chamadas ao LLM evitadas) {self.mission_stats['prefilter_reasons']}"
+            )
+
+    async def process_and_save_signals(self, signals: List[Dict[str, Any]], clinic_id: int = 1, max_concurrency: int = None):
+        """
+        Analisa os sinais em paralelo (concorrência limitada por LLM_MAX_CONCURRENCY)
+        e persiste os leads na mesma ordem dos sinais de entrada.
+        """
+        self.mission_stats = {"signals": len(signals), "prefiltered": 0, "llm_calls_avoided": 0, "prefilter_reasons": {}}
+        # Duplicatas e sinais sem valor são descartados antes de qualquer chamada de rede
+        with self._span("dedup", "pipeline", signals=len(signals)):
+            normalizer = await asyncio.to_thread(self._load_normalizer)
+            signals = self._drop_duplicates(signals, normalizer)
+        with self._span("prefilter", "pipeline", signals=len(signals)):
+            signals = [sig for sig in signals if not self._is_prefiltered(sig)]
+        self._log_prefilter()
+
+        cache = self.engine.cache
+        cache_before = cache.stats.snapshot() if cache is not None else None
+
+        workers = max_concurrency or settings.LLM_MAX_CONCURRENCY
+        semaphore = asyncio.Semaphore(workers)
+        if self.profiler is not None:
+            self.profiler.capacity["signal"] = workers
+        with self._span("analyze", "pipeline", signals=len(signals)):
+            if settings.LLM_BATCH_MODE:
+                classifications = await self._classify_in_batches([sig["text"] for sig in signals], semaphore)
+            else:
+                classifications = [None] * len(signals)
+            # gather preserva a ordem de entrada, garantindo persistência determinística
+            analyses = await asyncio.gather(
+                *[self._analyze_signal(sig, semaphore, c) for sig, c in zip(signals, classifications)], return_exceptions=True
+            )
+
+        if cache is not None:
+            self.mission_stats["cache"] = CacheStats.delta(cache_before, cache.stats.snapshot())
+            self.logger.info(
+                f"Cache de classificação: {self.mission_stats['cache']['hits']} hits / "
+                f"{self.mission_stats['cache']['misses']} misses"
+            )
+
+        self._report_progress(force=True)
+
+        # 4-6. SourceItem + Lead + AuditLog gravados em lotes transacionais
+        persist_start = time.perf_counter()
+        writer = LeadBatchWriter(self.session_factory, profiler=self.profiler)
+        for sig, analysis in zip(signals, analyses):
+            if isinstance(analysis, Exception):
+                self.logger.error(f"Erro ao analisar sinal {sig.get('url')}: {analysis}")
+                PIPELINE_SIGNALS.labels("analysis_failed").inc()
+                continue
+            PIPELINE_SIGNALS.labels("analyzed").inc()
+            try:
+                await writer.aadd(self._build_record(sig, analysis, clinic_id))
+            except Exception as e:
+                # Um sinal malformado não derruba o restante da missão
+                self.logger.error(f"Erro ao preparar lead do sinal {sig.get('url')}: {e}")
+        results = await writer.aclose()
+        self._record("persist", "pipeline", None, persist_start, leads=len(results))
+
+        self.mission_stats["leads_saved"] = len(results)
+        self._report_progress(force=True)
+        self.logger.info(f"{len(results)} leads processados e salvos (com Visão)")
+        return results
+
+    def _report_progress(self, force: bool = False):
+        if self.progress_callback is not None:
+            self.progress_callback(self.mission_stats, force=force)
+
+    def _build_record(self, sig: Dict[str, Any], analysis: Dict[str, Any], clinic_id: int) -> Dict[str, Any]:
+        classification = analysis["classification"]
+        visual_data = analysis["visual_data"]
+        final_scores = analysis["final_scores"]
+        labels = {
+            "pain_point": classification["pain_point"]["label"],
+            "intent_stage": classification["intent_stage"]["label"],
+            "maturity": classification["maturity"]["label"],
+            "visual_profile": visual_data["attributes"],
+            "tier": visual_data.get("tier", "Standard")
+        }
+        # ROI, fluxo SDR e rascunho de abordagem calculados uma vez, aqui, e não a cada render do dashboard
+        artifacts = build_lead_artifacts(labels, final_scores, sig["author_handle"])
+        text_hash, minhash = sig.get("_fingerprint", (None, None))
+        return {
+            "trace_id": sig.get("_trace_id"),  # liga o lote gravado ao sinal no perfil da missão
+            "source_item": {
+                "source": sig["source"],
+                "url": sig["url"],
+                "author_handle": sig["author_handle"],
+                "text": sig["text"],
+                "timestamp": sig["timestamp"],
+                "raw_metadata": sig.get("raw_metadata", {}),
+                "text_hash": text_hash,
+                "minhash": minhash
+            },
+            "lead": {
+                "clinic_id": clinic_id,
+                "scores": final_scores,
+                "labels": labels,
+                "evidence_snippets": classification["evidence"],
+                "status": "pending",
+                **artifacts["lead"]
+            },
+            "outreach": artifacts["outreach"],
+            # AuditLog para Compliance (lead_id é preenchido pelo writer)
+            "audit": {
+                "event": "lead_qualification",
+                "actor": "AI_Agent_Tier1",
+                "model_version": self.engine.model_name,
+                "prompt_version": self.engine.prompt_version,
+                "payload": {
+                    "text_analysis": classification,
+                    "visual_analysis": visual_data,
+                    "final_score": final_scores["lead_score"]
+                }
+            }
+        }
 
     async def fetch_and_process(self, queries: List[str]):
         signals = await self.fetch_signals(queries)
         return await self.process_and_save_signals(signals)
 
-class TextNormalizer:
-    """
-    Componente B: Normalização & Deduplicação
-    """
-    def normalize(self, raw_text: str) -> str:
-        # Limpeza de texto, idioma, remoção de spam
-        return raw_text.strip()
+    async def stream_and_process(self, queries: List[str], clinic_id: int = 1, queue_size: int = None, max_concurrency: int = None):
+        """
+        Modo streaming: fetch → normalização/dedup → classificação/score → persistência.
+        Cada estágio é um async generator e os estágios concorrentes se comunicam por
+        filas limitadas (PIPELINE_QUEUE_SIZE): a classificação começa assim que chega o
+        primeiro resultado de busca e a memória não cresce com o número de queries.
+        Os leads são gravados na ordem em que a análise termina.
+        """
+        queue_size = queue_size or settings.PIPELINE_QUEUE_SIZE
+        self.mission_stats = {
+            "signals": 0, "duplicates_skipped": 0, "prefiltered": 0, "llm_calls_avoided": 0, "prefilter_reasons": {},
+            "analyzed": 0, "peak_in_flight": 0
+        }
+        self._in_flight = 0
+        cache = self.engine.cache
+        cache_before = cache.stats.snapshot() if cache is not None else None
 
-    def is_duplicate(self, text_hash: str) -> bool:
-        # Dedup por hash e similaridade semântica
-        return False
+        writer = LeadBatchWriter(self.session_factory, profiler=self.profiler)
+        stream = self._stream_analyze(
+            self._stream_prefilter(self._stream_dedup(self._stream_fetch(queries, queue_size))), queue_size, max_concurrency
+        )
+        try:
+            async for sig, analysis in stream:
+                self._in_flight -= 1
+                self.mission_stats["analyzed"] += 1
+                if isinstance(analysis, Exception):
+                    self.logger.error(f"Erro ao analisar sinal {sig.get('url')}: {analysis}")
+                    PIPELINE_SIGNALS.labels("analysis_failed").inc()
+                    continue
+                PIPELINE_SIGNALS.labels("analyzed").inc()
+                try:
+                    await writer.aadd(self._build_record(sig, analysis, clinic_id))
+                except Exception as e:
+                    self.logger.error(f"Erro ao preparar lead do sinal {sig.get('url')}: {e}")
+                self.mission_stats["leads_saved"] = len(writer.results)
+                self._report_progress()
+        finally:
+            # Mesmo se a missão for interrompida, os leads já analisados são gravados
+            # (a gravação roda numa thread: termina mesmo se esta task for cancelada)
+            await stream.aclose()
+            results = await writer.aclose()
+
+        if cache is not None:
+            self.mission_stats["cache"] = CacheStats.delta(cache_before, cache.stats.snapshot())
+        self.mission_stats["leads_saved"] = len(results)
+        self._report_progress(force=True)
+        self.logger.info(
+            f"Missão (streaming): {self.mission_stats['signals']} sinais, "
+            f"{self.mission_stats['duplicates_skipped']} duplicados, {self.mission_stats['prefiltered']} pré-filtrados "
+            f"({self.mission_stats['llm_calls_avoided']} chamadas ao LLM evitadas), {len(results)} leads salvos"
+        )
+        return results
+
+    async def _stream_fetch(self, queries: List[str], queue_size: int):
+        """
+        Estágio 1: cada query publica seus resultados na fila assim que a busca termina.
+        SERPER_MAX_CONCURRENCY produtores percorrem as queries e só buscam a próxima depois
+        de publicar a anterior: com a fila cheia, a busca para, e os sinais buscados e ainda
+        não consumidos ficam limitados a produtores x resultados por query.
+        """
+        queue = asyncio.Queue(maxsize=queue_size)
+        produced = 0
+
+        async def publish(signals):
+            nonlocal produced
+            # Em memória desde que a busca devolve, não só depois de sair da fila
+            self._in_flight += len(signals)
+            self.mission_stats["peak_in_flight"] = max(self.mission_stats["peak_in_flight"], self._in_flight)
+            for sig in signals:
+                produced += 1
+                await queue.put(sig)
+
+        async def fetch_and_publish(client, semaphore, pending):
+            for query in pending:
+                await publish(await self._fetch_query(client, semaphore, query))
+
+        async def produce():
+            fetch_start = time.perf_counter()
+            try:
+                if settings.SERPER_API_KEY:
+                    client = get_http_client()
+                    semaphore = asyncio.Semaphore(settings.SERPER_MAX_CONCURRENCY)
+                    pending = iter(queries)
+                    await asyncio.gather(*[
+                        fetch_and_publish(client, semaphore, pending)
+                        for _ in range(min(settings.SERPER_MAX_CONCURRENCY, len(queries)))
+                    ])
+                if not produced:
+                    await publish(await self._fetch_simulated_signals(queries))
+            except Exception as e:
+                self.logger.error(f"Erro no estágio de busca: {e}")
+            self._record("fetch", "pipeline", None, fetch_start, queries=len(queries), signals=produced)
+            await queue.put(_STREAM_END)
+
+        producer = asyncio.create_task(produce())
+        try:
+            while (sig := await queue.get()) is not _STREAM_END:
+                self.mission_stats["signals"] += 1
+                yield sig
+        finally:
+            producer.cancel()
+
+    async def _stream_dedup(self, source):
+        """Estágio 2: descarta duplicatas antes de qualquer chamada ao LLM."""
+        normalizer = await asyncio.to_thread(self._load_normalizer)
+        async for sig in source:
+            if self._is_duplicate(normalizer, sig):
+                self.mission_stats["duplicates_skipped"] += 1
+                PIPELINE_SIGNALS.labels("duplicate").inc()
+                self._in_flight -= 1
+                continue
+            yield sig
+
+    async def _stream_prefilter(self, source):
+        """Estágio 2b: pré-filtro local; só candidatos aprovados chegam ao LLM."""
+        async for sig in source:
+            if self._is_prefiltered(sig):
+                self._in_flight -= 1
+                continue
+            yield sig
+
+    async def _stream_analyze(self, source, queue_size: int, max_concurrency: int = None):
+        """
+        Estágio 3: N workers classificam/pontuam em paralelo entre duas filas limitadas.
+        Com LLM_BATCH_MODE, cada worker pega o próximo sinal e o que mais já estiver na fila
+        (até LLM_BATCH_SIZE) e classifica esse micro-lote em uma requisição: não espera o lote
+        encher, então a latência não piora quando os sinais chegam devagar.
+        """
+        workers = max_concurrency or settings.LLM_MAX_CONCURRENCY
+        inbox = asyncio.Queue(maxsize=queue_size)
+        outbox = asyncio.Queue(maxsize=queue_size)
+        semaphore = asyncio.Semaphore(workers)
+        if self.profiler is not None:
+            self.profiler.capacity["signal"] = workers
+        analyze_start = time.perf_counter()
+        chunk_ids = itertools.count()
+
+        async def feed():
+            try:
+                async for sig in source:
+                    await inbox.put(sig)
+            except Exception as e:
+                self.logger.error(f"Erro no estágio de normalização: {e}")
+            for _ in range(workers):
+                await inbox.put(_STREAM_END)
+
+        async def work():
+            while (sig := await inbox.get()) is not _STREAM_END:
+                try:
+                    analysis = await self._analyze_signal(sig, semaphore)
+                except Exception as e:
+                    analysis = e
+                await outbox.put((sig, analysis))
+            await outbox.put(_STREAM_END)
+
+        async def work_batches():
+            done = False
+            while not done:
+                batch = []
+                # Bloqueia só pelo primeiro sinal; o restante do lote é o que já está na fila
+                while len(batch) < settings.LLM_BATCH_SIZE and (not batch or not inbox.empty()):
+                    sig = await inbox.get()
+                    if sig is _STREAM_END:  # cada worker consome exatamente um marcador de fim
+                        done = True
+                        break
+                    batch.append(sig)
+                if not batch:
+                    continue
+                try:
+                    classifications = await self._classify_chunk(next(chunk_ids), [sig["text"] for sig in batch], semaphore)
+                    analyses = await asyncio.gather(
+                        *[self._analyze_signal(sig, semaphore, c) for sig, c in zip(batch, classifications)],
+                        return_exceptions=True
+                    )
+                except Exception as e:
+                    analyses = [e] * len(batch)
+                for item in zip(batch, analyses):
+                    await outbox.put(item)
+            await outbox.put(_STREAM_END)
+
+        worker = work_batches if settings.LLM_BATCH_MODE else work
+        tasks = [asyncio.create_task(feed())] + [asyncio.create_task(worker()) for _ in range(workers)]
+        finished = 0
+        try:
+            while finished < workers:
+                item = await outbox.get()
+                if item is _STREAM_END:
+                    finished += 1
+                    continue
+                yield item
+        finally:
+            for task in tasks:
+                task.cancel()
+            self._record("analyze", "pipeline", None, analyze_start, workers=workers)
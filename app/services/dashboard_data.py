@@ -0,0 +1,80 @@
+"""
+Camada de leitura dos dashboards Streamlit: cada função faz uma única consulta e
+devolve estruturas simples (dicts/tuplas), prontas para st.cache_data.
+"""
+from typing import Any, Dict, List, Tuple
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.models.models import Lead, SourceItem, OutreachDraft, LeadStats, VIP_SCORE_THRESHOLD, aggregate_lead_stats
+from app.services.lead_artifacts import build_lead_artifacts
+
+DASHBOARD_PAGE_SIZE = 50
+
+def get_summary(db: Session) -> Dict[str, Any]:
+    """
+    Totais do painel a partir de lead_stats. `version` muda a cada lead gravado,
+    re-pontuado ou com status alterado (inclusive por workers em outros processos)
+    e serve de chave de invalidação para os caches das páginas.
+    """
+    stats = db.get(LeadStats, 1)
+    if stats is not None:
+        counters = {column.name: getattr(stats, column.name) for column in LeadStats.__table__.columns}
+        counters.pop("id")
+    else:
+        counters = aggregate_lead_stats(db.connection())
+    updated_at = counters.pop("updated_at", None)
+    version: Tuple = tuple(sorted(counters.items())) + (str(updated_at),)
+    return {**counters, "version": version}
+
+def get_lead_page(db: Session, page: int = 1, page_size: int = DASHBOARD_PAGE_SIZE) -> List[Dict[str, Any]]:
+    """
+    Uma página de leads (maior lead_score primeiro) já com o SourceItem e o OutreachDraft
+    mais recente pré-calculados, em uma consulta com JOIN.
+    """
+    latest_draft_id = (
+        select(func.max(OutreachDraft.id)).where(OutreachDraft.lead_id == Lead.id).correlate(Lead).scalar_subquery()
+    )
+    rows = (
+        db.query(
+            Lead.id, Lead.lead_score, Lead.status, Lead.scores, Lead.labels,
+            Lead.estimated_revenue, Lead.revenue_service,
+            SourceItem.author_handle, SourceItem.text, SourceItem.raw_metadata,
+            OutreachDraft.id.label("draft_id"), OutreachDraft.strategy, OutreachDraft.opening_statement,
+            OutreachDraft.messages, OutreachDraft.triage_questions
+        )
+        .outerjoin(SourceItem, Lead.source_item_id == SourceItem.id)
+        .outerjoin(OutreachDraft, OutreachDraft.id == latest_draft_id)
+        .order_by(Lead.lead_score.desc(), Lead.id.desc())
+        .offset((max(page, 1) - 1) * page_size)
+        .limit(page_size)
+        .all()
+    )
+    leads = []
+    for row in rows:
+        lead = {
+            "id": row.id,
+            "lead_score": row.lead_score or 0.0,
+            "is_vip": (row.lead_score or 0.0) > VIP_SCORE_THRESHOLD,
+            "status": row.status,
+            "scores": row.scores or {},
+            "labels": row.labels or {},
+            "author_handle": row.author_handle,
+            "text": row.text,
+            "author_image": (row.raw_metadata or {}).get("author_image"),
+            "estimated_revenue": row.estimated_revenue,
+            "revenue_service": row.revenue_service,
+            "outreach": None if row.draft_id is None else {
+                "strategy": row.strategy,
+                "opening_statement": row.opening_statement,
+                "messages": row.messages or [],
+                "triage_questions": row.triage_questions or []
+            }
+        }
+        if lead["estimated_revenue"] is None or lead["outreach"] is None:
+            # Lead gravado antes do pré-cálculo e ainda não migrado (python init_db.py)
+            artifacts = build_lead_artifacts(lead["labels"], lead["scores"], row.author_handle)
+            if lead["estimated_revenue"] is None:
+                lead.update(artifacts["lead"])
+            lead["outreach"] = lead["outreach"] or artifacts["outreach"]
+        leads.append(lead)
+    return leads
@@ -0,0 +1,98 @@
+import hashlib
+import re
+import struct
+import unicodedata
+from typing import Optional
+
+_URL_RE = re.compile(r"https?://\S+|www\.\S+")
+_NON_WORD_RE = re.compile(r"[^\w\s]")
+
+class TextNormalizer:
+    """
+    Componente B: Normalização & Deduplicação
+    Dedup exato (hash do texto normalizado) + quase-duplicatas via MinHash de shingles
+    de caracteres, indexado com LSH por bandas: cada consulta custa `bands` acessos a
+    dicionário (O(1) esperado) em vez de comparar com todos os textos já vistos.
+    """
+    def __init__(self, shingle_size: int = 5, num_perm: int = 64, bands: int = 16, threshold: float = 0.8):
+        self.shingle_size = shingle_size
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        # Cada digest blake2b de 64 bytes rende 8 "permutações" de 64 bits; salts distintos geram o resto
+        self._salts = [bytes([i]) * 16 for i in range(num_perm // 8)]
+        self._unpack = struct.Struct(f"<{len(self._salts) * 8}Q").unpack
+        self._signature = struct.Struct(f"<{num_perm}Q")  # assinatura serializada em source_items.minhash
+        self._hashes = set()
+        self._buckets = [dict() for _ in range(bands)]  # chave da banda -> [assinaturas]
+
+    def normalize(self, raw_text: str) -> str:
+        # Limpeza de texto: Unicode canônico, minúsculas, sem URLs, pontuação ou espaços repetidos
+        text = unicodedata.normalize("NFKC", raw_text or "").casefold()
+        text = _URL_RE.sub(" ", text)
+        text = _NON_WORD_RE.sub(" ", text)
+        return " ".join(text.split())
+
+    def text_hash(self, raw_text: str) -> str:
+        return hashlib.sha1(self.normalize(raw_text).encode("utf-8")).hexdigest()
+
+    def minhash(self, raw_text: str) -> tuple:
+        text = self.normalize(raw_text)
+        shingles = {text[i:i + self.shingle_size] for i in range(max(1, len(text) - self.shingle_size + 1))}
+        rows = [
+            self._unpack(b"".join(hashlib.blake2b(sh.encode("utf-8"), digest_size=64, salt=salt).digest() for salt in self._salts))
+            for sh in shingles
+        ]
+        return tuple(map(min, zip(*rows)))
+
+    def is_duplicate(self, text_hash: str) -> bool:
+        # Dedup por hash exato do texto normalizado
+        return text_hash in self._hashes
+
+    def is_near_duplicate(self, signature: tuple) -> bool:
+        for band, key in enumerate(self._band_keys(signature)):
+            for candidate in self._buckets[band].get(key, ()):
+                if self.similarity(signature, candidate) >= self.threshold:
+                    return True
+        return False
+
+    @staticmethod
+    def similarity(sig_a: tuple, sig_b: tuple) -> float:
+        """Estimativa de similaridade de Jaccard a partir das assinaturas MinHash."""
+        return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / len(sig_a)
+
+    def pack(self, signature: tuple) -> bytes:
+        return self._signature.pack(*signature)
+
+    def unpack(self, blob: Optional[bytes]) -> Optional[tuple]:
+        """Assinatura gravada, ou None se ausente ou de outra configuração (num_perm)."""
+        if not blob or len(blob) != self._signature.size:
+            return None
+        return self._signature.unpack(blob)
+
+    def add(self, raw_text: str, near: bool = True):
+        self.add_fingerprint(self.text_hash(raw_text), self.minhash(raw_text) if near else None)
+
+    def add_fingerprint(self, text_hash: str, signature: Optional[tuple] = None):
+        self._hashes.add(text_hash)
+        if signature is not None:
+            self._index(signature)
+
+    def check_and_add(self, raw_text: str) -> bool:
+        """Retorna True se o texto já foi visto (exato ou quase-duplicata); senão o registra."""
+        text_hash = self.text_hash(raw_text)
+        if self.is_duplicate(text_hash):
+            return True
+        signature = self.minhash(raw_text)
+        if self.is_near_duplicate(signature):
+            return True
+        self.add_fingerprint(text_hash, signature)
+        return False
+
+    def _index(self, signature: tuple):
+        for band, key in enumerate(self._band_keys(signature)):
+            self._buckets[band].setdefault(key, []).append(signature)
+
+    def _band_keys(self, signature: tuple):
+        return [signature[i * self.rows:(i + 1) * self.rows] for i in range(self.bands)]
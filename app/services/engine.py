@@ -1,41 +1,20 @@
+import asyncio
+import hashlib
 import json
 import logging
-from typing import Dict, Any
-from openai import OpenAI
+import time
+from typing import Dict, Any, List, Optional
+from openai import AsyncOpenAI
 from app.core.config import settings
+from app.services.cache import ClassificationCache, get_classification_cache
+from app.services.geofencing import get_geo_matcher
+from app.services.llm_clients import get_llm_client, provider_slot, resolve_provider
+from app.services.metrics import CLASSIFICATION_FALLBACKS, observe_llm
+from app.services.rate_limiter import get_rate_limiter
 
-class IntentEngine:
-    """
-    Componente C: Classificação (Intent Engine)
-    Classifica dor estética, intenção, fit e risco.
-    """
-    def __init__(self, provider: str = None, model_name: str = None):
-        self.provider = provider or settings.LLM_PROVIDER
-        self.model_name = model_name or settings.LLM_MODEL
-        self.logger = logging.getLogger(__name__)
-        
-        # Inicializar cliente baseado no provider
-        if self.provider == "openai":
-            self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
-        elif self.provider == "openrouter":
-            self.client = OpenAI(
-                base_url=settings.OPENROUTER_BASE_URL,
-                api_key=settings.OPENROUTER_API_KEY,
-            )
-        elif self.provider == "ollama":
-            self.client = OpenAI(
-                base_url=settings.OLLAMA_BASE_URL,
-                api_key="ollama", # Ollama geralmente não requer chave
-            )
-        else:
-            self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+CLASSIFY_SYSTEM_PROMPT = "Você é um especialista em qualificação de leads para medicina estética."
 
-    async def classify(self, text: str) -> Dict[str, Any]:
-        """
-        Saída sempre estruturada (JSON) para parsing:
-        labels, scores, evidences, risk_flags, strategy, drafts.
-        """
-        prompt = f"""
+CLASSIFY_PROMPT = """
         VOCÊ É UM ANALISTA DE INTELIGÊNCIA SOCIAL E COMPORTAMENTAL DA 'CLÍNICA MÉDICA MAIS' EM SÃO PAULO.
         A Clínica Mais é uma clínica Tier 1 localizada no Itaim Bibi/Jardins, focada em Dermatologia, Estética Avançada e Longevidade.
         
@@ -77,29 +56,77 @@ class IntentEngine:
         }}
         """
 
+# Modo batch: mesmas instruções, mas K textos por requisição e um array de resultados
+_PROMPT_HEAD, _PROMPT_TAIL = CLASSIFY_PROMPT.split('Texto: "{text}"')
+_PROMPT_INDICATORS, _PROMPT_SCHEMA = _PROMPT_TAIL.split("Retorne APENAS um JSON:")
+CLASSIFY_BATCH_PROMPT = (
+    _PROMPT_HEAD
+    + 'Textos (lista JSON com "id" e "text"; analise cada um de forma independente):\n        {texts}'
+    + _PROMPT_INDICATORS
+    + 'Retorne APENAS um JSON no formato {{"results": [ITEM, ...]}}, com um ITEM por texto, '
+    + 'incluindo o campo "id" do texto correspondente. Cada ITEM segue o formato:'
+    + _PROMPT_SCHEMA
+)
+
+# Versão do prompt: muda sempre que o texto do prompt muda (invalida o cache e vai para o AuditLog)
+PROMPT_VERSION = hashlib.sha256((CLASSIFY_SYSTEM_PROMPT + CLASSIFY_PROMPT).encode("utf-8")).hexdigest()[:12]
+BATCH_PROMPT_VERSION = hashlib.sha256((CLASSIFY_SYSTEM_PROMPT + CLASSIFY_BATCH_PROMPT).encode("utf-8")).hexdigest()[:12]
+
+def is_valid_classification(item: Any) -> bool:
+    """Valida a estrutura mínima que o pipeline espera de uma classificação."""
+    try:
+        return (
+            all(isinstance(item[k]["label"], str) for k in ("pain_point", "intent_stage", "maturity"))
+            and isinstance(item["evidence"], list)
+            and all(isinstance(item["scores"].get(k, 0), (int, float)) for k in ("fit", "intent", "urgency", "risk"))
+        )
+    except (KeyError, TypeError):
+        return False
+
+class IntentEngine:
+    """
+    Componente C: Classificação (Intent Engine)
+    Classifica dor estética, intenção, fit e risco.
+    """
+    def __init__(self, provider: str = None, model_name: str = None, cache: Optional[ClassificationCache] = None, use_cache: bool = True):
+        self.provider = provider or settings.LLM_PROVIDER
+        self.model_name = model_name or settings.LLM_MODEL
+        self.prompt_version = PROMPT_VERSION
+        self.cache = (cache if cache is not None else get_classification_cache()) if use_cache else None
+        self.usage = {"requests": 0, "prompt_tokens": 0, "completion_tokens": 0, "batch_fallbacks": 0}
+        self.logger = logging.getLogger(__name__)
+        
+        # Credenciais baseadas no provider (o cliente pooled vem do registro em llm_clients)
+        self.base_url, self.api_key = resolve_provider(self.provider)
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        return get_llm_client(self.provider, self.base_url, self.api_key)
+
+    async def classify(self, text: str) -> Dict[str, Any]:
+        """
+        Saída sempre estruturada (JSON) para parsing:
+        labels, scores, evidences, risk_flags, strategy, drafts.
+        """
+        cache_key = self.cache.make_key(text, self.model_name, PROMPT_VERSION) if self.cache is not None else None
+
         try:
-            response = self.client.chat.completions.create(
-                model=self.model_name,
-                messages=[
-                    {"role": "system", "content": "Você é um especialista em qualificação de leads para medicina estética."},
-                    {"role": "user", "content": prompt}
-                ],
-                response_format={"type": "json_object"}
-            )
-            
-            result = json.loads(response.choices[0].message.content)
-            
-            # Adicionar flags regionais aos scores para o Scorer
-            result["scores"]["is_sp_region"] = result.get("is_sp_region", True)
-            result["scores"]["is_elite_neighborhood"] = result.get("is_elite_neighborhood", False)
+            result = await self.cache.aget(cache_key) if self.cache is not None else None
+            from_cache = result is not None
+
+            if result is None:
+                result = await self._complete(CLASSIFY_PROMPT.format(text=text))
             
-            # Calcular lead_score final usando o LeadScorer
-            scorer = LeadScorer()
-            result["scores"]["lead_score"] = scorer.calculate_score(result["scores"])
+            result = self._finalize(result, text)
+
+            # Só respostas válidas vão para o cache (fallbacks nunca são cacheados)
+            if self.cache is not None and not from_cache:
+                await self.cache.aset(cache_key, result)
             
             return result
         except Exception as e:
             self.logger.error(f"Erro ao classificar com LLM: {e}")
+            CLASSIFICATION_FALLBACKS.labels("classify").inc()
             # Fallback para dados vazios em caso de erro
             return {
                 "pain_point": {"label": "unknown", "confidence": 0.0},
@@ -110,30 +137,137 @@ class IntentEngine:
                 "risk_flags": ["error_in_classification"]
             }
 
+    async def classify_batch(self, texts: List[str], batch_size: int = None) -> List[Dict[str, Any]]:
+        """
+        Classifica vários textos enviando até `batch_size` (LLM_BATCH_SIZE) por requisição,
+        economizando o reenvio do prompt de sistema a cada texto.
+        Itens ausentes ou malformados na resposta caem para `classify` individual.
+        Retorna os resultados na mesma ordem de `texts`.
+        """
+        batch_size = batch_size or settings.LLM_BATCH_SIZE
+        results: List[Optional[Dict[str, Any]]] = [None] * len(texts)
+        keys = [self.cache.make_key(t, self.model_name, BATCH_PROMPT_VERSION) if self.cache is not None else None for t in texts]
+
+        pending = []
+        cached_items = await self.cache.aget_many(keys) if self.cache is not None else [None] * len(texts)
+        for i, cached in enumerate(cached_items):
+            if cached is not None:
+                results[i] = self._finalize(cached, texts[i])
+            else:
+                pending.append(i)
+
+        chunks = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+        chunk_items = await asyncio.gather(*[self._complete_batch([texts[i] for i in chunk]) for chunk in chunks])
+
+        fallbacks, to_cache = [], []
+        for chunk, items in zip(chunks, chunk_items):
+            for position, i in enumerate(chunk):
+                item = items.get(position)
+                if not is_valid_classification(item):
+                    fallbacks.append(i)
+                    continue
+                results[i] = self._finalize(item, texts[i])
+                to_cache.append((keys[i], results[i]))
+        if self.cache is not None:
+            await self.cache.aset_many(to_cache)  # um commit para o lote inteiro
+
+        if fallbacks:
+            self.usage["batch_fallbacks"] += len(fallbacks)
+            CLASSIFICATION_FALLBACKS.labels("classify_batch").inc(len(fallbacks))
+            self.logger.warning(f"Batch: {len(fallbacks)} itens malformados reclassificados individualmente")
+            singles = await asyncio.gather(*[self._classify_single_fallback(texts[i]) for i in fallbacks])
+            for i, result in zip(fallbacks, singles):
+                results[i] = result
+        return results
+
+    async def _classify_single_fallback(self, text: str) -> Dict[str, Any]:
+        # Cada reclassificação é uma requisição a mais: passa pelo mesmo limitador das chamadas normais
+        await get_rate_limiter(self.provider).acquire()
+        return await self.classify(text)
+
+    async def _complete(self, prompt: str, operation: str = "classify") -> Any:
+        async with provider_slot(self.provider):
+            start, response = time.perf_counter(), None
+            try:
+                response = await self.client.chat.completions.create(
+                    model=self.model_name,
+                    messages=[
+                        {"role": "system", "content": CLASSIFY_SYSTEM_PROMPT},
+                        {"role": "user", "content": prompt}
+                    ],
+                    response_format={"type": "json_object"}
+                )
+            finally:
+                observe_llm(self.provider, self.model_name, operation, start, response)
+        self.usage["requests"] += 1
+        if getattr(response, "usage", None):
+            self.usage["prompt_tokens"] += response.usage.prompt_tokens or 0
+            self.usage["completion_tokens"] += response.usage.completion_tokens or 0
+        return json.loads(response.choices[0].message.content)
+
+    async def _complete_batch(self, texts: List[str]) -> Dict[int, Any]:
+        """Uma requisição para o lote; retorna {posição: item} apenas para ids reconhecidos."""
+        payload = json.dumps([{"id": i, "text": t} for i, t in enumerate(texts)], ensure_ascii=False)
+        try:
+            data = await self._complete(CLASSIFY_BATCH_PROMPT.format(texts=payload), operation="classify_batch")
+        except Exception as e:
+            self.logger.error(f"Erro na classificação em lote ({len(texts)} textos): {e}")
+            return {}
+        items = data.get("results", []) if isinstance(data, dict) else []
+        by_id = {}
+        for item in items:
+            if isinstance(item, dict) and isinstance(item.get("id"), int) and 0 <= item["id"] < len(texts):
+                by_id[item["id"]] = item
+        return by_id
+
+    def _finalize(self, result: Dict[str, Any], text: str = None) -> Dict[str, Any]:
+        # Geofencing determinístico pelo gazetteer; o LLM só decide quando o texto não cita
+        # local conhecido ou cita locais dentro e fora da Grande SP sem indicar onde a pessoa mora
+        geo = get_geo_matcher().locate(text) if text else None
+        if geo is not None and geo["confident"]:
+            result.update({k: geo[k] for k in ("is_sp_region", "is_elite_neighborhood", "detected_location")})
+            result["geo_source"] = "gazetteer"
+        else:
+            result.setdefault("geo_source", "llm")
+
+        # Adicionar flags regionais aos scores para o Scorer
+        result["scores"]["is_sp_region"] = result.get("is_sp_region", True)
+        result["scores"]["is_elite_neighborhood"] = result.get("is_elite_neighborhood", False)
+        
+        # Calcular lead_score final usando o LeadScorer
+        scorer = LeadScorer()
+        result["scores"]["lead_score"] = scorer.calculate_score(result["scores"])
+        return result
+
 class LeadScorer:
     """
     Componente E: Scoring & Priorização
     """
+    # LeadScore ponderado para alto padrão (Prioriza Visual Fit, Luxury Signals e Social Signals)
+    # w1*Fit + w2*Intent + w3*Urgency + w4*Maturity + w5*VisualFit + w6*SocialStatus - w7*Risk
+    # Pesos compartilhados com o re-score em massa (app/services/rescoring.py)
+    WEIGHTS = {
+        "fit": 0.10, 
+        "intent": 0.10, 
+        "urgency": 0.05, 
+        "maturity": 0.10, 
+        "visual_fit": 0.35, # Perfil visual/posses
+        "social_status_signal": 0.20, # Sinais subliminares no texto
+        "risk": 0.60 
+    }
+    OUTSIDE_SP_MULTIPLIER = 0.5 # Reduz o score pela metade se não for da Grande SP
+    ELITE_BONUS = 1.2 # Bônus de 20% para bairros de elite (Itaim, Jardins, Alphaville)
+
     def calculate_score(self, metrics: Dict[str, float]) -> float:
-        # LeadScore ponderado para alto padrão (Prioriza Visual Fit, Luxury Signals e Social Signals)
-        # w1*Fit + w2*Intent + w3*Urgency + w4*Maturity + w5*VisualFit + w6*SocialStatus - w7*Risk
         # Adicional: Penaliza se NÃO for da Grande São Paulo, Bônus para Bairros de Elite
-        w = {
-            "fit": 0.10, 
-            "intent": 0.10, 
-            "urgency": 0.05, 
-            "maturity": 0.10, 
-            "visual_fit": 0.35, # Perfil visual/posses
-            "social_status": 0.20, # Sinais subliminares no texto
-            "risk": 0.60 
-        }
+        w = self.WEIGHTS
         
         # Geofencing: Grande São Paulo (Fator base)
         is_sp = metrics.get("is_sp_region", True)
         is_elite = metrics.get("is_elite_neighborhood", False)
         
-        regional_multiplier = 1.0 if is_sp else 0.5 # Reduz o score pela metade se não for da Grande SP
-        elite_bonus = 1.2 if is_elite else 1.0 # Bônus de 20% para bairros de elite (Itaim, Jardins, Alphaville)
+        regional_multiplier = 1.0 if is_sp else self.OUTSIDE_SP_MULTIPLIER
+        elite_bonus = self.ELITE_BONUS if is_elite else 1.0
 
         score = (
             w["fit"] * metrics.get("fit", 0) +
@@ -141,7 +275,7 @@ class LeadScorer:
             w["urgency"] * metrics.get("urgency", 0) +
             w["maturity"] * metrics.get("maturity", 0) +
             w["visual_fit"] * metrics.get("visual_fit", 0) +
-            w["social_status"] * metrics.get("social_status_signal", 0) -
+            w["social_status_signal"] * metrics.get("social_status_signal", 0) -
             w["risk"] * metrics.get("risk", 0)
         )
         return max(0, min(100, score * regional_multiplier * elite_bonus))
@@ -156,13 +290,11 @@ class VisionEngine:
         self.model_name = settings.VISION_MODEL
         self.logger = logging.getLogger(__name__)
         
-        if self.provider == "openrouter":
-            self.client = OpenAI(
-                base_url=settings.OPENROUTER_BASE_URL,
-                api_key=settings.OPENROUTER_API_KEY,
-            )
-        else:
-            self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        self.base_url, self.api_key = resolve_provider(self.provider)
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        return get_llm_client(self.provider, self.base_url, self.api_key)
 
     async def analyze_profile_image(self, image_url: str) -> Dict[str, Any]:
         prompt = """
@@ -203,23 +335,29 @@ class VisionEngine:
         """
         
         try:
-            response = self.client.chat.completions.create(
-                model=self.model_name,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "text", "text": prompt},
-                            {"type": "image_url", "image_url": {"url": image_url}}
+            async with provider_slot(self.provider):
+                start, response = time.perf_counter(), None
+                try:
+                    response = await self.client.chat.completions.create(
+                        model=self.model_name,
+                        messages=[
+                            {
+                                "role": "user",
+                                "content": [
+                                    {"type": "text", "text": prompt},
+                                    {"type": "image_url", "image_url": {"url": image_url}}
+                                ],
+                            }
                         ],
-                    }
-                ],
-                max_tokens=500,
-                response_format={"type": "json_object"}
-            )
+                        max_tokens=500,
+                        response_format={"type": "json_object"}
+                    )
+                finally:
+                    observe_llm(self.provider, self.model_name, "vision", start, response)
             return json.loads(response.choices[0].message.content)
         except Exception as e:
             self.logger.error(f"Erro na análise visual: {e}")
+            CLASSIFICATION_FALLBACKS.labels("vision").inc()
             return {
                 "visual_fit": 50,
                 "indicators": {"aesthetic_care": 50, "socioeconomic_signals": 50, "selfie_affinity": 50},
@@ -0,0 +1,162 @@
+import re
+from typing import Any, Dict, List, Optional, Tuple
+from app.services.prefilter import fold
+
+# Gazetteer da Grande São Paulo. Tipos: elite (bairros/regiões prioritários do CLASSIFY_PROMPT),
+# neighborhood (demais bairros da capital), municipality (39 municípios da RMSP),
+# generic (menções vagas a SP) e outside (cidades fora da Grande SP, evidência negativa).
+ELITE_NEIGHBORHOODS = {
+    "Itaim Bibi": ["itaim bibi", "itaim"],
+    "Jardins": ["jardins", "jardim europa", "jardim paulista", "jardim america", "jardim paulistano"],
+    "Vila Nova Conceição": ["vila nova conceicao", "vnc"],
+    "Moema": ["moema"],
+    "Higienópolis": ["higienopolis"],
+    "Pacaembu": ["pacaembu"],
+    "Morumbi": ["morumbi"],
+    "Alto de Pinheiros": ["alto de pinheiros"],
+    "Cidade Jardim": ["cidade jardim"],
+    "Alphaville": ["alphaville", "tambore"],
+    "Granja Viana": ["granja viana"],
+    "Bairro Jardim (Santo André)": ["bairro jardim"]
+}
+NEIGHBORHOODS = [
+    "Pinheiros", "Vila Madalena", "Perdizes", "Pompeia", "Brooklin", "Campo Belo", "Vila Mariana",
+    "Vila Olímpia", "Tatuapé", "Anália Franco", "Mooca", "Santana", "Lapa", "Butantã", "Consolação",
+    "Aclimação", "Ipiranga", "Santo Amaro", "Chácara Santo Antônio", "Itaim Paulista",
+    "Interlagos", "Penha", "Vila Leopoldina", "Jabaquara", "Campo Limpo", "Vila Prudente",
+    "Água Branca", "Barra Funda", "Bom Retiro", "Cambuci", "Casa Verde", "Tucuruvi", "Vila Formosa",
+    "Avenida Paulista", "Faria Lima", "Berrini", "Oscar Freire"
+]
+MUNICIPALITIES = [
+    "Arujá", "Barueri", "Biritiba-Mirim", "Caieiras", "Cajamar", "Carapicuíba", "Cotia", "Diadema",
+    "Embu das Artes", "Embu-Guaçu", "Ferraz de Vasconcelos", "Francisco Morato", "Franco da Rocha",
+    "Guararema", "Guarulhos", "Itapecerica da Serra", "Itapevi", "Itaquaquecetuba", "Jandira", "Juquitiba",
+    "Mairiporã", "Mauá", "Mogi das Cruzes", "Osasco", "Pirapora do Bom Jesus", "Poá", "Ribeirão Pires",
+    "Rio Grande da Serra", "Salesópolis", "Santa Isabel", "Santana de Parnaíba", "Santo André",
+    "São Bernardo do Campo", "São Caetano do Sul", "São Lourenço da Serra", "Suzano", "Taboão da Serra",
+    "Vargem Grande Paulista"
+]
+GENERIC_SP = {
+    "São Paulo": ["sao paulo", "sp", "sampa", "capital paulista", "grande sp", "grande sao paulo", "zona sul",
+                  "zona oeste", "zona norte", "zona leste", "abc paulista", "abc"],
+}
+OUTSIDE = [
+    "Rio de Janeiro", "Niterói", "Curitiba", "Belo Horizonte", "Porto Alegre", "Brasília", "Salvador", "Recife",
+    "Fortaleza", "Florianópolis", "Goiânia", "Manaus", "Belém", "João Pessoa", "Maceió",
+    "Aracaju", "Cuiabá", "São Luís", "Teresina", "Londrina", "Joinville", "Uberlândia",
+    "Campinas", "Guarujá", "Sorocaba", "Jundiaí", "Ribeirão Preto", "São José dos Campos",
+    "Piracicaba", "Bauru", "São José do Rio Preto", "Lisboa", "Miami", "Minas Gerais", "Paraná",
+    "Santa Catarina", "Rio Grande do Sul", "Bahia", "Pernambuco", "Goiás", "interior de sp", "interior paulista",
+    "RJ", "BH"
+]
+# Fora da lista de propósito: nomes que também são palavras comuns (Saúde, Liberdade, Natal,
+# Vitória, Paraíso) e siglas ambíguas (MG, PR, SC, RS, POA/Poá).
+# Cidades de fora com nome ambíguo (sobrenome "Santos"; "Campo Grande" também é bairro/shopping de SP):
+# só contam com pista de lugar logo antes ("em Santos", "de Campo Grande") ou de residência.
+OUTSIDE_NEEDS_CUE = ["Santos", "Campo Grande"]
+
+# Pistas de residência ("moro em X") pesam mais que menções de passagem ("vou viajar para SP")
+_RESIDENCE_RE = re.compile(r"\b(moro|morando|resido|sou de|sou do|sou da|aqui (?:em|no|na)|daqui|vivo (?:em|no|na)|minha casa)\b")
+_RESIDENCE_WINDOW = 30  # caracteres antes do local
+_PLACE_CUE_RE = re.compile(r"\b(?:em|de|para|pra)\s+$")  # "no/na Campo Grande" fica de fora: bairro/shopping
+_TOKEN_RE = re.compile(r"\w+")
+
+def _tokens(text: str) -> List[Tuple[str, int, int]]:
+    return [(m.group(), m.start(), m.end()) for m in _TOKEN_RE.finditer(text)]
+
+class GeoMatcher:
+    """
+    Extrator determinístico de localização: trie de tokens compilada a partir do gazetteer,
+    percorrida com casamento mais longo à esquerda (ex: "Santana de Parnaíba" antes de "Santana").
+    Custa alguns microssegundos por texto e não faz nenhuma chamada de rede.
+    """
+    def __init__(self):
+        self._root: Dict[str, Any] = {}
+        for name, aliases in ELITE_NEIGHBORHOODS.items():
+            self._add(name, "elite", aliases)
+        for name, aliases in GENERIC_SP.items():
+            self._add(name, "generic", aliases)
+        for kind, names in (("neighborhood", NEIGHBORHOODS), ("municipality", MUNICIPALITIES), ("outside", OUTSIDE),
+                            ("outside_cued", OUTSIDE_NEEDS_CUE)):
+            for name in names:
+                self._add(name, kind, [name])
+
+    def _add(self, name: str, kind: str, aliases: List[str]):
+        for alias in aliases:
+            node = self._root
+            for token, _, _ in _tokens(fold(alias)):
+                node = node.setdefault(token, {})
+            node.setdefault("$", (name, kind))  # primeira definição vence
+
+    def find(self, text: str) -> List[Dict[str, Any]]:
+        """Locais citados no texto, na ordem, sem sobreposição."""
+        folded = fold(text)
+        tokens = _tokens(folded)
+        matches, i = [], 0
+        while i < len(tokens):
+            node, best = self._root, None
+            for j in range(i, len(tokens)):
+                node = node.get(tokens[j][0])
+                if node is None:
+                    break
+                if "$" in node:
+                    best = (j, node["$"])
+            if best is None:
+                i += 1
+                continue
+            j, (name, kind) = best
+            start = tokens[i][1]
+            residence = _RESIDENCE_RE.search(folded, max(0, start - _RESIDENCE_WINDOW), start) is not None
+            i = j + 1
+            if kind == "outside_cued":
+                if not residence and _PLACE_CUE_RE.search(folded, max(0, start - 6), start) is None:
+                    continue  # "Dra. Ana Santos", "no Campo Grande": não é menção a outra cidade
+                kind = "outside"
+            matches.append({"name": name, "kind": kind, "start": start, "residence": residence})
+        return matches
+
+    def locate(self, text: str) -> Dict[str, Any]:
+        """
+        Campos de geofencing do texto. `confident` é False quando não há local citado ou
+        quando locais dentro e fora da Grande SP empatam; nesses casos o LLM desempata.
+        """
+        matches = self.find(text)
+        result = {"is_sp_region": None, "is_elite_neighborhood": False, "detected_location": None,
+                  "confident": False, "matches": [m["name"] for m in matches]}
+        if not matches:
+            return result
+
+        inside = [m for m in matches if m["kind"] != "outside"]
+        specific = [m for m in inside if m["kind"] != "generic"]
+        outside = [m for m in matches if m["kind"] == "outside"]
+        residence = [m for m in matches if m["residence"]]
+
+        if residence:
+            primary, confident = residence[0], len({m["kind"] == "outside" for m in residence}) == 1
+        elif specific and outside:
+            primary, confident = specific[0], False
+        elif specific:
+            primary, confident = next((m for m in specific if m["kind"] == "elite"), specific[0]), True
+        elif outside:
+            # "vou viajar para SP": menção vaga a SP não supera uma cidade de fora
+            primary, confident = outside[0], True
+        else:
+            primary, confident = inside[0], True
+
+        is_sp = primary["kind"] != "outside"
+        result.update({
+            "is_sp_region": is_sp,
+            "is_elite_neighborhood": is_sp and any(m["kind"] == "elite" for m in inside),
+            "detected_location": primary["name"],
+            "confident": confident
+        })
+        return result
+
+_matcher: Optional[GeoMatcher] = None
+
+def get_geo_matcher() -> GeoMatcher:
+    """Matcher compartilhado do processo (a trie é montada uma única vez)."""
+    global _matcher
+    if _matcher is None:
+        _matcher = GeoMatcher()
+    return _matcher
@@ -0,0 +1,152 @@
+import logging
+import time
+import uuid
+from datetime import datetime
+from typing import List, Dict, Any
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.models import MissionJob
+from app.services.collector import SignalsCollector
+from app.services.profiler import MissionProfiler, save_profile
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUERIES = [
+    "Ultraformer MPT",
+    "Morpheus 8",
+    "Lavieen",
+    "Bioestimuladores de colágeno",
+    "Sculptra Itaim Bibi"
+]
+
+FINISHED_STATUSES = ("succeeded", "failed", "cancelled")
+
+class MissionCancelled(Exception):
+    """Levantada dentro da missão quando o cancelamento do job é solicitado."""
+
+def create_job(db: Session, queries: List[str] = None, streaming: bool = True) -> MissionJob:
+    job = MissionJob(id=uuid.uuid4().hex, status="queued", queries=queries or DEFAULT_QUERIES, streaming=streaming, progress={})
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+def request_cancel(db: Session, job: MissionJob) -> MissionJob:
+    """Jobs na fila são cancelados na hora; jobs em execução param no próximo relatório de progresso."""
+    if job.status in FINISHED_STATUSES:
+        return job
+    job.cancel_requested = True
+    if job.status == "queued":
+        job.status = "cancelled"
+        job.finished_at = datetime.now()
+    db.commit()
+    db.refresh(job)
+    return job
+
+def fail_job(db: Session, job: MissionJob, error: str) -> MissionJob:
+    job.status, job.error, job.finished_at = "failed", error, datetime.now()
+    db.commit()
+    db.refresh(job)
+    return job
+
+def job_to_dict(job: MissionJob) -> Dict[str, Any]:
+    return {
+        "id": job.id,
+        "status": job.status,
+        "queries": job.queries,
+        "streaming": job.streaming,
+        "progress": job.progress or {},
+        "result": job.result,
+        "error": job.error,
+        "cancel_requested": job.cancel_requested,
+        "worker": job.worker,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None
+    }
+
+class JobProgressReporter:
+    """
+    Callback de progresso do SignalsCollector: grava mission_stats no job no máximo
+    a cada `interval` segundos e interrompe a missão se o cancelamento foi pedido.
+    """
+    def __init__(self, job_id: str, session_factory=None, interval: float = 1.0):
+        self.job_id = job_id
+        self.session_factory = session_factory or SessionLocal
+        self.interval = interval
+        self._last_report = 0.0
+
+    def __call__(self, stats: Dict[str, Any], force: bool = False):
+        now = time.monotonic()
+        if not force and now - self._last_report < self.interval:
+            return
+        self._last_report = now
+        db = self.session_factory()
+        try:
+            job = db.get(MissionJob, self.job_id)
+            job.progress = dict(stats)
+            cancel = job.cancel_requested
+            db.commit()
+        finally:
+            db.close()
+        if cancel:
+            raise MissionCancelled(self.job_id)
+
+def _update_job(session_factory, job_id: str, **fields):
+    db = session_factory()
+    try:
+        job = db.get(MissionJob, job_id)
+        for name, value in fields.items():
+            setattr(job, name, value)
+        db.commit()
+    finally:
+        db.close()
+
+async def execute_job(job_id: str, session_factory=None, worker: str = "inline"):
+    """Executa uma missão registrada em mission_jobs (usado pelo worker Celery e pelo modo inline)."""
+    session_factory = session_factory or SessionLocal
+    db = session_factory()
+    try:
+        job = db.get(MissionJob, job_id)
+        if job is None:
+            logger.error(f"Job de missão inexistente: {job_id}")
+            return
+        if job.cancel_requested or job.status == "cancelled":
+            logger.info(f"Job {job_id} cancelado antes de iniciar")
+            return
+        queries, streaming = job.queries, job.streaming
+        job.status, job.worker, job.started_at, job.error = "running", worker, datetime.now(), None
+        db.commit()
+    finally:
+        db.close()
+
+    collector = SignalsCollector(session_factory=session_factory)
+    collector.progress_callback = JobProgressReporter(job_id, session_factory)
+    if settings.MISSION_PROFILE_ENABLED:
+        collector.profiler = MissionProfiler()
+    status, error, result = "succeeded", None, None
+    try:
+        if streaming:
+            results = await collector.stream_and_process(queries)
+        else:
+            results = await collector.fetch_and_process(queries)
+        result = {"leads_saved": len(results), "lead_ids": [r["lead_id"] for r in results]}
+    except MissionCancelled:
+        status = "cancelled"
+        logger.info(f"Job {job_id} cancelado durante a execução")
+    except Exception as e:
+        status, error = "failed", str(e)
+        logger.error(f"Job {job_id} falhou: {e}")
+
+    _update_job(
+        session_factory, job_id,
+        status=status, error=error, result=result,
+        progress=dict(collector.mission_stats), finished_at=datetime.now()
+    )
+    if collector.profiler is not None:
+        # Também para missões canceladas ou com falha: o perfil mostra onde o tempo foi gasto
+        try:
+            save_profile(session_factory, job_id, collector.profiler)
+        except Exception as e:
+            logger.error(f"Falha ao gravar o perfil do job {job_id}: {e}")
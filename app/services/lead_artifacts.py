@@ -0,0 +1,32 @@
+from typing import Any, Dict
+from app.services.composer import OutreachComposer
+from app.services.roi_engine import ROIEngine
+from app.services.sdr_agent import SDRAgent
+
+# Instâncias compartilhadas: os três componentes são regras puras e sem estado por lead
+_roi = ROIEngine()
+_sdr = SDRAgent()
+_composer = OutreachComposer()
+
+def build_lead_artifacts(labels: Dict[str, Any], scores: Dict[str, Any], author_handle: str = None) -> Dict[str, Any]:
+    """
+    Calcula uma única vez (ao salvar o lead) o faturamento estimado, o fluxo do SDR e o
+    rascunho de abordagem, que os dashboards apenas leem.
+    """
+    labels, scores = labels or {}, scores or {}
+    revenue = _roi.estimate_revenue({"labels": labels})
+    flow = _sdr.generate_triage_flow({"labels": labels, "scores": scores})
+    outreach = _composer.compose_messages({
+        "pain_point": labels.get("pain_point"),
+        "intent_stage": labels.get("intent_stage"),
+        "author_handle": author_handle or "Cliente"
+    })
+    return {
+        "lead": {"estimated_revenue": revenue["estimated_value"], "revenue_service": revenue["service"]},
+        "outreach": {
+            "strategy": flow["strategy"],
+            "opening_statement": flow["opening_statement"],
+            "messages": outreach["messages"],
+            "triage_questions": flow["triage_questions"]
+        }
+    }
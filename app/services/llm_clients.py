@@ -0,0 +1,78 @@
+import asyncio
+import weakref
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, Tuple
+import httpx
+from openai import AsyncOpenAI
+from app.core.config import settings
+
+# Registro de clientes do processo, separado por event loop: conexões keep-alive e
+# semáforos asyncio não podem atravessar loops (ex: asyncio.run por clique no Streamlit,
+# uma missão por asyncio.run no worker Celery).
+_registries = weakref.WeakKeyDictionary()  # loop -> _LoopRegistry
+
+class _LoopRegistry:
+    def __init__(self):
+        self.http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=settings.LLM_MAX_CONNECTIONS,
+                                max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS),
+            timeout=httpx.Timeout(settings.LLM_TIMEOUT, connect=settings.LLM_CONNECT_TIMEOUT)
+        )
+        self.llm_clients: Dict[Tuple[str, Optional[str], str], AsyncOpenAI] = {}
+        self.semaphores: Dict[str, asyncio.Semaphore] = {}
+
+def _registry() -> _LoopRegistry:
+    loop = asyncio.get_running_loop()
+    if loop not in _registries:
+        _registries[loop] = _LoopRegistry()
+    return _registries[loop]
+
+def resolve_provider(provider: str) -> Tuple[Optional[str], str]:
+    """(base_url, api_key) do provider; base_url None = endpoint padrão da OpenAI."""
+    if provider == "openrouter":
+        return settings.OPENROUTER_BASE_URL, settings.OPENROUTER_API_KEY
+    if provider == "ollama":
+        return settings.OLLAMA_BASE_URL, "ollama"  # Ollama geralmente não requer chave
+    return None, settings.OPENAI_API_KEY
+
+def get_http_client() -> httpx.AsyncClient:
+    """Pool httpx keep-alive compartilhado pelo loop atual (LLMs e Serper)."""
+    return _registry().http_client
+
+def get_llm_client(provider: str, base_url: Optional[str] = None, api_key: Optional[str] = None) -> AsyncOpenAI:
+    """
+    AsyncOpenAI do loop atual por (provider, base_url, api_key). Todos os engines
+    compartilham o mesmo pool httpx, sem novos handshakes TLS por instância; o
+    timeout vem de LLM_PROVIDER_TIMEOUTS (ou LLM_TIMEOUT).
+    """
+    if base_url is None and api_key is None:
+        base_url, api_key = resolve_provider(provider)
+    registry = _registry()
+    key = (provider, base_url, api_key)
+    if key not in registry.llm_clients:
+        registry.llm_clients[key] = AsyncOpenAI(
+            base_url=base_url, api_key=api_key, http_client=registry.http_client,
+            timeout=httpx.Timeout(settings.LLM_PROVIDER_TIMEOUTS.get(provider, settings.LLM_TIMEOUT),
+                                  connect=settings.LLM_CONNECT_TIMEOUT)
+        )
+    return registry.llm_clients[key]
+
+def get_provider_semaphore(provider: str) -> Optional[asyncio.Semaphore]:
+    """Semáforo do provider no loop atual (LLM_PROVIDER_CONCURRENCY); None quando sem limite."""
+    limit = settings.LLM_PROVIDER_CONCURRENCY.get(provider, 0)
+    if limit <= 0:
+        return None
+    registry = _registry()
+    if provider not in registry.semaphores:
+        registry.semaphores[provider] = asyncio.Semaphore(limit)
+    return registry.semaphores[provider]
+
+@asynccontextmanager
+async def provider_slot(provider: str):
+    """Ocupa uma das requisições simultâneas permitidas ao provider, somando todos os engines."""
+    semaphore = get_provider_semaphore(provider)
+    if semaphore is None:
+        yield
+        return
+    async with semaphore:
+        yield
@@ -0,0 +1,89 @@
+import os
+import time
+from typing import Tuple
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess
+
+# Métricas do pipeline de captação, expostas em GET /metrics (formato Prometheus).
+# Cada observação custa poucos µs (incremento sob lock, sem I/O): ficam sempre ligadas.
+# Com vários processos (uvicorn --workers, workers Celery na mesma máquina), defina
+# PROMETHEUS_MULTIPROC_DIR (diretório vazio a cada deploy) para que /metrics some todos.
+
+LLM_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+SERPER_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 15.0)
+DB_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+SERPER_REQUEST_SECONDS = Histogram(
+    "serper_request_duration_seconds", "Latência de cada tentativa de busca no Serper",
+    ["status"], buckets=SERPER_BUCKETS  # código HTTP ou "error" (falha de rede/timeout)
+)
+LLM_REQUEST_SECONDS = Histogram(
+    "llm_request_duration_seconds", "Latência das requisições ao LLM (sem a espera por vaga no provider)",
+    ["provider", "model", "operation", "outcome"], buckets=LLM_BUCKETS
+)
+LLM_TOKENS = Counter("llm_tokens_total", "Tokens consumidos no LLM", ["provider", "model", "direction"])
+CLASSIFICATION_FALLBACKS = Counter(
+    "classification_fallbacks_total",
+    "Respostas substituídas por fallback: classify (error_in_classification), classify_batch (item reclassificado) e vision",
+    ["operation"]
+)
+DB_COMMIT_SECONDS = Histogram("db_commit_duration_seconds", "Latência do commit de cada lote de leads", buckets=DB_BUCKETS)
+PIPELINE_SIGNALS = Counter(
+    "pipeline_signals_total",
+    "Sinais por estágio: fetched, duplicate, prefiltered, analyzed, analysis_failed, saved, write_failed",
+    ["stage"]
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Latência das requisições à API por rota", ["method", "route", "status"]
+)
+
+def observe_llm(provider: str, model: str, operation: str, start: float, response=None):
+    """Registra latência (desde `start`, time.perf_counter) e tokens de uma requisição ao LLM."""
+    LLM_REQUEST_SECONDS.labels(provider, model, operation, "ok" if response is not None else "error").observe(
+        time.perf_counter() - start
+    )
+    usage = getattr(response, "usage", None)
+    if usage:
+        LLM_TOKENS.labels(provider, model, "prompt").inc(usage.prompt_tokens or 0)
+        LLM_TOKENS.labels(provider, model, "completion").inc(usage.completion_tokens or 0)
+
+def render_metrics() -> Tuple[bytes, str]:
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+class HTTPMetricsMiddleware:
+    """
+    Middleware ASGI que mede cada requisição HTTP pelo template da rota
+    (ex.: /api/v1/leads/{lead_id}), mantendo a cardinalidade limitada.
+    ASGI puro: não envolve o corpo da resposta como o BaseHTTPMiddleware.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = route_template(scope)
+            if route != "/metrics":
+                HTTP_REQUEST_SECONDS.labels(scope["method"], route, str(status)).observe(time.perf_counter() - start)
+
+def route_template(scope) -> str:
+    """Caminho com os parâmetros no lugar dos valores (/api/v1/leads/42 -> /api/v1/leads/{lead_id})."""
+    if "route" not in scope:
+        return "unmatched"  # 404 de roteamento: não vira um label por URL
+    names = {str(value): name for name, value in scope.get("path_params", {}).items()}
+    return "/".join("{%s}" % names[part] if part in names else part for part in scope["path"].split("/"))
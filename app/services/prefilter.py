@@ -0,0 +1,90 @@
+import importlib
+import logging
+import re
+import unicodedata
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlparse
+from app.core.config import settings
+
+# Vocabulário do CLASSIFY_PROMPT (tecnologias, injetáveis, protocolos) e queixas comuns, sem acentos
+TREATMENT_TERMS = [
+    "ultraformer", "morpheus", "lavieen", "liftera", "botox", "toxina botulinica", "preenchimento",
+    "acido hialuronico", "bioestimulador", "sculptra", "radiesse", "rejuvenescimento", "contorno corporal",
+    "mancha", "melasma", "flacidez", "ruga", "papada", "harmonizacao", "skinbooster", "colageno",
+    "peeling", "laser", "celulite", "gordura localizada", "olheira", "estria", "estetica", "dermatolog"
+]
+# Alguém pedindo indicação, preço ou contando a própria experiência
+INTENT_TERMS = [
+    "quero", "queria", "gostaria", "preciso", "procuro", "procurando", "pensando em", "indica", "indicacao",
+    "recomenda", "alguem ja", "vale a pena", "quanto custa", "valor", "preco", "orcamento", "agendar",
+    "avaliacao", "fiz", "fazer", "testou", "me incomoda", "incomodam", "minha pele", "meu rosto"
+]
+# Texto típico de página institucional/anúncio de clínica (resultados do Serper)
+COMMERCIAL_TERMS = [
+    "agende ja", "agende sua", "agende agora", "nossa clinica", "nossos tratamentos", "nossa equipe",
+    "conheca", "site oficial", "promocao", "desconto", "cupom", "pacote", "horario de funcionamento",
+    "ligue", "fale conosco", "crm", "clinica de estetica em", "saiba mais", "todos os direitos"
+]
+
+def _compile(terms) -> re.Pattern:
+    # Prefixo de palavra: "mancha" casa "manchas", "dermatolog" casa "dermatologista"
+    return re.compile(r"\b(?:" + "|".join(re.escape(t) for t in sorted(terms, key=len, reverse=True)) + ")")
+
+_TREATMENT_RE = _compile(TREATMENT_TERMS)
+_INTENT_RE = _compile(INTENT_TERMS)
+_COMMERCIAL_RE = _compile(COMMERCIAL_TERMS)
+_PHONE_RE = re.compile(r"\(?\b11\)?\s?9?\d{4}[-\s]?\d{4}\b")
+
+def fold(text: str) -> str:
+    """Minúsculas e sem acentos, para casar 'Preço'/'preco' e 'Ácido'/'acido' (também usada no geofencing)."""
+    decomposed = unicodedata.normalize("NFKD", text or "").casefold()
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+def load_local_model(path: str) -> Optional[Callable[[str], float]]:
+    """
+    Carrega o modelo local opcional a partir de "modulo:funcao" (PREFILTER_LOCAL_MODEL).
+    A função recebe o texto e devolve a probabilidade (0-1) de ser um lead.
+    """
+    if not path:
+        return None
+    module_name, _, attr = path.partition(":")
+    return getattr(importlib.import_module(module_name), attr)
+
+class SignalPrefilter:
+    """
+    Componente B2: Pré-filtro local (sem rede) antes do IntentEngine.
+    Descarta sinais sem nenhum termo de tratamento e páginas institucionais/anúncios;
+    o modelo local opcional descarta os que ficarem abaixo de PREFILTER_MIN_PROBABILITY.
+    Só os candidatos aprovados seguem para o LLM.
+    """
+    def __init__(self, local_model: Callable[[str], float] = None, min_probability: float = None):
+        self.logger = logging.getLogger(__name__)
+        self.local_model = local_model if local_model is not None else load_local_model(settings.PREFILTER_LOCAL_MODEL)
+        self.min_probability = min_probability if min_probability is not None else settings.PREFILTER_MIN_PROBABILITY
+
+    def check(self, sig: Dict[str, Any]) -> Optional[str]:
+        """Motivo do descarte, ou None quando o sinal deve ir para o LLM."""
+        text = fold(sig.get("text"))
+        if not _TREATMENT_RE.search(text):
+            return "no_treatment_terms"
+
+        has_intent = _INTENT_RE.search(text) is not None
+        commercial = len(_COMMERCIAL_RE.findall(text)) + len(_PHONE_RE.findall(text))
+        if sig.get("source") == "google_web" and urlparse(sig.get("url") or "").path in ("", "/"):
+            commercial += 2  # home page de site: institucional por definição
+        if commercial >= 2 and not has_intent:
+            return "commercial_page"
+
+        if self.local_model is not None:
+            try:
+                if self.local_model(sig.get("text") or "") < self.min_probability:
+                    return "local_model"
+            except Exception as e:
+                # Falha do modelo local nunca descarta um sinal: segue para o LLM
+                self.logger.error(f"Erro no modelo local do pré-filtro: {e}")
+        return None
+
+    @staticmethod
+    def llm_calls(sig: Dict[str, Any]) -> int:
+        """Chamadas ao LLM que o sinal custaria: classificação + visão (se houver imagem)."""
+        return 1 + (1 if sig.get("author_image") else 0)
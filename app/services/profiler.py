@@ -0,0 +1,248 @@
+import gzip
+import heapq
+import itertools
+import json
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+from app.core.config import settings
+from app.models.models import MissionProfile
+
+logger = logging.getLogger(__name__)
+
+# Trilhas do timeline; cada chave (query, sinal, lote) ganha uma linha (tid) livre dentro da faixa da trilha
+TRACK_TIDS = {"pipeline": 1, "write": 50, "fetch": 100, "batch": 500, "signal": 1000}
+TRACK_LABELS = {"pipeline": "estágio", "write": "gravação", "fetch": "busca", "batch": "lote LLM", "signal": "sinal"}
+# Spans "envelope" do sinal: não entram no caminho crítico (os filhos, sim)
+SIGNAL_WRAPPERS = ("signal", "in_slot")
+
+class MissionProfiler:
+    """
+    Timeline de uma missão: spans por estágio e por sinal (busca, espera por vaga,
+    rate limit, classificação, visão, score, gravação), exportados no formato
+    trace-event do Chrome (chrome://tracing, Perfetto) com um resumo de caminho
+    crítico e utilização da concorrência em "otherData".
+
+    Registrar um span custa um perf_counter e um append; acima de `max_spans` os
+    spans são descartados (e contados) para limitar a memória de missões enormes.
+    """
+    def __init__(self, max_spans: int = None):
+        self.max_spans = max_spans or settings.MISSION_PROFILE_MAX_SPANS
+        self.started_at = time.time()
+        self.origin = time.perf_counter()
+        self.finished: Optional[float] = None
+        self.capacity: Dict[str, int] = {}  # vagas por trilha (ex.: {"signal": LLM_MAX_CONCURRENCY})
+        self.spans: List[tuple] = []  # (name, track, key, start, end, args)
+        self.marks: List[tuple] = []  # (name, track, key, t, args)
+        self.dropped = 0
+        self._ids = itertools.count(1)
+
+    def signal_id(self, sig: Dict[str, Any]) -> int:
+        if "_trace_id" not in sig:
+            sig["_trace_id"] = next(self._ids)
+        return sig["_trace_id"]
+
+    def add(self, name: str, track: str, start: float, end: float = None, key: Any = None, **args):
+        if len(self.spans) >= self.max_spans:
+            self.dropped += 1
+            return
+        self.spans.append((name, track, key, start, end if end is not None else time.perf_counter(), args))
+
+    def mark(self, name: str, track: str, key: Any = None, **args):
+        if len(self.marks) < self.max_spans:
+            self.marks.append((name, track, key, time.perf_counter(), args))
+
+    @contextmanager
+    def span(self, name: str, track: str, key: Any = None, **args):
+        start = time.perf_counter()
+        try:
+            yield args  # quem chama pode completar os args (ex.: número de resultados)
+        finally:
+            self.add(name, track, start, key=key, **args)
+
+    def finish(self):
+        self.finished = time.perf_counter()
+
+    @property
+    def end(self) -> float:
+        if self.finished is not None:
+            return self.finished
+        return max([span[4] for span in self.spans], default=self.origin)
+
+    def _us(self, t: float) -> float:
+        return round((t - self.origin) * 1e6, 1)
+
+    def _ms(self, seconds: float) -> float:
+        return round(seconds * 1000, 2)
+
+    def _lanes(self) -> Dict[tuple, int]:
+        """Uma linha por chave; chaves que se sobrepõem no tempo vão para linhas diferentes."""
+        extents: Dict[tuple, List[float]] = {}
+        for i, (name, track, key, start, end, _) in enumerate(self.spans):
+            group = (track, key if key is not None else ("span", i))
+            extent = extents.setdefault(group, [start, end])
+            extent[0], extent[1] = min(extent[0], start), max(extent[1], end)
+
+        lanes, free, busy, next_lane = {}, {}, {}, {}
+        for group, (start, end) in sorted(extents.items(), key=lambda item: item[1][0]):
+            track = group[0]
+            heap, pool = busy.setdefault(track, []), free.setdefault(track, [])
+            while heap and heap[0][0] <= start:
+                heapq.heappush(pool, heapq.heappop(heap)[1])
+            if pool:
+                lane = heapq.heappop(pool)
+            else:
+                lane = next_lane.get(track, 0)
+                next_lane[track] = lane + 1
+            heapq.heappush(heap, (end, lane))
+            lanes[group] = TRACK_TIDS[track] + lane
+        return lanes
+
+    def to_chrome_trace(self, mission_id: str = None) -> Dict[str, Any]:
+        lanes = self._lanes()
+        events, tids = [], set()
+        for i, (name, track, key, start, end, args) in enumerate(self.spans):
+            tid = lanes[(track, key if key is not None else ("span", i))]
+            tids.add((tid, track))
+            events.append({
+                "name": name, "cat": track, "ph": "X", "pid": 1, "tid": tid,
+                "ts": self._us(start), "dur": round((end - start) * 1e6, 1),
+                "args": {**args, "key": key} if key is not None else args
+            })
+        for name, track, key, t, args in self.marks:
+            events.append({"name": name, "cat": track, "ph": "i", "s": "p", "pid": 1, "ts": self._us(t),
+                           "args": {**args, "key": key}})
+        for counter, (track, name) in {"llm_slots_in_use": ("signal", "in_slot"),
+                                       "serper_in_flight": ("fetch", "serper_request")}.items():
+            for t, value in self._occupancy(track, name):
+                events.append({"name": counter, "ph": "C", "pid": 1, "ts": self._us(t), "args": {"in_use": value}})
+
+        events.append({"name": "process_name", "ph": "M", "pid": 1, "args": {"name": f"missão {mission_id or ''}".strip()}})
+        for tid, track in sorted(tids):
+            events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": tid,
+                           "args": {"name": f"{TRACK_LABELS[track]} {tid - TRACK_TIDS[track] + 1}"}})
+            events.append({"name": "thread_sort_index", "ph": "M", "pid": 1, "tid": tid, "args": {"sort_index": tid}})
+        return {"traceEvents": events, "displayTimeUnit": "ms", "otherData": self.summary(mission_id)}
+
+    def _occupancy(self, track: str, name: str) -> List[tuple]:
+        """(instante, spans abertos) a cada início/fim de span `name` da trilha."""
+        changes = sorted(
+            [(s[3], 1) for s in self.spans if s[1] == track and s[0] == name]
+            + [(s[4], -1) for s in self.spans if s[1] == track and s[0] == name]
+        )
+        points, current = [], 0
+        for t, delta in changes:
+            current += delta
+            points.append((t, current))
+        return points
+
+    def summary(self, mission_id: str = None) -> Dict[str, Any]:
+        stage_ms: Dict[str, float] = {}
+        for name, track, _, start, end, _ in self.spans:
+            if name not in SIGNAL_WRAPPERS:
+                stage_ms[name] = stage_ms.get(name, 0.0) + (end - start)
+        critical_path = self.critical_path()
+        critical_ms: Dict[str, float] = {}
+        for segment in critical_path:
+            critical_ms[segment["stage"]] = round(critical_ms.get(segment["stage"], 0.0) + segment["dur_ms"], 2)
+        return {
+            "mission_id": mission_id,
+            "started_at": self.started_at,
+            "wall_ms": self._ms(self.end - self.origin),
+            "spans": len(self.spans),
+            "dropped_spans": self.dropped,
+            "signals": len({s[2] for s in self.spans if s[1] == "signal"}),
+            "stage_ms": {name: self._ms(total) for name, total in sorted(stage_ms.items(), key=lambda i: -i[1])},
+            "critical_path": critical_path,
+            "critical_path_ms": dict(sorted(critical_ms.items(), key=lambda i: -i[1])),
+            "utilization": self.utilization(),
+        }
+
+    def critical_path(self) -> List[Dict[str, Any]]:
+        """
+        Cadeia que determinou o fim da missão: o último lote gravado, o sinal desse lote
+        que terminou a análise por último, as etapas desse sinal e a busca que o trouxe.
+        Intervalos sem span viram segmentos de espera (inicialização, fila, lote, finalização).
+        """
+        by_signal: Dict[Any, List[tuple]] = {}
+        for span in self.spans:
+            if span[1] == "signal":
+                by_signal.setdefault(span[2], []).append(span)
+        if not by_signal:
+            return []
+        signal_end = {key: max(s[4] for s in spans) for key, spans in by_signal.items()}
+
+        writes = [s for s in self.spans if s[1] == "write"]
+        last_write = max(writes, key=lambda s: s[4]) if writes else None
+        candidates = [k for k in (last_write[5].get("signals") or [] if last_write else []) if k in signal_end]
+        key = max(candidates or signal_end, key=lambda k: signal_end[k])
+
+        chain = []
+        fetched = next((m for m in self.marks if m[0] == "fetched" and m[2] == key), None)
+        query = fetched[4].get("query") if fetched else None
+        fetch_span = next((s for s in self.spans if s[1] == "fetch" and s[0] == "serper_query" and s[2] == query), None)
+        if fetch_span is not None:
+            chain.append(("serper_query", "fetch", fetch_span[3], fetch_span[4], {"query": query}))
+        chain += [(s[0], s[0], s[3], s[4], {}) for s in sorted(by_signal[key], key=lambda s: s[3]) if s[0] not in SIGNAL_WRAPPERS]
+        if last_write is not None and key in (last_write[5].get("signals") or []):
+            chain.append(("db_write", "db_write", last_write[3], last_write[4], {"leads": last_write[5].get("leads")}))
+
+        path, cursor = [], self.origin
+        for name, stage, start, end, args in chain:
+            if start < cursor:  # sobreposição (ex.: busca ainda aberta quando o sinal já foi publicado)
+                start = cursor
+            if start - cursor > 0.0005:
+                gap = "startup" if cursor == self.origin else "batch_wait" if name == "db_write" else "queue"
+                path.append(self._segment("wait", gap, cursor, start, key))
+            if end > start:
+                path.append(self._segment(name, stage, start, end, key, **args))
+                cursor = end
+        if self.end - cursor > 0.0005:
+            path.append(self._segment("wait", "finalize", cursor, self.end, key))
+        return path
+
+    def _segment(self, name: str, stage: str, start: float, end: float, key: Any, **args) -> Dict[str, Any]:
+        return {"name": name, "stage": stage, "signal": key, "start_ms": self._ms(start - self.origin),
+                "dur_ms": self._ms(end - start), **args}
+
+    def utilization(self) -> Dict[str, Any]:
+        """Ocupação média e pico das vagas de LLM e do Serper; fração do tempo com o writer ocupado."""
+        result = {}
+        for label, track, name in (("llm", "signal", "in_slot"), ("serper", "fetch", "serper_request")):
+            intervals = [(s[3], s[4]) for s in self.spans if s[1] == track and s[0] == name]
+            if not intervals:
+                continue
+            window = max(e for _, e in intervals) - min(s for s, _ in intervals)
+            busy = sum(e - s for s, e in intervals)
+            capacity = self.capacity.get(track)
+            avg = busy / window if window > 0 else 0.0
+            result[label] = {
+                "capacity": capacity,
+                "peak_in_use": max((v for _, v in self._occupancy(track, name)), default=0),
+                "avg_in_use": round(avg, 2),
+                "utilization": round(avg / capacity, 3) if capacity else None,
+                "window_ms": self._ms(window),
+            }
+        writes = [s for s in self.spans if s[1] == "write"]
+        wall = self.end - self.origin
+        if writes and wall > 0:
+            busy = sum(s[4] - s[3] for s in writes)
+            result["db_writer"] = {"batches": len(writes), "busy_ms": self._ms(busy), "utilization": round(busy / wall, 3)}
+        return result
+
+def save_profile(session_factory, mission_id: str, profiler: MissionProfiler) -> Dict[str, Any]:
+    """Grava o trace (JSON comprimido) e o resumo em mission_profiles; devolve o resumo."""
+    if profiler.finished is None:
+        profiler.finish()
+    trace = profiler.to_chrome_trace(mission_id)
+    blob = gzip.compress(json.dumps(trace, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8"))
+    db = session_factory()
+    try:
+        db.merge(MissionProfile(mission_id=mission_id, summary=trace["otherData"], trace=blob))
+        db.commit()
+    finally:
+        db.close()
+    critical = ", ".join(f"{stage} {ms:.0f}ms" for stage, ms in list(trace["otherData"]["critical_path_ms"].items())[:4])
+    logger.info(f"Perfil da missão {mission_id}: {trace['otherData']['wall_ms']:.0f}ms; caminho crítico: {critical or '-'}")
+    return trace["otherData"]
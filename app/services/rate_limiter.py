@@ -0,0 +1,36 @@
+import asyncio
+import time
+from typing import Dict, Optional
+from app.core.config import settings
+
+class RateLimiter:
+    """
+    Limitador de taxa por provedor (GCRA / token bucket sem locks).
+    `rate` é dado em requisições por segundo; 0 desativa o limite.
+    Não guarda estado atrelado ao event loop, então pode ser reutilizado
+    entre várias chamadas de asyncio.run (ex: Streamlit).
+    """
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self._next_slot = 0.0
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        interval = 1.0 / self.rate
+        now = time.monotonic()
+        # Permite rajadas de até `burst` requisições antes de espaçar as chamadas
+        slot = max(now - (self.burst - 1) * interval, self._next_slot)
+        self._next_slot = slot + interval
+        delay = slot - now
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+_limiters: Dict[str, RateLimiter] = {}
+
+def get_rate_limiter(provider: str) -> RateLimiter:
+    """Retorna o limitador compartilhado do provedor (configurado em LLM_RATE_LIMITS)."""
+    if provider not in _limiters:
+        _limiters[provider] = RateLimiter(settings.LLM_RATE_LIMITS.get(provider, 0.0))
+    return _limiters[provider]
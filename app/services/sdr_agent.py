@@ -1,15 +1,23 @@
 import logging
 from typing import Dict, Any, List
-from app.services.engine import IntentEngine
 
 class SDRAgent:
     """
     Componente H: Agente SDR (Sales Development Representative)
     Responsável pela triagem técnica e preparação para o agendamento na Clínica Médica Mais.
     """
-    def __init__(self):
+    def __init__(self, engine: "IntentEngine" = None):
         self.logger = logging.getLogger(__name__)
-        self.engine = IntentEngine()
+        self._engine = engine
+
+    @property
+    def engine(self) -> "IntentEngine":
+        # Criado sob demanda: o fluxo de triagem é por regras e não precisa do LLM. Importado aqui para
+        # que montar artefatos (gravação de leads, migrações) não carregue os clientes LLM
+        if self._engine is None:
+            from app.services.engine import IntentEngine
+            self._engine = IntentEngine()
+        return self._engine
         
     def generate_triage_flow(self, lead_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -0,0 +1,30 @@
+import asyncio
+import os
+import socket
+from celery import Celery
+from celery.signals import worker_process_init
+from app.core.config import settings
+from app.db.session import engine
+from app.services.jobs import execute_job
+
+# Fila de missões: Redis em produção; em testes/dev basta um broker SQLite embutido
+# (JOB_BROKER_URL=sqla+sqlite:///./jobs_broker.db).
+# Workers: celery -A app.worker worker --concurrency 4
+celery_app = Celery("agente_captacao", broker=settings.JOB_BROKER_URL)
+celery_app.conf.update(
+    task_ignore_result=True,  # Estado e progresso ficam na tabela mission_jobs
+    task_acks_late=True,  # Missão só sai da fila após terminar: sobrevive a restart do worker
+    task_reject_on_worker_lost=True,
+    worker_prefetch_multiplier=1,
+    worker_concurrency=settings.JOB_WORKER_CONCURRENCY,
+    broker_connection_retry_on_startup=True
+)
+
+@worker_process_init.connect
+def _reset_db_pool(**kwargs):
+    # Processos filhos (prefork) não podem reusar conexões do pool herdadas do processo pai
+    engine.dispose(close=False)
+
+@celery_app.task(name="missions.run")
+def run_mission_job(job_id: str):
+    asyncio.run(execute_job(job_id, worker=f"{socket.gethostname()}:{os.getpid()}"))
@@ -1,9 +1,8 @@
 import streamlit as st
 import pandas as pd
 from sqlalchemy.orm import Session
-from app.db.session import SessionLocal
-from app.models.models import Lead, SourceItem
-from app.services.composer import OutreachComposer
+from app.db.session import ReadSessionLocal
+from app.services.dashboard_data import get_summary, get_lead_page, DASHBOARD_PAGE_SIZE
 from st_annotated_text import annotated_text
 import json
 
@@ -46,21 +45,16 @@ st.markdown("""
 st.title("💎 Elite Leads Hub")
 st.subheader("Painel de Inteligência e Captação - Clínica Médica Mais")
 
-# Funções de Dados
-def get_leads():
-    db = SessionLocal()
-    try:
-        leads = db.query(Lead).order_by(Lead.scores['lead_score'].desc()).all()
-        return leads
-    finally:
-        db.close()
+# Funções de Dados (consultas constantes por render: resumo + uma página com JOIN)
+def load_summary():
+    with ReadSessionLocal() as db:
+        return get_summary(db)
 
-def get_source_item(item_id):
-    db = SessionLocal()
-    try:
-        return db.query(SourceItem).filter(SourceItem.id == item_id).first()
-    finally:
-        db.close()
+@st.cache_data(show_spinner=False)
+def load_lead_page(data_version, page, page_size=DASHBOARD_PAGE_SIZE):
+    # data_version só compõe a chave do cache: muda quando uma missão grava novos leads
+    with ReadSessionLocal() as db:
+        return get_lead_page(db, page, page_size)
 
 # Sidebar
 st.sidebar.image("https://clinicamais.club/wp-content/uploads/2021/04/logo-clinica-mais.png", width=200)
@@ -72,6 +66,7 @@ if st.sidebar.button("🚀 Iniciar Nova Captura"):
         import asyncio
         from mission_capture_elite import run_capture_mission
         asyncio.run(run_capture_mission())
+    st.cache_data.clear()
     st.sidebar.success("Missão concluída!")
     st.rerun()
 
@@ -79,24 +74,27 @@ st.sidebar.divider()
 st.sidebar.info("Este dashboard prioriza leads de Alto Ticket (Tier 1) na região da Grande São Paulo.")
 
 # Carregar Leads
-leads = get_leads()
+summary = load_summary()
 
-if not leads:
+if not summary["total_leads"]:
     st.warning("Nenhum lead capturado ainda. Clique em 'Iniciar Nova Captura' na barra lateral.")
 else:
     # Métricas Rápidas
     col1, col2, col3 = st.columns(3)
-    col1.metric("Total de Leads", len(leads))
-    col2.metric("VIPs (Score > 30)", len([l for l in leads if l.scores.get('lead_score', 0) > 30]))
+    col1.metric("Total de Leads", summary["total_leads"])
+    col2.metric("VIPs (Score > 30)", summary["vip_leads"])
     col3.metric("Região SP", "100%", delta="Grande SP")
 
+    total_pages = -(-summary["total_leads"] // DASHBOARD_PAGE_SIZE)
+    page = st.sidebar.number_input("Página de leads", min_value=1, max_value=total_pages, value=1)
+    leads = load_lead_page(summary["version"], page)
+
     st.divider()
 
     # Listagem de Leads
     for lead in leads:
-        source_item = get_source_item(lead.source_item_id)
-        score = lead.scores.get('lead_score', 0)
-        is_vip = score > 30
+        score = lead['lead_score']
+        is_vip = lead['is_vip']
         
         with st.container():
             # Card do Lead
@@ -104,7 +102,7 @@ else:
             
             with cols[0]:
                 # Imagem ou Placeholder
-                img_url = source_item.raw_metadata.get('author_image') if source_item and source_item.raw_metadata else None
+                img_url = lead['author_image']
                 if img_url:
                     st.image(img_url, width=120)
                 else:
@@ -113,37 +111,30 @@ else:
             with cols[1]:
                 # Cabeçalho do Lead
                 status_label = "💎 VIP ELITE" if is_vip else "✅ QUALIFICADO"
-                st.markdown(f"### {source_item.author_handle if source_item else 'Anônimo'} | <span class='vip-badge'>{status_label}</span>", unsafe_allow_html=True)
+                st.markdown(f"### {lead['author_handle'] or 'Anônimo'} | <span class='vip-badge'>{status_label}</span>", unsafe_allow_html=True)
                 
                 # Texto do Lead
-                st.write(f"💬 *\"{source_item.text if source_item else ''}\"*")
+                st.write(f"💬 *\"{lead['text'] or ''}\"*")
                 
                 # Tags e Sinais
-                tags = lead.labels.get('visual_profile', [])
+                tags = lead['labels'].get('visual_profile', [])
                 if tags:
                     annotated_text(*[(tag, "", "#0068c9") for tag in tags])
                 
                 # Justificativa IA
                 with st.expander("🔍 Ver Perícia Detalhada"):
-                    st.write(f"**Justificativa Visual:** {lead.scores.get('visual_justification', 'N/A')}")
-                    st.write(f"**Sinais Subliminares:** {', '.join(lead.scores.get('subliminal_signals', [])) if isinstance(lead.scores.get('subliminal_signals'), list) else 'N/A'}")
-                    st.write(f"**Localização Detectada:** {lead.scores.get('detected_location', 'Grande São Paulo')}")
+                    st.write(f"**Justificativa Visual:** {lead['scores'].get('visual_justification', 'N/A')}")
+                    st.write(f"**Sinais Subliminares:** {', '.join(lead['scores'].get('subliminal_signals', [])) if isinstance(lead['scores'].get('subliminal_signals'), list) else 'N/A'}")
+                    st.write(f"**Localização Detectada:** {lead['scores'].get('detected_location', 'Grande São Paulo')}")
 
             with cols[2]:
                 # Score e Ações
                 st.metric("Lead Score", f"{score:.1f}")
                 
-                # Gerar Abordagem
-                composer = OutreachComposer()
-                # Simular contexto para o composer
-                context = {
-                    "pain_point": lead.labels.get('pain_point'),
-                    "intent_stage": lead.labels.get('intent_stage'),
-                    "author_handle": source_item.author_handle if source_item else "Cliente"
-                }
-                outreach = composer.compose_messages(context)
+                # Abordagem pré-calculada ao salvar o lead (OutreachDraft)
+                outreach = lead['outreach']
                 
-                if st.button("📱 Gerar Abordagem WhatsApp", key=f"btn_{lead.id}"):
+                if st.button("📱 Gerar Abordagem WhatsApp", key=f"btn_{lead['id']}"):
                     st.code(outreach['messages'][0], language="text")
                     st.caption("Perguntas de triagem sugeridas:")
                     for q in outreach['triage_questions']:
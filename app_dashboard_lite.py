@@ -1,9 +1,8 @@
 import streamlit as st
 import pandas as pd
 from sqlalchemy.orm import Session
-from app.db.session import SessionLocal
-from app.models.models import Lead, SourceItem
-from app.services.composer import OutreachComposer
+from app.db.session import ReadSessionLocal
+from app.services.dashboard_data import get_summary, get_lead_page, DASHBOARD_PAGE_SIZE
 import json
 
 # Page Config
@@ -27,20 +26,15 @@ st.markdown("""
 st.title("💎 Elite Leads Hub (Lite)")
 st.subheader("Intelligence & Capture Panel - Clínica Médica Mais")
 
-def get_leads():
-    db = SessionLocal()
-    try:
-        leads = db.query(Lead).order_by(Lead.scores['lead_score'].desc()).all()
-        return leads
-    finally:
-        db.close()
+def load_summary():
+    with ReadSessionLocal() as db:
+        return get_summary(db)
 
-def get_source_item(item_id):
-    db = SessionLocal()
-    try:
-        return db.query(SourceItem).filter(SourceItem.id == item_id).first()
-    finally:
-        db.close()
+@st.cache_data(show_spinner=False)
+def load_lead_page(data_version, page, page_size=DASHBOARD_PAGE_SIZE):
+    # data_version only keys the cache: it changes whenever a mission saves new leads
+    with ReadSessionLocal() as db:
+        return get_lead_page(db, page, page_size)
 
 # Sidebar
 st.sidebar.header("⚙️ Mission Control")
@@ -50,74 +44,69 @@ if st.sidebar.button("🚀 Start Capture Mission"):
         import asyncio
         from mission_capture_elite import run_capture_mission
         asyncio.run(run_capture_mission())
+    st.cache_data.clear()
     st.sidebar.success("Mission completed!")
     st.rerun()
 
-leads = get_leads()
+summary = load_summary()
 
-if not leads:
+if not summary["total_leads"]:
     st.warning("No leads captured yet. Click 'Start Capture Mission'.")
 else:
     col1, col2, col3 = st.columns(3)
-    col1.metric("Total Leads", len(leads))
-    col2.metric("VIPs", len([l for l in leads if l.scores.get('lead_score', 0) > 30]))
+    col1.metric("Total Leads", summary["total_leads"])
+    col2.metric("VIPs", summary["vip_leads"])
     
-    # Calcular Pipeline Total (Passo 4)
-    from app.services.roi_engine import ROIEngine
-    roi = ROIEngine()
-    total_pipeline = sum([roi.estimate_revenue({"labels": l.labels})['estimated_value'] for l in leads])
+    # Pipeline Total (Passo 4): soma de estimated_revenue mantida em lead_stats
+    total_pipeline = summary["revenue_sum"]
     col3.metric("Pipeline Potencial", f"R$ {total_pipeline:,.2f}")
 
+    total_pages = -(-summary["total_leads"] // DASHBOARD_PAGE_SIZE)
+    page = st.sidebar.number_input("Leads page", min_value=1, max_value=total_pages, value=1)
+    leads = load_lead_page(summary["version"], page)
+
     st.divider()
 
     for lead in leads:
-        source_item = get_source_item(lead.source_item_id)
-        score = lead.scores.get('lead_score', 0)
-        is_vip = score > 30
-        
-        # Estimar Revenue por Lead
-        rev_data = roi.estimate_revenue({"labels": lead.labels})
+        score = lead['lead_score']
+        is_vip = lead['is_vip']
+        # ROI, fluxo SDR e abordagem pré-calculados ao salvar o lead
+        outreach = lead['outreach']
         
         with st.container():
             cols = st.columns([1, 4, 2])
             
             with cols[0]:
-                img_url = source_item.raw_metadata.get('author_image') if source_item and source_item.raw_metadata else None
+                img_url = lead['author_image']
                 if img_url: st.image(img_url, width=120)
                 else: st.markdown("👤 No Image")
             
             with cols[1]:
                 status_label = "💎 VIP ELITE" if is_vip else "✅ QUALIFIED"
-                st.markdown(f"### {source_item.author_handle if source_item else 'Anonymous'} | <span class='vip-badge'>{status_label}</span>", unsafe_allow_html=True)
-                st.write(f"💬 *\"{source_item.text if source_item else ''}\"*")
+                st.markdown(f"### {lead['author_handle'] or 'Anonymous'} | <span class='vip-badge'>{status_label}</span>", unsafe_allow_html=True)
+                st.write(f"💬 *\"{lead['text'] or ''}\"*")
                 
                 # Tags (Lite version without annotated_text)
-                tags = lead.labels.get('visual_profile', [])
+                tags = lead['labels'].get('visual_profile', [])
                 for tag in tags:
                     st.markdown(f"<span class='tag-lite'>{tag}</span>", unsafe_allow_html=True)
                 
                 with st.expander("🔍 Deep Analysis & SDR Strategy"):
-                    st.write(f"**Visual Justification:** {lead.scores.get('visual_justification', 'N/A')}")
-                    st.write(f"**Subliminal Signals:** {', '.join(lead.scores.get('subliminal_signals', [])) if isinstance(lead.scores.get('subliminal_signals'), list) else 'N/A'}")
+                    st.write(f"**Visual Justification:** {lead['scores'].get('visual_justification', 'N/A')}")
+                    st.write(f"**Subliminal Signals:** {', '.join(lead['scores'].get('subliminal_signals', [])) if isinstance(lead['scores'].get('subliminal_signals'), list) else 'N/A'}")
                     
                     # SDR Strategy (Passo 3)
-                    from app.services.sdr_agent import SDRAgent
-                    sdr = SDRAgent()
-                    flow = sdr.generate_triage_flow({"labels": lead.labels, "scores": lead.scores})
-                    st.info(f"🎯 **SDR Opening:** {flow['opening_statement']}")
+                    st.info(f"🎯 **SDR Opening:** {outreach['opening_statement']}")
                     st.write("**Recommended Triage:**")
-                    for q in flow['triage_questions']:
+                    for q in outreach['triage_questions']:
                         st.write(f"- {q}")
 
             with cols[2]:
                 st.metric("Lead Score", f"{score:.1f}")
-                st.write(f"💰 **Est. Revenue:** R$ {rev_data['estimated_value']:,.2f}")
-                st.caption(f"Ref: {rev_data['service']}")
+                st.write(f"💰 **Est. Revenue:** R$ {lead['estimated_revenue']:,.2f}")
+                st.caption(f"Ref: {lead['revenue_service']}")
                 
-                if st.button("📱 WhatsApp Approach", key=f"btn_{lead.id}"):
-                    composer = OutreachComposer()
-                    context = {"pain_point": lead.labels.get('pain_point'), "intent_stage": lead.labels.get('intent_stage'), "author_handle": source_item.author_handle if source_item else "Client"}
-                    outreach = composer.compose_messages(context)
+                if st.button("📱 WhatsApp Approach", key=f"btn_{lead['id']}"):
                     st.code(outreach['messages'][0], language="text")
 
             st.divider()
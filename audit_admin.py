@@ -0,0 +1,107 @@
+import argparse
+import json
+import logging
+import sys
+from datetime import datetime, timezone
+from sqlalchemy import select, text
+from app.core.config import settings
+from app.db.audit_store import (
+    IMPORT_BATCH_SIZE, OUTBOX_MIN_AGE_SECONDS, AuditStore, import_audit_logs, lead_digest, reconcile_audit_outbox,
+)
+from app.db.session import ReadSessionLocal, engine
+from app.models.models import Lead
+
+EXPORT_LEAD_BATCH = 500
+
+def export(store: AuditStore, args):
+    """JSONL com os registros da faixa; --with-lead junta o estado atual do lead a cada registro."""
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    records = store.scan(since=args.since, until=args.until, lead_from=args.lead_from, lead_to=args.lead_to)
+    count = 0
+    try:
+        batch = []
+        for record in records:
+            batch.append(record)
+            if len(batch) >= EXPORT_LEAD_BATCH:
+                count += _write_batch(out, batch, args.with_lead)
+                batch = []
+        count += _write_batch(out, batch, args.with_lead)
+    finally:
+        if args.output:
+            out.close()
+    print(f"{count} registros exportados", file=sys.stderr)
+
+def _write_batch(out, batch, with_lead: bool) -> int:
+    if with_lead and batch:
+        with ReadSessionLocal() as db:
+            rows = db.execute(
+                select(Lead.id, Lead.scores, Lead.labels, Lead.evidence_snippets)
+                .where(Lead.id.in_({r["lead_id"] for r in batch if r.get("lead_id") is not None}))
+            ).all()
+        leads = {row.id: row for row in rows}
+        for record in batch:
+            lead = leads.get(record.get("lead_id"))
+            if lead is not None:
+                record["lead"] = {"scores": lead.scores, "labels": lead.labels, "evidence_snippets": lead.evidence_snippets}
+                # False = scores/labels/evidências mudaram depois da decisão (ex.: re-score)
+                record["lead_unchanged"] = lead_digest(lead.scores, lead.labels, lead.evidence_snippets) == record["lead_digest"]
+            else:
+                record["lead"] = None
+    for record in batch:
+        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return len(batch)
+
+def main():
+    parser = argparse.ArgumentParser(description="Administração da trilha de auditoria (segmentos em AUDIT_STORE_PATH)")
+    parser.add_argument("--path", default=settings.AUDIT_STORE_PATH, help="diretório dos segmentos")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="exporta uma faixa de registros em JSONL (compliance)")
+    export_parser.add_argument("--since", type=datetime.fromisoformat, help="início (ISO 8601, UTC se sem fuso), inclusivo")
+    export_parser.add_argument("--until", type=datetime.fromisoformat, help="fim (ISO 8601, UTC se sem fuso), exclusivo")
+    export_parser.add_argument("--lead-from", type=int)
+    export_parser.add_argument("--lead-to", type=int)
+    export_parser.add_argument("--with-lead", action="store_true", help="inclui scores/labels/evidências atuais do lead")
+    export_parser.add_argument("-o", "--output", help="arquivo de saída (padrão: stdout)")
+
+    retention_parser = commands.add_parser("retention", help="apaga segmentos mais antigos que a retenção")
+    retention_parser.add_argument("--days", type=int, default=settings.AUDIT_RETENTION_DAYS)
+
+    import_parser = commands.add_parser("import-legacy", help="move as linhas de audit_logs para o store")
+    import_parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    import_parser.add_argument("--keep", action="store_true", help="não apaga as linhas migradas da tabela")
+    import_parser.add_argument("--vacuum", action="store_true", help="VACUUM no SQLite ao final (devolve o espaço)")
+
+    reconcile_parser = commands.add_parser("reconcile", help="reenvia ao store os lotes pendentes em audit_outbox")
+    reconcile_parser.add_argument("--min-age", type=float, default=OUTBOX_MIN_AGE_SECONDS,
+                                  help="ignora lotes mais novos (segundos): podem ser de um writer em execução")
+
+    commands.add_parser("segments", help="lista os segmentos e o que cada um cobre")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    store = AuditStore(args.path)
+    if args.command == "export":
+        export(store, args)
+    elif args.command == "retention":
+        removed = store.apply_retention(days=args.days)
+        print(f"{removed['segments']} segmentos apagados ({removed['records']} registros, {removed['bytes']} bytes)")
+    elif args.command == "import-legacy":
+        moved = import_audit_logs(engine, store, batch_size=args.batch_size, delete_rows=not args.keep)
+        print(f"{moved} registros de audit_logs movidos para {args.path}")
+        if args.vacuum and engine.dialect.name == "sqlite":
+            with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                conn.execute(text("VACUUM"))
+    elif args.command == "reconcile":
+        totals = reconcile_audit_outbox(engine, store, min_age_seconds=args.min_age)
+        print(f"{totals['batches']} lotes da outbox: {totals['records']} registros gravados, "
+              f"{totals['skipped']} já estavam no store")
+    else:
+        for segment in store.segments():
+            first = datetime.fromtimestamp(segment["first_ts"], timezone.utc).isoformat(timespec="seconds")
+            last = datetime.fromtimestamp(segment["last_ts"], timezone.utc).isoformat(timespec="seconds")
+            print(f"{segment['name']}: {segment['records']} registros, {segment['bytes']} bytes, "
+                  f"leads {segment['min_lead_id']}-{segment['max_lead_id']}, {first} -> {last}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Bytes de auditoria por lead: linha em audit_logs com o payload completo (antes) contra
+o registro compacto nos segmentos gzip do AuditStore (depois). Os registros saem de
+SignalsCollector._build_record com análises sintéticas do StubResponder.
+
+    python benchmark_audit.py [N]
+"""
+import os
+import random
+import string
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from app.core.config import settings
+from app.db.audit_store import AuditStore
+from app.db.batch_writer import LeadBatchWriter
+from app.models.models import Base
+from app.services.collector import SignalsCollector
+from app.services.engine import PROMPT_VERSION, LeadScorer
+from benchmark_llm_offline import make_signals
+from stub_llm_server import StubResponder
+
+N_LEADS = 20_000
+
+def make_records(n: int):
+    stub, rng = StubResponder(), random.Random(0)
+    collector = SimpleNamespace(engine=SimpleNamespace(model_name=settings.LLM_MODEL, prompt_version=PROMPT_VERSION))
+    records = []
+    for sig in make_signals(n, image_ratio=1.0):
+        classification = stub._classification(sig["text"])
+        vision = stub._vision(sig["author_image"])
+        # Justificativas reais do modelo de visão têm ~300 caracteres de texto livre
+        justification = " ".join("".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 9))) for _ in range(45))
+        visual_data = {"visual_fit": vision["visual_fit"], "attributes": vision["detected_luxury_indicators"],
+                       "justification": justification, "tier": vision["socioeconomic_tier"]}
+        final_scores = classification["scores"]
+        final_scores["visual_fit"] = visual_data["visual_fit"]
+        final_scores["visual_justification"] = justification
+        final_scores["lead_score"] = LeadScorer().calculate_score(final_scores)
+        analysis = {"classification": classification, "visual_data": visual_data, "final_scores": final_scores}
+        records.append(SignalsCollector._build_record(collector, sig, analysis, clinic_id=1))
+    return records
+
+def table_bytes(engine, prefix: str) -> int:
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT COALESCE(SUM(pgsize), 0) FROM dbstat WHERE name = :t OR name LIKE :i"),
+                            {"t": prefix, "i": f"ix_{prefix}%"}).scalar()
+
+def run(records, use_store: bool):
+    workdir = tempfile.mkdtemp(prefix="bench_audit_")
+    db_path = os.path.join(workdir, "bench.db")
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    store = AuditStore(os.path.join(workdir, "audit")) if use_store else None
+
+    original = settings.AUDIT_STORE_ENABLED
+    settings.AUDIT_STORE_ENABLED = use_store
+    try:
+        start = time.perf_counter()
+        writer = LeadBatchWriter(factory, audit_store=store)
+        for r in records:
+            writer.add(r)
+        writer.close()
+        elapsed = time.perf_counter() - start
+    finally:
+        settings.AUDIT_STORE_ENABLED = original
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM"))
+    report = {"write_s": elapsed, "db_bytes": os.path.getsize(db_path), "audit_table": table_bytes(engine, "audit_logs")}
+    if store is not None:
+        report["store_bytes"] = sum(os.path.getsize(os.path.join(store.path, f)) for f in os.listdir(store.path))
+        report["segments"] = len(store.segments())
+        start = time.perf_counter()
+        report["range_hits"] = sum(1 for _ in store.scan(lead_from=len(records) // 2, lead_to=len(records) // 2 + 99))
+        report["range_ms"] = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        report["full_scan"] = sum(1 for _ in store.scan())
+        report["full_scan_s"] = time.perf_counter() - start
+    engine.dispose()
+    return report
+
+def benchmark_audit(n_leads: int = N_LEADS):
+    print(f"=== AUDITORIA POR LEAD ({n_leads} leads) ===")
+    records = make_records(n_leads)
+    before, after = run(records, use_store=False), run(records, use_store=True)
+    audit_before = before["audit_table"] / n_leads
+    audit_after = (after["audit_table"] + after["store_bytes"]) / n_leads
+    print(f"Antes  (audit_logs):     {audit_before:,.0f} bytes/lead de auditoria; banco {before['db_bytes'] / 1e6:.1f} MB; "
+          f"gravação {before['write_s']:.2f}s")
+    print(f"Depois (segmentos gzip): {audit_after:,.0f} bytes/lead de auditoria ({after['segments']} segmentos); "
+          f"banco {after['db_bytes'] / 1e6:.1f} MB; gravação {after['write_s']:.2f}s")
+    print(f"Redução: {audit_before / audit_after:.1f}x na auditoria; banco principal "
+          f"{(before['db_bytes'] - after['db_bytes']) / 1e6:.1f} MB menor")
+    print(f"Consulta de 100 leads por faixa: {after['range_hits']} registros em {after['range_ms']:.1f}ms; "
+          f"varredura completa: {after['full_scan']} registros em {after['full_scan_s']:.2f}s")
+
+if __name__ == "__main__":
+    benchmark_audit(int(sys.argv[1]) if len(sys.argv) > 1 else N_LEADS)
@@ -0,0 +1,69 @@
+import os
+import sys
+import tempfile
+import time
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from app.db.batch_writer import LeadBatchWriter
+from app.models.models import Base, Lead, SourceItem
+from app.services.dashboard_data import get_summary, get_lead_page
+from app.services.lead_artifacts import build_lead_artifacts
+from app.services.roi_engine import ROIEngine
+from app.services.sdr_agent import SDRAgent
+from benchmark_writes import make_record
+
+N_LEADS = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+
+def render_before(factory):
+    """Render antigo do app_dashboard_lite: leads + 1 consulta/sessão por SourceItem, ROI 2x e SDRAgent por card."""
+    db = factory()
+    try:
+        leads = db.query(Lead).order_by(Lead.lead_score.desc()).all()
+    finally:
+        db.close()
+    roi = ROIEngine()
+    sum([roi.estimate_revenue({"labels": l.labels})['estimated_value'] for l in leads])
+    for lead in leads:
+        db = factory()
+        try:
+            db.query(SourceItem).filter(SourceItem.id == lead.source_item_id).first()
+        finally:
+            db.close()
+        roi.estimate_revenue({"labels": lead.labels})
+        sdr = SDRAgent()
+        sdr.engine  # o SDRAgent antigo construía um IntentEngine (cliente OpenAI) no __init__
+        sdr.generate_triage_flow({"labels": lead.labels, "scores": lead.scores})
+
+def render_after(factory):
+    with factory() as db:
+        summary = get_summary(db)
+    with factory() as db:
+        get_lead_page(db, page=1, page_size=N_LEADS)
+    return summary["revenue_sum"]
+
+def benchmark_dashboard_render():
+    print(f"=== BENCHMARK DE RENDER DO DASHBOARD ({N_LEADS} leads) ===")
+    db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    writer = LeadBatchWriter(factory)
+    for i in range(N_LEADS):
+        record = make_record(i)
+        artifacts = build_lead_artifacts(record["lead"]["labels"], record["lead"]["scores"], record["source_item"]["author_handle"])
+        record["lead"].update(artifacts["lead"])
+        record["outreach"] = artifacts["outreach"]
+        writer.add(record)
+    writer.close()
+
+    queries = []
+    event.listen(engine, "before_cursor_execute", lambda *args: queries.append(1))
+    for name, render in [("Antes (recalcula por card)", render_before), ("Depois (pré-calculado)", render_after)]:
+        queries.clear()
+        start = time.perf_counter()
+        render(factory)
+        elapsed = time.perf_counter() - start
+        print(f"{name:<28}{elapsed * 1000:>10.1f}ms{len(queries):>8} consultas")
+
+if __name__ == "__main__":
+    benchmark_dashboard_render()
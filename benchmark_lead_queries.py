@@ -0,0 +1,125 @@
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+from app.api.v1.endpoints.stats import get_stats
+from app.db.migrations import run_migrations
+from app.db.session import make_async_engine
+from app.models.models import Lead
+
+N_LEADS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+INSERT_CHUNK = 50_000
+
+LEGACY_SCHEMA = """
+CREATE TABLE leads (
+    id INTEGER NOT NULL PRIMARY KEY, source_item_id INTEGER, clinic_id INTEGER,
+    scores JSON, labels JSON, evidence_snippets JSON, status VARCHAR,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+QUERIES = {
+    "Top 50 por score": (
+        "SELECT id FROM leads ORDER BY json_extract(scores, '$.lead_score') DESC LIMIT 50",
+        "SELECT id FROM leads ORDER BY lead_score DESC LIMIT 50"
+    ),
+    "Top 50 pendentes": (
+        "SELECT id FROM leads WHERE status = 'pending' ORDER BY json_extract(scores, '$.lead_score') DESC LIMIT 50",
+        "SELECT id FROM leads WHERE status = 'pending' ORDER BY lead_score DESC LIMIT 50"
+    ),
+    "Contagem VIP (> 30)": (
+        "SELECT count(*) FROM leads WHERE json_extract(scores, '$.lead_score') > 30",
+        "SELECT count(*) FROM leads WHERE lead_score > 30"
+    ),
+    "Contagem Gold em SP": (
+        "SELECT count(*) FROM leads WHERE json_extract(labels, '$.tier') = 'Gold' AND json_extract(scores, '$.is_sp_region')",
+        "SELECT count(*) FROM leads WHERE tier = 'Gold' AND is_sp_region = 1"
+    )
+}
+
+def populate_legacy(engine, n: int, evidence_snippets=None):
+    """Banco no schema antigo (scores só em JSON), como os bancos já em produção."""
+    rng = random.Random(42)
+    tiers = ["Standard", "Silver", "Gold", "Platinum"]
+    with engine.begin() as conn:
+        conn.execute(text(LEGACY_SCHEMA))
+    for start in range(0, n, INSERT_CHUNK):
+        rows = [{
+            "source_item_id": i, "clinic_id": 1,
+            "scores": {"fit": rng.randint(0, 100), "lead_score": round(rng.uniform(0, 60), 2), "is_sp_region": rng.random() < 0.8},
+            "labels": {"tier": rng.choice(tiers), "pain_point": "flacidez"},
+            "evidence_snippets": evidence_snippets or [], "status": rng.choice(["pending", "pending", "approved", "rejected"])
+        } for i in range(start, min(start + INSERT_CHUNK, n))]
+        with engine.begin() as conn:
+            conn.execute(Lead.__table__.insert(), rows)
+
+def timed(fn, repeat: int = 3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def legacy_stats(factory):
+    """Caminho antigo do /stats: carrega todos os leads no Python."""
+    db = factory()
+    try:
+        vip = sum(1 for lead in db.query(Lead.scores).all() if (lead.scores or {}).get("lead_score", 0) > 30)
+        return vip
+    finally:
+        db.close()
+
+def benchmark_lead_queries():
+    print(f"=== BENCHMARK DE CONSULTAS DE LEADS ({N_LEADS:,} leads) ===")
+    db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    start = time.perf_counter()
+    populate_legacy(engine, N_LEADS)
+    print(f"Carga (schema antigo): {time.perf_counter() - start:.1f}s")
+
+    json_timings = {}
+    with engine.connect() as conn:
+        for name, (json_sql, _) in QUERIES.items():
+            json_timings[name] = timed(lambda: conn.execute(text(json_sql)).all())
+    json_stats = timed(lambda: legacy_stats(factory), repeat=1)
+
+    start = time.perf_counter()
+    backfilled = run_migrations(engine)
+    print(f"Migração + backfill: {backfilled:,} leads em {time.perf_counter() - start:.1f}s\n")
+
+    print(f"{'Consulta':<24}{'JSON':>12}{'Coluna':>12}{'Ganho':>10}  Plano")
+    with engine.connect() as conn:
+        for name, (json_sql, column_sql) in QUERIES.items():
+            column_time = timed(lambda: conn.execute(text(column_sql)).all())
+            plan = " / ".join(row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {column_sql}")))
+            print(f"{name:<24}{json_timings[name] * 1000:>10.1f}ms{column_time * 1000:>10.1f}ms"
+                  f"{json_timings[name] / column_time:>9.0f}x  {plan}")
+
+    async def timed_new_stats(repeat: int = 3):
+        # get_stats é assíncrono: mede com uma AsyncSession no mesmo banco, num único loop
+        async_engine = make_async_engine(f"sqlite:///{db_path}")
+        async_factory = async_sessionmaker(async_engine, expire_on_commit=False)
+        best = float("inf")
+        try:
+            for _ in range(repeat):
+                start = time.perf_counter()
+                async with async_factory() as session:
+                    stats = await get_stats(session)
+                best = min(best, time.perf_counter() - start)
+        finally:
+            await async_engine.dispose()
+        assert stats["total_leads"] == N_LEADS, stats
+        return best
+    stats_time = asyncio.run(timed_new_stats())
+    print(f"{'/stats':<24}{json_stats * 1000:>10.1f}ms{stats_time * 1000:>10.1f}ms{json_stats / stats_time:>9.0f}x")
+
+if __name__ == "__main__":
+    benchmark_lead_queries()
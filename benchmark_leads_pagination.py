@@ -0,0 +1,102 @@
+import os
+import sys
+import tempfile
+from fastapi import Depends
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from app.api.v1.endpoints.leads import encode_cursor
+from app.db.migrations import run_migrations
+from app.db.session import get_async_read_db, get_db, make_async_engine
+from app.main import app
+from app.models.models import Lead
+from benchmark_lead_queries import populate_legacy, timed
+
+N_LEADS = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+PAGE_SIZE = 100
+EVIDENCE = ["Alguém indica clínica boa de Ultraformer MPT no Itaim? Quero resultado natural..."] * 5
+
+def legacy_read_leads(db: Session = Depends(get_db), skip: int = 0, limit: int = 100):
+    """Implementação anterior de GET /leads: offset/limit, linhas ORM completas e JSON montado em loop."""
+    leads = db.query(Lead).offset(skip).limit(limit).all()
+    result = []
+    for lead in leads:
+        result.append({
+            "id": lead.id,
+            "source_item_id": lead.source_item_id,
+            "clinic_id": lead.clinic_id,
+            "scores": lead.scores or {},
+            "labels": lead.labels or {},
+            "status": lead.status,
+            "created_at": lead.created_at.isoformat() if lead.created_at else None
+        })
+    return JSONResponse(content=result)
+
+def benchmark_leads_pagination():
+    if N_LEADS < 2 * PAGE_SIZE:
+        sys.exit(f"Use pelo menos {2 * PAGE_SIZE} leads (uma página funda além da primeira)")
+    print(f"=== BENCHMARK DE GET /api/v1/leads ({N_LEADS:,} leads, páginas de {PAGE_SIZE}) ===")
+    db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    populate_legacy(engine, N_LEADS, evidence_snippets=EVIDENCE)
+    run_migrations(engine)
+
+    def override_get_db():
+        db = factory()
+        try:
+            yield db
+        finally:
+            db.close()
+    # O endpoint atual lê por sessão assíncrona: aponta-a para o mesmo banco do benchmark
+    async_factory = async_sessionmaker(make_async_engine(f"sqlite:///{db_path}"), expire_on_commit=False)
+
+    async def override_get_async_read_db():
+        async with async_factory() as session:
+            yield session
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_read_db] = override_get_async_read_db
+    # Versão antiga servida pelo mesmo app, para comparar com o mesmo overhead HTTP
+    app.add_api_route("/benchmark/legacy-leads", legacy_read_leads, methods=["GET"])
+    client = TestClient(app)
+
+    # Página funda: 1000, ou a última página cheia em bancos menores
+    deep = min(1000, N_LEADS // PAGE_SIZE)
+    # Cursor da página funda = chave do último lead da anterior (calculado fora da medição)
+    db = factory()
+    last = db.query(Lead.lead_score, Lead.id).order_by(Lead.lead_score.desc(), Lead.id.desc()) \
+        .offset((deep - 1) * PAGE_SIZE - 1).first()
+    page_cursors = {1: None, deep: encode_cursor(last.lead_score, last.id)}
+
+    def legacy(page):
+        return lambda: client.get("/benchmark/legacy-leads", params={"limit": PAGE_SIZE, "skip": (page - 1) * PAGE_SIZE}).json()
+
+    def endpoint(page, **params):
+        def call():
+            query = {"limit": PAGE_SIZE, **params}
+            if page_cursors[page]:
+                query["cursor"] = page_cursors[page]
+            return client.get("/api/v1/leads/", params=query).json()
+        return call
+
+    def endpoint_offset(page):
+        return lambda: client.get("/api/v1/leads/", params={"limit": PAGE_SIZE, "skip": (page - 1) * PAGE_SIZE}).json()
+
+    variants = {
+        "Antes (offset, ORM, sem ordem)": legacy,
+        "Offset ordenado (skip=)": endpoint_offset,
+        "Cursor": endpoint,
+        "Cursor + fields=id,lead_score,tier": lambda page: endpoint(page, fields="id,lead_score,tier"),
+    }
+    print(f"{'Variante':<38}{'Página 1':>12}{f'Página {deep}':>14}")
+    for name, make in variants.items():
+        timings = [timed(make(page), repeat=5) * 1000 for page in (1, deep)]
+        print(f"{name:<38}{timings[0]:>10.1f}ms{timings[1]:>12.1f}ms")
+    db.close()
+    app.dependency_overrides.pop(get_db, None)
+    app.dependency_overrides.pop(get_async_read_db, None)
+
+if __name__ == "__main__":
+    benchmark_leads_pagination()
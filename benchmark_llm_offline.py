@@ -0,0 +1,269 @@
+"""
+Benchmark offline do pipeline de LLM: IntentEngine/VisionEngine reais e SignalsCollector real,
+falando HTTP com um servidor local compatível com /chat/completions da OpenAI.
+
+Modos do servidor:
+- stub (padrão): respostas sintéticas com latência log-normal (--latency-p50/--latency-p95);
+- replay (--fixtures arquivo.jsonl): respostas gravadas, com a latência gravada (× --latency-scale);
+- record (--record arquivo.jsonl): encaminha ao provider real (--upstream) e grava as respostas.
+
+Para cada nível de concorrência roda uma missão "fria" (cache vazio) e uma "quente"
+(fração --overlap dos textos já classificados) e reporta p50/p95/p99 das chamadas ao LLM,
+throughput, tokens por lead e taxa de acerto do cache. Resultados em JSON (--output).
+
+    python benchmark_llm_offline.py --signals 60 --concurrency 1,4,16
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import random
+import string
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+import httpx
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.core.config import settings
+from app.models.models import Base
+from app.services import rate_limiter
+from app.services.cache import ClassificationCache
+from app.services.collector import SignalsCollector
+from app.services.engine import IntentEngine, VisionEngine
+from stub_llm_server import StubLLMServer, StubResponder, request_kind
+
+def fixture_key(body: Dict[str, Any]) -> str:
+    """Chave de uma requisição gravada: modelo + mensagens (muda junto com a versão do prompt)."""
+    raw = json.dumps([body.get("model"), body.get("messages")], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+def percentile(values: List[float], p: float) -> float:
+    """Percentil por posto mais próximo (0 para lista vazia)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+class ReplayResponder:
+    """Reproduz respostas gravadas; requisições sem gravação caem no stub e contam como misses."""
+    def __init__(self, path: str, fallback: StubResponder, latency_scale: float = 1.0):
+        self.fallback = fallback
+        self.latency_scale = latency_scale
+        self.misses = 0
+        self.fixtures = {}
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self.fixtures[entry["key"]] = entry
+
+    def respond(self, body: Dict[str, Any]) -> Tuple[str, Dict[str, int], float]:
+        entry = self.fixtures.get(fixture_key(body))
+        if entry is None:
+            self.misses += 1
+            return self.fallback.respond(body)
+        return entry["content"], entry["usage"], entry["latency"] * self.latency_scale
+
+class RecordingResponder:
+    """Encaminha ao provider real e grava cada resposta (JSONL) para replay posterior."""
+    def __init__(self, path: str, upstream_base_url: str, api_key: str, timeout: float = 60.0):
+        self.path = path
+        self.upstream = upstream_base_url.rstrip("/") + "/chat/completions"
+        self.client = httpx.Client(timeout=timeout, headers={"Authorization": f"Bearer {api_key}"})
+        self._lock = threading.Lock()
+
+    def respond(self, body: Dict[str, Any]) -> Tuple[str, Dict[str, int], float]:
+        start = time.perf_counter()
+        response = self.client.post(self.upstream, json=body)
+        response.raise_for_status()
+        latency = time.perf_counter() - start
+        data = response.json()
+        content = data["choices"][0]["message"]["content"]
+        usage = {k: (data.get("usage") or {}).get(k, 0) for k in ("prompt_tokens", "completion_tokens")}
+        entry = {"key": fixture_key(body), "kind": request_kind(body), "content": content, "usage": usage, "latency": latency}
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        return content, usage, 0.0  # a latência real já foi paga
+
+class TimedIntentEngine(IntentEngine):
+    """IntentEngine real, medindo a latência de cada requisição vista pelo cliente."""
+    def __init__(self, latencies: List[float], **kwargs):
+        super().__init__(**kwargs)
+        self.latencies = latencies
+
+    async def _complete(self, prompt: str, **kwargs) -> Any:
+        start = time.perf_counter()
+        try:
+            return await super()._complete(prompt, **kwargs)
+        finally:
+            self.latencies.append(time.perf_counter() - start)
+
+class TimedVisionEngine(VisionEngine):
+    def __init__(self, latencies: List[float]):
+        super().__init__()
+        self.latencies = latencies
+
+    async def analyze_profile_image(self, image_url: str) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            return await super().analyze_profile_image(image_url)
+        finally:
+            self.latencies.append(time.perf_counter() - start)
+
+def make_signals(n: int, seed: int = 0, image_ratio: float = 0.5, prefix: str = "s") -> List[Dict[str, Any]]:
+    # Textos distintos o suficiente para passar pela deduplicação por MinHash
+    rng = random.Random(seed)
+    signals = []
+    for i in range(n):
+        words = " ".join("".join(rng.choice(string.ascii_lowercase) for _ in range(6)) for _ in range(12))
+        signals.append({
+            "source": "instagram",
+            "url": f"https://www.instagram.com/p/{prefix}{i}",
+            "author_handle": f"@{prefix}_{i}",
+            "author_image": f"https://img.example.com/{prefix}{i}.jpg" if rng.random() < image_ratio else None,
+            "text": f"Quero Ultraformer MPT no Itaim, ref {words}",
+            "timestamp": datetime.now(),
+            "raw_metadata": {}
+        })
+    return signals
+
+def new_session_factory(workdir: str):
+    engine = create_engine(f"sqlite:///{tempfile.mktemp(suffix='.db', dir=workdir)}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def run_mission(server: StubLLMServer, collector: SignalsCollector, signals: List[Dict[str, Any]], concurrency: int,
+                workdir: str, latencies: List[float]) -> Dict[str, Any]:
+    collector.session_factory = new_session_factory(workdir)  # banco novo: a deduplicação não interfere
+    latencies.clear()
+    before = server.snapshot()
+    start = time.perf_counter()
+    results = asyncio.run(collector.process_and_save_signals(signals, max_concurrency=concurrency))
+    elapsed = time.perf_counter() - start
+    after = server.snapshot()
+
+    leads = len(results)
+    tokens = (after["prompt_tokens"] - before["prompt_tokens"]) + (after["completion_tokens"] - before["completion_tokens"])
+    cache = collector.mission_stats.get("cache", {})
+    return {
+        "signals": len(signals),
+        "leads": leads,
+        "elapsed_s": round(elapsed, 4),
+        "throughput_leads_per_s": round(leads / elapsed, 2) if elapsed else 0.0,
+        "llm_requests": after["requests"] - before["requests"],
+        "llm_calls_avoided": collector.mission_stats.get("llm_calls_avoided", 0),
+        "llm_latency_s": {f"p{p}": round(percentile(latencies, p), 4) for p in (50, 95, 99)},
+        "tokens_per_lead": round(tokens / leads, 1) if leads else 0.0,
+        "cache_hit_rate": round(cache.get("hit_rate", 0.0), 4),
+        "cache": {k: cache.get(k, 0) for k in ("hits", "memory_hits", "misses")}
+    }
+
+def run_benchmark(responder, concurrency_levels: List[int], n_signals: int = 60, overlap: float = 0.5,
+                  image_ratio: float = 0.5, batch_mode: bool = False, rate_limit: float = 0.0,
+                  model: str = None, seed: int = 0) -> Dict[str, Any]:
+    """Executa as missões fria/quente por nível de concorrência e devolve o relatório em dict."""
+    model = model or settings.LLM_MODEL
+    workdir = tempfile.mkdtemp(prefix="llm_bench_")
+    overrides = {
+        "LLM_PROVIDER": "openrouter", "OPENROUTER_API_KEY": "offline", "LLM_MODEL": model, "VISION_MODEL": model,
+        "LLM_BATCH_MODE": batch_mode, "LLM_RATE_LIMITS": {**settings.LLM_RATE_LIMITS, "openrouter": rate_limit}
+    }
+    original = {name: getattr(settings, name) for name in [*overrides, "OPENROUTER_BASE_URL"]}
+
+    report = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "config": {"mode": type(responder).__name__, "model": model, "signals": n_signals, "overlap": overlap,
+                   "image_ratio": image_ratio, "batch_mode": batch_mode, "rate_limit": rate_limit, "seed": seed},
+        "levels": []
+    }
+    with StubLLMServer(responder) as server:
+        for name, value in {**overrides, "OPENROUTER_BASE_URL": server.base_url}.items():
+            setattr(settings, name, value)
+        rate_limiter._limiters.clear()
+        try:
+            for concurrency in concurrency_levels:
+                cold_signals = make_signals(n_signals, seed=seed, image_ratio=image_ratio, prefix=f"c{concurrency}_")
+                n_repeat = int(n_signals * overlap)
+                warm_signals = cold_signals[:n_repeat] + make_signals(
+                    n_signals - n_repeat, seed=seed + 1, image_ratio=image_ratio, prefix=f"w{concurrency}_")
+
+                latencies: List[float] = []
+                cache = ClassificationCache(path=os.path.join(workdir, f"cache_{concurrency}.db"))
+                collector = SignalsCollector()
+                collector.engine = TimedIntentEngine(latencies, cache=cache)
+                collector.vision = TimedVisionEngine(latencies)
+
+                level = {"concurrency": concurrency}
+                for phase, signals in (("cold", cold_signals), ("warm", warm_signals)):
+                    level[phase] = run_mission(server, collector, signals, concurrency, workdir, latencies)
+                report["levels"].append(level)
+        finally:
+            for name, value in original.items():
+                setattr(settings, name, value)
+            rate_limiter._limiters.clear()
+    if isinstance(responder, ReplayResponder):
+        report["fixture_misses"] = responder.misses
+    return report
+
+def print_report(report: Dict[str, Any]):
+    config = report["config"]
+    print(f"=== BENCHMARK OFFLINE DE LLM ({config['mode']}, {config['signals']} sinais, overlap {config['overlap']:.0%}) ===")
+    print(f"{'Conc.':>5} {'Fase':<5} {'Leads/s':>9} {'p50':>8} {'p95':>8} {'p99':>8} {'Req.':>6} {'Tok/lead':>9} {'Cache':>7}")
+    for level in report["levels"]:
+        for phase in ("cold", "warm"):
+            r = level[phase]
+            lat = r["llm_latency_s"]
+            print(f"{level['concurrency']:>5} {phase:<5} {r['throughput_leads_per_s']:>9.1f} {lat['p50'] * 1000:>6.0f}ms "
+                  f"{lat['p95'] * 1000:>6.0f}ms {lat['p99'] * 1000:>6.0f}ms {r['llm_requests']:>6} "
+                  f"{r['tokens_per_lead']:>9.0f} {r['cache_hit_rate']:>7.0%}")
+    if "fixture_misses" in report:
+        print(f"Requisições sem gravação (caíram no stub): {report['fixture_misses']}")
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark offline do pipeline de classificação (IntentEngine + SignalsCollector)")
+    parser.add_argument("--signals", type=int, default=60)
+    parser.add_argument("--concurrency", default="1,4,16", help="níveis separados por vírgula")
+    parser.add_argument("--overlap", type=float, default=0.5, help="fração de textos repetidos na missão quente")
+    parser.add_argument("--image-ratio", type=float, default=0.5, help="fração de sinais com imagem (VisionEngine)")
+    parser.add_argument("--latency-p50", type=float, default=0.2)
+    parser.add_argument("--latency-p95", type=float, default=0.6)
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="multiplica a latência gravada no replay")
+    parser.add_argument("--batch", action="store_true", help="ativa LLM_BATCH_MODE")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="req/s do rate limiter (0 = sem limite)")
+    parser.add_argument("--model", default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--fixtures", help="JSONL gravado com --record (modo replay)")
+    parser.add_argument("--record", help="grava as respostas do provider real neste JSONL")
+    parser.add_argument("--upstream", default="openrouter", choices=["openrouter", "openai"])
+    parser.add_argument("--output", default="benchmark_llm_results.json")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    stub = StubResponder(args.latency_p50, args.latency_p95, seed=args.seed)
+    if args.record:
+        base_url, api_key = ((settings.OPENROUTER_BASE_URL, settings.OPENROUTER_API_KEY) if args.upstream == "openrouter"
+                             else ("https://api.openai.com/v1", settings.OPENAI_API_KEY))
+        responder = RecordingResponder(args.record, base_url, api_key)
+    elif args.fixtures:
+        responder = ReplayResponder(args.fixtures, stub, latency_scale=args.latency_scale)
+    else:
+        responder = stub
+
+    report = run_benchmark(
+        responder, [int(c) for c in args.concurrency.split(",")], n_signals=args.signals, overlap=args.overlap,
+        image_ratio=args.image_ratio, batch_mode=args.batch, rate_limit=args.rate_limit, model=args.model, seed=args.seed
+    )
+    print_report(report)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"Resultados salvos em {args.output}")
+    return report
+
+if __name__ == "__main__":
+    main()
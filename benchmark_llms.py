@@ -44,7 +44,8 @@ async def benchmark_models():
 
     for model_info in MODELS_TO_TEST:
         print(f"\nTesting Model: {model_info['alias']} ({model_info['model']})...")
-        engine = IntentEngine(provider=model_info['provider'], model_name=model_info['model'])
+        # Sem cache: o benchmark mede sempre a chamada real ao modelo
+        engine = IntentEngine(provider=model_info['provider'], model_name=model_info['model'], use_cache=False)
         
         model_results = {
             "alias": model_info['alias'],
@@ -76,7 +77,8 @@ async def benchmark_models():
                     "duration": duration,
                     "score": classification["scores"]["lead_score"],
                     "pain_point": classification["pain_point"]["label"],
-                    "fallback": is_fallback
+                    "fallback": is_fallback,
+                    "classification": classification
                 })
                 print(f"  [OK] Case {case['id']} - {duration:.2f}s - Score: {classification['scores']['lead_score']}")
             except Exception as e:
@@ -88,6 +90,9 @@ async def benchmark_models():
 
         if model_results["success_count"] > 0:
             model_results["avg_time"] = model_results["total_time"] / len(TEST_CASES)
+
+        model_results["single_usage"] = dict(engine.usage)
+        model_results["batch"] = await benchmark_batch_agreement(model_info, model_results["tests"])
             
         results.append(model_results)
 
@@ -104,9 +109,46 @@ async def benchmark_models():
         print(f"{i}. {res['alias']}")
         print(f"   Taxa de Sucesso: {res['success_count']}/{len(TEST_CASES)}")
         print(f"   Tempo Médio: {res.get('avg_time', 0):.2f}s")
+        batch = res.get("batch")
+        if batch:
+            single = res["single_usage"]
+            print(f"   Batch vs Single: {batch['requests']} vs {single['requests']} requisições, "
+                  f"{batch['prompt_tokens']} vs {single['prompt_tokens']} tokens de prompt")
+            print(f"   Concordância: VIP {batch['vip_agreement']:.0%} | Região SP {batch['region_agreement']:.0%} | "
+                  f"Estágio {batch['stage_agreement']:.0%} | Δ score médio {batch['mean_score_delta']:.1f}")
         print(f"   {status}")
         print("-" * 30)
 
+async def benchmark_batch_agreement(model_info: Dict[str, Any], single_tests: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Reclassifica todos os casos numa única requisição (modo batch) e mede a
+    concordância com as classificações individuais do mesmo modelo.
+    """
+    singles = {t["case"]: t["classification"] for t in single_tests if "classification" in t}
+    if not singles:
+        return {}
+
+    engine = IntentEngine(provider=model_info['provider'], model_name=model_info['model'], use_cache=False)
+    cases = [case for case in TEST_CASES if case["id"] in singles]
+    start_time = time.time()
+    batch_results = await engine.classify_batch([case["text"] for case in cases], batch_size=len(cases))
+    duration = time.time() - start_time
+
+    pairs = [(singles[case["id"]], batch) for case, batch in zip(cases, batch_results)]
+    def agreement(fn):
+        return sum(1 for single, batch in pairs if fn(single) == fn(batch)) / len(pairs)
+
+    return {
+        "duration": duration,
+        "requests": engine.usage["requests"],
+        "prompt_tokens": engine.usage["prompt_tokens"],
+        "fallbacks": engine.usage["batch_fallbacks"],
+        "vip_agreement": agreement(lambda c: c["scores"]["lead_score"] > 30),
+        "region_agreement": agreement(lambda c: c.get("is_sp_region")),
+        "stage_agreement": agreement(lambda c: str(c["intent_stage"]["label"]).casefold()),
+        "mean_score_delta": sum(abs(s["scores"]["lead_score"] - b["scores"]["lead_score"]) for s, b in pairs) / len(pairs)
+    }
+
 if __name__ == "__main__":
     if not settings.OPENROUTER_API_KEY:
         print("Erro: OPENROUTER_API_KEY não encontrada no .env")
@@ -0,0 +1,109 @@
+import json
+import os
+import resource
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from sqlalchemy import create_engine
+from app.models.models import Base
+from generate_viz import generate_html_report
+
+SIZES = [int(n) for n in sys.argv[1].split(",")] if len(sys.argv) > 1 and sys.argv[1] != "--run" else [100_000, 1_000_000]
+LEGACY_MAX_LEADS = 100_000  # acima disso a versão antiga precisa de vários GB de RAM
+
+def populate(db_path: str, n: int):
+    Base.metadata.create_all(bind=create_engine(f"sqlite:///{db_path}"))
+    conn = sqlite3.connect(db_path)
+    chunk = 50_000
+    for start in range(0, n, chunk):
+        ids = range(start + 1, min(start + chunk, n) + 1)
+        conn.executemany(
+            "INSERT INTO source_items (id, source, url, author_handle, text, raw_metadata) VALUES (?, 'instagram', ?, ?, ?, ?)",
+            [(i, f"https://instagram.com/p/{i}", f"@lead_{i}", f"Quero Ultraformer MPT no Itaim <b>{i}</b>",
+              json.dumps({"author_image": f"https://img.example.com/{i}.jpg"})) for i in ids]
+        )
+        conn.executemany(
+            "INSERT INTO leads (id, source_item_id, clinic_id, scores, labels, status, lead_score) VALUES (?, ?, 1, ?, ?, 'pending', ?)",
+            [(i, i, json.dumps({"lead_score": (i * 37) % 60, "visual_justification": "Relógio & bolsa de grife"}),
+              json.dumps({"visual_profile": ["relógio", "bolsa"]}), (i * 37) % 60) for i in ids]
+        )
+        conn.commit()
+    conn.close()
+
+def render_legacy(db_path: str, output: str):
+    """Versão anterior: fetchall + concatenação de string + escrita única (sem escape)."""
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("""
+        SELECT l.id, l.scores, l.labels, s.author_handle, s.text, s.raw_metadata
+        FROM leads l JOIN source_items s ON l.source_item_id = s.id
+        ORDER BY l.lead_score DESC
+    """).fetchall()
+    html_content = "<html><body>"
+    for lead_id, scores_json, labels_json, author, text, metadata_json in rows:
+        scores = json.loads(scores_json)
+        labels = json.loads(labels_json)
+        metadata = json.loads(metadata_json) if metadata_json else {}
+        score_val = scores.get('lead_score', 0)
+        status_label = "VIP ELITE" if score_val > 30 else "QUALIFICADO"
+        img_url = metadata.get('author_image')
+        avatar_html = f'<img src="{img_url}" class="avatar">' if img_url else '<div class="no-avatar">👤 No Image</div>'
+        tags_html = "".join([f'<span class="tag">{tag}</span>' for tag in labels.get('visual_profile', [])])
+        html_content += f"""
+            <div class="lead-card">
+                {avatar_html}
+                <div class="content">
+                    <p class="author">{author} <span class="badge">{status_label}</span></p>
+                    <p class="text">"{text}"</p>
+                    <div class="tags">
+                        {tags_html}
+                    </div>
+                    <div class="pericia">
+                        <div class="pericia-title">🔍 Relatório de Perícia Visual:</div>
+                        {scores.get('visual_justification', 'N/A')}
+                    </div>
+                    <a href="#" class="whatsapp-btn">📱 Abordar no WhatsApp</a>
+                </div>
+                <div class="score-box">
+                    <div class="score-value">{score_val:.1f}</div>
+                    <div class="score-label">LEAD SCORE</div>
+                </div>
+            </div>
+        """
+    html_content += "</body></html>"
+    with open(output, 'w', encoding='utf-8') as f:
+        f.write(html_content)
+    conn.close()
+
+def run_variant(variant: str, db_path: str):
+    """Executado em subprocesso para medir o pico de memória (ru_maxrss) de cada variante isoladamente."""
+    output = os.path.join(os.path.dirname(db_path), f"{variant}.html")
+    start = time.perf_counter()
+    if variant == "legacy":
+        render_legacy(db_path, output)
+    else:
+        generate_html_report(db_path, output)
+    elapsed = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({"elapsed": elapsed, "peak_mb": peak_mb}))
+
+def benchmark_report():
+    print("=== BENCHMARK DO RELATÓRIO HTML ===")
+    print(f"{'Leads':>10}  {'Variante':<22}{'Tempo':>10}{'Pico RSS':>12}")
+    for n in SIZES:
+        db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+        populate(db_path, n)
+        variants = ["legacy", "streaming"] if n <= LEGACY_MAX_LEADS else ["streaming"]
+        for variant in variants:
+            out = subprocess.run([sys.executable, __file__, "--run", variant, db_path],
+                                 capture_output=True, text=True, check=True).stdout.strip().splitlines()[-1]
+            result = json.loads(out)
+            name = "Antes (fetchall + +=)" if variant == "legacy" else "Streaming paginado"
+            print(f"{n:>10,}  {name:<22}{result['elapsed']:>9.1f}s{result['peak_mb']:>10.0f}MB")
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--run":
+        run_variant(sys.argv[2], sys.argv[3])
+    else:
+        benchmark_report()
@@ -0,0 +1,76 @@
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.db.migrations import run_migrations
+from app.models.models import Lead
+from app.services.engine import LeadScorer
+from app.services.rescoring import METRICS, rescore_leads
+
+N_LEADS = 1_000_000
+LEGACY_SAMPLE = 20_000  # o caminho por objeto ORM é medido numa amostra e extrapolado
+INSERT_CHUNK = 50_000
+
+def populate(db_path: str, n: int):
+    run_migrations(create_engine(f"sqlite:///{db_path}"))
+    rng = random.Random(42)
+    conn = sqlite3.connect(db_path)
+    for start in range(0, n, INSERT_CHUNK):
+        rows = []
+        for i in range(start, min(start + INSERT_CHUNK, n)):
+            metrics = {name: rng.randint(0, 100) for name in METRICS}
+            metrics["is_sp_region"] = rng.random() < 0.8
+            metrics["is_elite_neighborhood"] = rng.random() < 0.2
+            score = LeadScorer().calculate_score(metrics)
+            rows.append((i + 1, json.dumps({**metrics, "lead_score": score}), score, metrics["is_sp_region"]))
+        conn.executemany(
+            "INSERT INTO leads (id, clinic_id, scores, labels, status, lead_score, tier, is_sp_region) "
+            "VALUES (?, 1, ?, '{}', 'pending', ?, 'Standard', ?)", rows
+        )
+        conn.commit()
+    conn.close()
+
+def rescore_orm(factory, limit: int, batch: int = 1000):
+    """Alternativa sem o modo em massa: carrega cada Lead no ORM e recalcula em Python."""
+    scorer = LeadScorer()
+    with factory() as db:
+        for i, lead in enumerate(db.query(Lead).order_by(Lead.id).limit(limit).yield_per(batch), 1):
+            lead.scores = {**lead.scores, "lead_score": scorer.calculate_score(lead.scores)}
+            if i % batch == 0:
+                db.commit()
+        db.commit()
+
+def benchmark_rescore(n_leads: int = N_LEADS):
+    print(f"=== BENCHMARK DE RE-SCORE EM MASSA ({n_leads:,} leads) ===")
+    db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    populate(db_path, n_leads)
+    engine = create_engine(f"sqlite:///{db_path}")
+
+    original = dict(LeadScorer.WEIGHTS)
+    LeadScorer.WEIGHTS["visual_fit"] = 0.40  # ajuste de pesos: praticamente todos os scores mudam
+    try:
+        sample = min(LEGACY_SAMPLE, n_leads)
+        start = time.perf_counter()
+        rescore_orm(sessionmaker(bind=engine), sample)
+        legacy = (time.perf_counter() - start) * n_leads / sample
+        print(f"Antes (ORM, lead a lead): {legacy:.1f}s estimados ({sample:,} leads medidos)")
+
+        result = rescore_leads(engine)
+        print(f"Depois (NumPy + UPDATE em lote): {result['elapsed']:.1f}s - {result['updated']:,} leads alterados "
+              f"({result['scanned'] / result['elapsed']:,.0f} leads/s)")
+        print(f"Leads VIP: {result['vip_before']:,} -> {result['vip_after']:,}")
+        print(f"Ganho: {legacy / result['elapsed']:.1f}x")
+
+        noop = rescore_leads(engine)
+        print(f"Sem mudança de pesos (só leitura + cálculo): {noop['elapsed']:.1f}s")
+    finally:
+        LeadScorer.WEIGHTS.clear()
+        LeadScorer.WEIGHTS.update(original)
+
+if __name__ == "__main__":
+    benchmark_rescore(int(sys.argv[1]) if len(sys.argv) > 1 else N_LEADS)
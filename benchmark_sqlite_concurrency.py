@@ -0,0 +1,161 @@
+"""
+Concorrência no SQLite: uma missão real (SignalsCollector contra o LLM stub local, um commit por lead)
+grava enquanto clientes martelam /leads e /stats na API (uvicorn em outro processo).
+Com --writer rescore, o processo de escrita é um re-score em massa (transações grandes) no lugar da missão.
+Compara o perfil antigo (journal padrão, mesma pool para leitura e escrita) com o perfil WAL
+(writer dedicado + pool somente-leitura).
+
+    python benchmark_sqlite_concurrency.py [--signals 600] [--clients 4] [--seed-leads 20000] [--writer rescore]
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List
+import httpx
+from benchmark_llm_offline import make_signals, percentile
+from stub_llm_server import StubLLMServer, StubResponder
+from benchmark_rescore import populate
+
+PROFILES = {
+    "legacy": {"SQLITE_WAL": "false"},
+    "wal": {"SQLITE_WAL": "true"},
+}
+ENDPOINTS = {"leads": "/api/v1/leads/?limit=50", "stats": "/api/v1/stats/"}
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def run_mission(n_signals: int, concurrency: int):
+    """Modo --mission (processo separado, como um worker): missão completa gravando no DATABASE_URL do ambiente."""
+    from app.core.config import settings
+    from app.services.collector import SignalsCollector
+
+    with StubLLMServer(StubResponder(latency_p50=0.005, latency_p95=0.02)) as server:
+        settings.LLM_PROVIDER, settings.OPENROUTER_API_KEY = "openrouter", "offline"
+        settings.OPENROUTER_BASE_URL = server.base_url
+        settings.LLM_RATE_LIMITS = {**settings.LLM_RATE_LIMITS, "openrouter": 0.0}
+        collector = SignalsCollector()
+        start = time.perf_counter()
+        results = asyncio.run(collector.process_and_save_signals(make_signals(n_signals, image_ratio=0.0), max_concurrency=concurrency))
+        elapsed = time.perf_counter() - start
+    print(json.dumps({"leads": len(results), "elapsed_s": round(elapsed, 3)}))
+
+def run_rescore(rounds: int):
+    """Modo --rescore: re-score em massa repetido, alternando os pesos para que todas as rodadas gravem."""
+    from app.db.session import engine
+    from app.services.engine import LeadScorer
+    from app.services.rescoring import rescore_leads
+
+    base = LeadScorer.WEIGHTS["visual_fit"]
+    start, updated = time.perf_counter(), 0
+    for i in range(rounds):
+        LeadScorer.WEIGHTS["visual_fit"] = base + (0.05 if i % 2 == 0 else 0.0)
+        updated += rescore_leads(engine)["updated"]
+    print(json.dumps({"leads": updated, "elapsed_s": round(time.perf_counter() - start, 3)}))
+
+def hammer(base: str, mission: subprocess.Popen, samples: Dict[str, List[float]], errors: Dict[str, int]):
+    with httpx.Client(timeout=30) as client:
+        while mission.poll() is None:
+            for name, path in ENDPOINTS.items():
+                start = time.perf_counter()
+                try:
+                    ok = client.get(base + path).status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                samples[name].append(time.perf_counter() - start)
+                if not ok:
+                    errors[name] += 1
+
+def run_profile(profile: str, args) -> Dict[str, Any]:
+    db_path = os.path.join(tempfile.mkdtemp(prefix=f"sqlite_{profile}_"), "bench.db")
+    populate(db_path, args.seed_leads)
+    env = {
+        **os.environ, **PROFILES[profile],
+        "DATABASE_URL": f"sqlite:///{db_path}",
+        "DB_WRITE_BATCH_SIZE": "1",  # pior caso para os leitores: um commit por lead
+        "PREFILTER_ENABLED": "false", "CLASSIFICATION_CACHE_ENABLED": "false", "SERPER_API_KEY": "",
+    }
+    port = free_port()
+    api = subprocess.Popen([sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+                           env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                httpx.get(base + "/", timeout=1)
+                break
+            except httpx.HTTPError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError("API não subiu")
+                time.sleep(0.2)
+
+        writer_args = (["--rescore", "--rounds", str(args.rounds)] if args.writer == "rescore"
+                       else ["--mission", "--signals", str(args.signals), "--concurrency", str(args.concurrency)])
+        mission = subprocess.Popen([sys.executable, __file__, *writer_args], env=env, stdout=subprocess.PIPE)
+        samples = {name: [] for name in ENDPOINTS}
+        errors = {name: 0 for name in ENDPOINTS}
+        start = time.perf_counter()
+        threads = [threading.Thread(target=hammer, args=(base, mission, samples, errors)) for _ in range(args.clients)]
+        for thread in threads:
+            thread.start()
+        output, _ = mission.communicate()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - start
+    finally:
+        api.terminate()
+        api.wait(timeout=30)
+
+    if mission.returncode != 0:
+        raise RuntimeError(f"missão falhou no perfil {profile} (código {mission.returncode})")
+    report = {"mission": json.loads(output.decode().strip().splitlines()[-1])}
+    for name, values in samples.items():
+        report[name] = {
+            "requests": len(values),
+            "errors": errors[name],
+            "req_per_s": round(len(values) / wall, 1),
+            **{f"p{p}_ms": round(percentile(values, p) * 1000, 1) for p in (50, 95, 99)},
+            "max_ms": round(max(values) * 1000, 1) if values else 0.0,
+        }
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--signals", type=int, default=600)
+    parser.add_argument("--concurrency", type=int, default=16, help="sinais em análise simultânea na missão")
+    parser.add_argument("--clients", type=int, default=4, help="clientes martelando a API")
+    parser.add_argument("--seed-leads", type=int, default=20_000)
+    parser.add_argument("--profiles", default="legacy,wal")
+    parser.add_argument("--writer", choices=["mission", "rescore"], default="mission")
+    parser.add_argument("--rounds", type=int, default=3, help="rodadas de re-score (--writer rescore)")
+    parser.add_argument("--mission", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--rescore", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.mission:
+        return run_mission(args.signals, args.concurrency)
+    if args.rescore:
+        return run_rescore(args.rounds)
+
+    writer = f"missão de {args.signals} sinais" if args.writer == "mission" else f"{args.rounds} re-scores em massa"
+    print(f"=== CONCORRÊNCIA SQLITE: {writer} + {args.clients} clientes em /leads e /stats ===")
+    for profile in args.profiles.split(","):
+        report = run_profile(profile, args)
+        mission = report["mission"]
+        print(f"\n[{profile}] escrita: {mission['leads']} leads gravados em {mission['elapsed_s']}s")
+        for name in ENDPOINTS:
+            r = report[name]
+            print(f"  /{name}: {r['requests']} req ({r['req_per_s']}/s), p50 {r['p50_ms']}ms, p95 {r['p95_ms']}ms, "
+                  f"p99 {r['p99_ms']}ms, máx {r['max_ms']}ms, erros {r['errors']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import os
+import statistics
+import sys
+import tempfile
+import time
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, delete
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+from app.db.migrations import run_migrations, rebuild_lead_stats
+from app.db.session import get_async_read_db, get_db, make_async_engine
+from app.main import app
+from app.models.models import LeadStats
+from benchmark_lead_queries import populate_legacy, legacy_stats
+
+SIZES = [int(n) for n in sys.argv[1].split(",")] if len(sys.argv) > 1 else [100_000, 1_000_000]
+REQUESTS = {"Contadores (lead_stats)": 500, "Agregação SQL": 20, "Antes (Python)": 3}
+
+def percentile(samples, p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+def load_test(fn, n_requests: int):
+    latencies = []
+    for _ in range(n_requests):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return statistics.median(latencies), percentile(latencies, 99)
+
+def benchmark_stats():
+    print("=== LOAD TEST DE /api/v1/stats ===")
+    client = TestClient(app)
+    for n_leads in SIZES:
+        db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+        engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+        factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        populate_legacy(engine, n_leads)
+        run_migrations(engine)
+
+        def override_get_db():
+            db = factory()
+            try:
+                yield db
+            finally:
+                db.close()
+        # /stats lê por sessão assíncrona: aponta-a para o mesmo banco do benchmark
+        async_factory = async_sessionmaker(make_async_engine(f"sqlite:///{db_path}"), expire_on_commit=False)
+
+        async def override_get_async_read_db():
+            async with async_factory() as session:
+                yield session
+        app.dependency_overrides[get_db] = override_get_db
+        app.dependency_overrides[get_async_read_db] = override_get_async_read_db
+
+        def request_stats():
+            assert client.get("/api/v1/stats/").json()["total_leads"] == n_leads
+
+        print(f"\n{n_leads:,} leads")
+        print(f"{'Variante':<26}{'Requisições':>12}{'p50':>12}{'p99':>12}")
+        results = {"Contadores (lead_stats)": load_test(request_stats, REQUESTS["Contadores (lead_stats)"])}
+        with engine.begin() as conn:
+            conn.execute(delete(LeadStats))  # sem contadores, o endpoint agrega no banco
+        results["Agregação SQL"] = load_test(request_stats, REQUESTS["Agregação SQL"])
+        rebuild_lead_stats(engine)
+        results["Antes (Python)"] = load_test(lambda: legacy_stats(factory), REQUESTS["Antes (Python)"])
+
+        for name, (p50, p99) in results.items():
+            print(f"{name:<26}{REQUESTS[name]:>12}{p50:>10.1f}ms{p99:>10.1f}ms")
+        app.dependency_overrides.pop(get_db, None)
+        app.dependency_overrides.pop(get_async_read_db, None)
+
+if __name__ == "__main__":
+    benchmark_stats()
@@ -0,0 +1,67 @@
+import os
+import tempfile
+import time
+from datetime import datetime
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.db.batch_writer import LeadBatchWriter
+from app.models.models import Base, SourceItem, Lead, AuditLog
+
+N_LEADS = 2000
+
+def make_record(i: int):
+    return {
+        "source_item": {"source": "instagram", "url": f"https://instagram.com/p/{i}", "author_handle": f"@lead_{i}",
+                        "text": f"Quero Ultraformer MPT no Itaim ({i})", "timestamp": datetime.now(), "raw_metadata": {}},
+        "lead": {"clinic_id": 1, "scores": {"lead_score": 42.0, "fit": 80}, "labels": {"tier": "Gold"},
+                 "evidence_snippets": ["Ultraformer"], "status": "pending"},
+        "audit": {"event": "lead_qualification", "actor": "AI_Agent_Tier1", "payload": {"final_score": 42.0}}
+    }
+
+def new_session_factory():
+    db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def write_legacy(factory, records):
+    """Caminho antigo: três commits + refresh por lead."""
+    db = factory()
+    try:
+        for r in records:
+            source_item = SourceItem(**r["source_item"])
+            db.add(source_item)
+            db.commit()
+            db.refresh(source_item)
+            lead = Lead(source_item_id=source_item.id, **r["lead"])
+            db.add(lead)
+            db.commit()
+            db.refresh(lead)
+            db.add(AuditLog(**{**r["audit"], "payload": {"lead_id": lead.id, **r["audit"]["payload"]}}))
+            db.commit()
+    finally:
+        db.close()
+
+def write_batched(factory, records):
+    writer = LeadBatchWriter(factory)
+    for r in records:
+        writer.add(r)
+    writer.close()
+
+def benchmark_writes():
+    print(f"=== BENCHMARK DE GRAVAÇÃO ({N_LEADS} leads, 3 linhas por lead) ===")
+    records = [make_record(i) for i in range(N_LEADS)]
+    timings = {}
+    for name, fn in [("Antes (3 commits/lead)", write_legacy), ("Depois (lotes)", write_batched)]:
+        factory = new_session_factory()
+        start = time.perf_counter()
+        fn(factory, records)
+        timings[name] = time.perf_counter() - start
+        rows_per_sec = N_LEADS * 3 / timings[name]
+        print(f"{name}: {timings[name]:.2f}s - {rows_per_sec:,.0f} linhas/s")
+
+    legacy, batched = timings.values()
+    print(f"Ganho: {legacy / batched:.1f}x")
+
+if __name__ == "__main__":
+    benchmark_writes()
@@ -1,25 +1,20 @@
-import sqlite3
+import glob
 import json
+import os
+import sqlite3
+from html import escape
+from string import Template
 
-def generate_html_report():
-    conn = sqlite3.connect('sql_app.db')
-    cursor = conn.cursor()
-    
-    # Buscar leads e itens de origem
-    cursor.execute("""
-        SELECT l.id, l.scores, l.labels, s.author_handle, s.text, s.raw_metadata
-        FROM leads l
-        JOIN source_items s ON l.source_item_id = s.id
-        ORDER BY json_extract(l.scores, '$.lead_score') DESC
-    """)
-    rows = cursor.fetchall()
-    
-    html_content = """
+REPORT_PAGE_SIZE = 1000  # leads por arquivo HTML
+FETCH_CHUNK_SIZE = 500  # linhas lidas do cursor por vez
+SAFE_URL_PREFIXES = ("http://", "https://")
+
+PAGE_HEAD = Template("""
     <!DOCTYPE html>
     <html lang="pt-br">
     <head>
         <meta charset="UTF-8">
-        <title>Elite Leads Hub - Clínica Médica Mais</title>
+        <title>Elite Leads Hub - Clínica Médica Mais (página $page)</title>
         <style>
             body { font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; background-color: #0e1117; color: #e0e0e0; margin: 0; padding: 20px; }
             .container { max-width: 1200px; margin: auto; }
@@ -40,6 +35,8 @@ def generate_html_report():
             .score-label { font-size: 0.8em; color: #888; }
             .pericia { margin-top: 20px; background: #0d1117; padding: 15px; border-radius: 8px; font-size: 0.9em; }
             .pericia-title { font-weight: bold; color: #ffd700; margin-bottom: 5px; }
+            .pager { display: flex; justify-content: space-between; margin: 30px 0; color: #888; }
+            .pager a { color: #ffd700; text-decoration: none; font-weight: bold; }
             .whatsapp-btn { display: inline-block; margin-top: 20px; background-color: #25d366; color: white; padding: 10px 20px; border-radius: 5px; text-decoration: none; font-weight: bold; }
         </style>
     </head>
@@ -49,24 +46,10 @@ def generate_html_report():
                 <h1>💎 Elite Leads Hub</h1>
                 <p>Painel de Inteligência de Captação - Clínica Médica Mais</p>
             </div>
-    """
-    
-    for row in rows:
-        lead_id, scores_json, labels_json, author, text, metadata_json = row
-        scores = json.loads(scores_json)
-        labels = json.loads(labels_json)
-        metadata = json.loads(metadata_json) if metadata_json else {}
-        
-        score_val = scores.get('lead_score', 0)
-        is_vip = score_val > 30
-        status_label = "VIP ELITE" if is_vip else "QUALIFICADO"
-        img_url = metadata.get('author_image')
-        
-        avatar_html = f'<img src="{img_url}" class="avatar">' if img_url else '<div class="no-avatar">👤 No Image</div>'
-        
-        tags_html = "".join([f'<span class="tag">{tag}</span>' for tag in labels.get('visual_profile', [])])
-        
-        html_content += f"""
+""")
+
+# Renderizado uma vez por lead: str.format sai bem mais barato que Template.substitute
+LEAD_CARD = """
             <div class="lead-card">
                 {avatar_html}
                 <div class="content">
@@ -77,28 +60,123 @@ def generate_html_report():
                     </div>
                     <div class="pericia">
                         <div class="pericia-title">🔍 Relatório de Perícia Visual:</div>
-                        {scores.get('visual_justification', 'N/A')}
+                        {visual_justification}
                     </div>
                     <a href="#" class="whatsapp-btn">📱 Abordar no WhatsApp</a>
                 </div>
                 <div class="score-box">
-                    <div class="score-value">{score_val:.1f}</div>
+                    <div class="score-value">{score}</div>
                     <div class="score-label">LEAD SCORE</div>
                 </div>
             </div>
-        """
-        
-    html_content += """
+"""
+
+PAGE_FOOT = Template("""
+            <div class="pager">$prev_link <span>Página $page</span> $next_link</div>
         </div>
     </body>
     </html>
+""")
+
+def page_path(output: str, page: int) -> str:
+    """Página 1 mantém o nome original (elite_dashboard.html); as demais viram elite_dashboard_2.html, ..."""
+    if page == 1:
+        return output
+    root, ext = os.path.splitext(output)
+    return f"{root}_{page}{ext}"
+
+def safe_image_url(url) -> str:
+    # Só http(s): bloqueia javascript:/data: vindos de metadados coletados
+    url = str(url or "").strip()
+    if not url.lower().startswith(SAFE_URL_PREFIXES):
+        return ""
+    return escape(url, quote=True)
+
+def render_lead_card(row) -> str:
+    lead_id, lead_score, scores_json, labels_json, author, text, metadata_json = row
+    scores = json.loads(scores_json) if scores_json else {}
+    labels = json.loads(labels_json) if labels_json else {}
+    metadata = json.loads(metadata_json) if metadata_json else {}
+
+    score_val = lead_score if lead_score is not None else scores.get('lead_score', 0)
+    is_vip = score_val > 30
+    img_url = safe_image_url(metadata.get('author_image'))
+
+    return LEAD_CARD.format(
+        avatar_html=f'<img src="{img_url}" class="avatar">' if img_url else '<div class="no-avatar">👤 No Image</div>',
+        author=escape(str(author or "")),
+        status_label="VIP ELITE" if is_vip else "QUALIFICADO",
+        text=escape(str(text or "")),
+        tags_html="".join(f'<span class="tag">{escape(str(tag))}</span>' for tag in labels.get('visual_profile', [])),
+        visual_justification=escape(str(scores.get('visual_justification', 'N/A'))),
+        score=f"{score_val:.1f}"
+    )
+
+def _iter_rows(cursor, chunk_size: int):
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            return
+        yield from rows
+
+def _close_page(f, output: str, page: int, has_next: bool):
+    prev_link = f'<a href="{os.path.basename(page_path(output, page - 1))}">← Anterior</a>' if page > 1 else "<span></span>"
+    next_link = f'<a href="{os.path.basename(page_path(output, page + 1))}">Próxima →</a>' if has_next else "<span></span>"
+    f.write(PAGE_FOOT.substitute(prev_link=prev_link, next_link=next_link, page=page))
+    f.close()
+
+def generate_html_report(db_path: str = 'sql_app.db', output: str = 'elite_dashboard.html',
+                         page_size: int = REPORT_PAGE_SIZE, chunk_size: int = FETCH_CHUNK_SIZE) -> int:
     """
+    Gera o relatório em streaming: lê o cursor em blocos, escreve cada card direto no
+    arquivo e divide o resultado em páginas de `page_size` leads ligadas por links.
+    Memória e tempo por lead ficam constantes independentemente do total. Retorna o nº de páginas.
+    """
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
     
-    with open('elite_dashboard.html', 'w', encoding='utf-8') as f:
-        f.write(html_content)
-    
-    conn.close()
-    print("Dashboard HTML gerado com sucesso: elite_dashboard.html")
+    # Buscar leads e itens de origem (ordem servida pelo índice de lead_score)
+    cursor.execute("""
+        SELECT l.id, l.lead_score, l.scores, l.labels, s.author_handle, s.text, s.raw_metadata
+        FROM leads l
+        JOIN source_items s ON l.source_item_id = s.id
+        ORDER BY l.lead_score DESC, l.id DESC
+    """)
+
+    page, rows_in_page, f = 0, 0, None
+    try:
+        for row in _iter_rows(cursor, chunk_size):
+            if f is None or rows_in_page == page_size:
+                if f is not None:
+                    _close_page(f, output, page, has_next=True)
+                page += 1
+                rows_in_page = 0
+                f = open(page_path(output, page), 'w', encoding='utf-8')
+                f.write(PAGE_HEAD.substitute(page=page))
+            f.write(render_lead_card(row))
+            rows_in_page += 1
+
+        if f is None:
+            # Sem leads: uma página vazia, como antes
+            page = 1
+            f = open(page_path(output, page), 'w', encoding='utf-8')
+            f.write(PAGE_HEAD.substitute(page=page))
+        _close_page(f, output, page, has_next=False)
+        f = None
+    finally:
+        if f is not None:
+            f.close()
+        conn.close()
+
+    # Remove páginas de execuções anteriores que ficaram além do novo total
+    root, ext = os.path.splitext(output)
+    for stale in glob.glob(f"{glob.escape(root)}_*{ext}"):
+        suffix = stale[len(root) + 1:-len(ext) or None]
+        if suffix.isdigit() and int(suffix) > page:
+            os.remove(stale)
+
+    print(f"Dashboard HTML gerado com sucesso: {output} ({page} página(s))")
+    return page
 
 if __name__ == "__main__":
     generate_html_report()
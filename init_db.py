@@ -1,10 +1,10 @@
 from app.db.session import engine
-from app.models.models import Base
+from app.db.migrations import run_migrations
 
 def init_db():
     print("Criando tabelas no banco de dados...")
-    Base.metadata.create_all(bind=engine)
-    print("Tabelas criadas com sucesso!")
+    backfilled = run_migrations(engine)
+    print(f"Tabelas criadas/migradas com sucesso! ({backfilled} leads com colunas tipadas preenchidas)")
 
 if __name__ == "__main__":
     init_db()
@@ -0,0 +1,23 @@
+import argparse
+import logging
+from app.core.config import settings
+from app.db.migrations import COPY_BATCH_SIZE, copy_database
+from app.db.session import make_engine
+
+def main():
+    parser = argparse.ArgumentParser(description="Copia o banco SQLite local para o PostgreSQL (schema, dados e índices)")
+    parser.add_argument("target", nargs="?", default=settings.DATABASE_URL, help="URL do PostgreSQL de destino (padrão: DATABASE_URL)")
+    parser.add_argument("--source", default="sqlite:///./sql_app.db", help="URL do banco de origem")
+    parser.add_argument("--batch-size", type=int, default=COPY_BATCH_SIZE, help="linhas por lote/transação")
+    args = parser.parse_args()
+    if args.target == args.source:
+        parser.error("origem e destino são o mesmo banco")
+
+    logging.basicConfig(level=logging.INFO)
+    copied = copy_database(make_engine(args.source), make_engine(args.target), batch_size=args.batch_size)
+    for table, count in copied.items():
+        print(f"{table}: {count} registros")
+    print("Migração concluída. Aponte DATABASE_URL para o novo banco e reinicie API e workers.")
+
+if __name__ == "__main__":
+    main()
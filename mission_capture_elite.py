@@ -1,16 +1,22 @@
 import asyncio
 import logging
+import uuid
+from app.core.config import settings
 from app.services.collector import SignalsCollector
+from app.services.profiler import MissionProfiler, save_profile
 from app.db.session import SessionLocal
 from app.models.models import Lead
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-async def run_capture_mission():
+async def run_capture_mission(streaming: bool = True):
     print("\n--- 🚀 INICIANDO MISSÃO DE CAPTURA: ELITE SÃO PAULO ---")
     
     collector = SignalsCollector()
+    mission_id = uuid.uuid4().hex
+    if settings.MISSION_PROFILE_ENABLED:
+        collector.profiler = MissionProfiler()
     
     # Keywords de Alto Padrão para a Clínica Mais
     queries = [
@@ -25,20 +31,34 @@ async def run_capture_mission():
     
     logger.info(f"Buscando sinais para as tecnologias de elite: {queries}")
     
-    # 1. Coletar
-    signals = await collector.fetch_signals(queries)
-    logger.info(f"Coletados {len(signals)} potenciais sinais.")
-    
-    # 2. Processar (IA + Visão + Geofencing + Scoring)
-    # Isso já salva no banco de dados automaticamente
-    results = await collector.process_and_save_signals(signals)
+    if streaming:
+        # 1+2. Coletar e processar em fluxo contínuo (classifica enquanto ainda busca)
+        results = await collector.stream_and_process(queries)
+        logger.info(f"Coletados {collector.mission_stats['signals']} potenciais sinais.")
+    else:
+        # 1. Coletar
+        signals = await collector.fetch_signals(queries)
+        logger.info(f"Coletados {len(signals)} potenciais sinais.")
+        
+        # 2. Processar (IA + Visão + Geofencing + Scoring)
+        # Isso já salva no banco de dados automaticamente
+        results = await collector.process_and_save_signals(signals)
+    cache_stats = collector.mission_stats.get("cache")
+    if cache_stats:
+        logger.info(f"Cache de classificação: {cache_stats['hits']} hits, {cache_stats['misses']} chamadas ao LLM ({cache_stats['hit_rate']:.0%} de economia)")
+    logger.info(f"Pré-filtro: {collector.mission_stats['prefiltered']} sinais descartados, {collector.mission_stats['llm_calls_avoided']} chamadas ao LLM evitadas")
+    if collector.profiler is not None:
+        profile = save_profile(SessionLocal, mission_id, collector.profiler)
+        critical = ", ".join(f"{stage} {ms:.0f}ms" for stage, ms in profile["critical_path_ms"].items())
+        print(f"\n⏱️  Missão {mission_id}: {profile['wall_ms'] / 1000:.1f}s | caminho crítico: {critical or '-'}")
+        print(f"   Timeline: GET {settings.API_V1_STR}/mission/{mission_id}/profile (abrir em ui.perfetto.dev)")
     
     # 3. Mostrar Resultados do Ranking
     print("\n--- 🏆 RANKING DE LEADS QUALIFICADOS (Tier 1 SP) ---")
     db = SessionLocal()
     try:
         # Buscar os leads salvos ordenados por score
-        leads = db.query(Lead).order_by(Lead.scores['lead_score'].desc()).limit(10).all()
+        leads = db.query(Lead).order_by(Lead.lead_score.desc()).limit(10).all()
         
         for i, lead in enumerate(leads):
             score = lead.scores.get('lead_score', 0)
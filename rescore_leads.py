@@ -0,0 +1,19 @@
+import argparse
+import logging
+from app.db.session import engine
+from app.services.rescoring import RESCORE_CHUNK_SIZE, rescore_leads
+
+def main():
+    parser = argparse.ArgumentParser(description="Recalcula o lead_score de todos os leads com os pesos atuais do LeadScorer (sem LLM)")
+    parser.add_argument("--chunk-size", type=int, default=RESCORE_CHUNK_SIZE, help="leads lidos e gravados por transação")
+    parser.add_argument("--dry-run", action="store_true", help="só calcula e mostra quantos leads mudariam")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    result = rescore_leads(engine, chunk_size=args.chunk_size, dry_run=args.dry_run)
+    action = "mudariam" if args.dry_run else "atualizados"
+    print(f"{result['scanned']} leads lidos, {result['updated']} {action} em {result['elapsed']}s")
+    print(f"Leads VIP (> 30): {result['vip_before']} -> {result['vip_after']}")
+
+if __name__ == "__main__":
+    main()
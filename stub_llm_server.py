@@ -0,0 +1,148 @@
+"""
+Servidor local compatível com /chat/completions da OpenAI, compartilhado pelos testes e benchmarks
+de LLM: o StubResponder devolve classificações sintéticas e determinísticas por texto (com latência
+log-normal) e o StubLLMServer conta requisições e tokens servidos.
+
+    with StubLLMServer(StubResponder(latency_p50=0.01, latency_p95=0.02)) as server:
+        ...  # base_url=server.base_url
+"""
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Tuple
+
+_BATCH_TEXTS_RE = re.compile(r'Textos \(lista JSON[^\n]*\n\s*(\[.*\])')
+
+def request_kind(body: Dict[str, Any]) -> str:
+    content = body["messages"][-1]["content"]
+    if isinstance(content, list):
+        return "vision"
+    return "classify_batch" if _BATCH_TEXTS_RE.search(content) else "classify"
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+class StubResponder:
+    """Respostas sintéticas e determinísticas por texto, com latência log-normal."""
+    def __init__(self, latency_p50: float = 0.2, latency_p95: float = 0.6, seed: int = 0):
+        self.mu = math.log(latency_p50)
+        self.sigma = max(0.0, (math.log(latency_p95) - self.mu) / 1.645)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def latency(self) -> float:
+        with self._lock:
+            return self._rng.lognormvariate(self.mu, self.sigma)
+
+    def respond(self, body: Dict[str, Any]) -> Tuple[str, Dict[str, int], float]:
+        kind = request_kind(body)
+        if kind == "vision":
+            url = body["messages"][-1]["content"][1]["image_url"]["url"]
+            content = self._vision(url)
+        elif kind == "classify_batch":
+            texts = json.loads(_BATCH_TEXTS_RE.search(body["messages"][-1]["content"]).group(1))
+            content = {"results": [{"id": item["id"], **self._classification(item["text"])} for item in texts]}
+        else:
+            content = self._classification(body["messages"][-1]["content"])
+        content = json.dumps(content, ensure_ascii=False)
+        prompt = "".join(m["content"] if isinstance(m["content"], str) else json.dumps(m["content"]) for m in body["messages"])
+        usage = {"prompt_tokens": estimate_tokens(prompt), "completion_tokens": estimate_tokens(content)}
+        return content, usage, self.latency()
+
+    @staticmethod
+    def _seed(text: str) -> random.Random:
+        return random.Random(hashlib.sha256(text.encode("utf-8")).digest())
+
+    def _classification(self, text: str) -> Dict[str, Any]:
+        rng = self._seed(text)
+        return {
+            "pain_point": {"label": rng.choice(["flacidez", "manchas", "rugas", "contorno"]), "confidence": 0.9},
+            "intent_stage": {"label": rng.choice(["awareness", "consideration", "decision"]), "confidence": 0.8},
+            "maturity": {"label": "advanced", "score": rng.randint(0, 100)},
+            "is_sp_region": rng.random() < 0.8,
+            "is_elite_neighborhood": rng.random() < 0.3,
+            "detected_location": "Itaim Bibi",
+            "scores": {**{k: rng.randint(0, 100) for k in ("fit", "intent", "urgency", "social_status_signal")}, "risk": rng.randint(0, 30)},
+            "subliminal_signals": [],
+            "evidence": [text[:40]],
+            "risk_flags": []
+        }
+
+    def _vision(self, url: str) -> Dict[str, Any]:
+        rng = self._seed(url)
+        return {
+            "visual_fit": rng.randint(0, 100),
+            "socioeconomic_tier": rng.choice(["VIP", "Platinum", "Gold", "Standard"]),
+            "detected_luxury_indicators": ["relógio"],
+            "justification": "Resposta sintética do benchmark offline"
+        }
+
+class StubLLMHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        try:
+            content, usage, latency = self.server.responder.respond(body)
+        except Exception as e:
+            self._send(502, {"error": {"message": str(e)}})
+            return
+        time.sleep(latency)
+        self.server.record(request_kind(body), usage)
+        self._send(200, {
+            "id": "chatcmpl-offline",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model"),
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+            "usage": {**usage, "total_tokens": usage["prompt_tokens"] + usage["completion_tokens"]}
+        })
+
+    def _send(self, status: int, payload: Dict[str, Any]):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+class StubLLMServer(ThreadingHTTPServer):
+    """Servidor OpenAI-compatível em thread própria; contabiliza requisições e tokens servidos."""
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, responder):
+        super().__init__(("127.0.0.1", 0), StubLLMHandler)
+        self.responder = responder
+        self._lock = threading.Lock()
+        self.counters = {"requests": 0, "prompt_tokens": 0, "completion_tokens": 0}
+        self.by_kind: Dict[str, int] = {}
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}/v1"
+
+    def record(self, kind: str, usage: Dict[str, int]):
+        with self._lock:
+            self.counters["requests"] += 1
+            self.counters["prompt_tokens"] += usage.get("prompt_tokens", 0)
+            self.counters["completion_tokens"] += usage.get("completion_tokens", 0)
+            self.by_kind[kind] = self.by_kind.get(kind, 0) + 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.counters, "by_kind": dict(self.by_kind)}
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
@@ -1,6 +1,10 @@
 from fastapi.testclient import TestClient
+from app.db.migrations import run_migrations
+from app.db.session import engine
 from app.main import app
 
+# Usa o sql_app.db de desenvolvimento: garante o schema atual, como `python init_db.py`
+run_migrations(engine)
 client = TestClient(app)
 
 def test_read_leads():
@@ -0,0 +1,136 @@
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import httpx
+import uvicorn
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.core.config import settings
+from app.db.session import get_db
+from app.main import app
+from app.models.models import Base
+from app.services import collector as collector_module
+from app.services import jobs as jobs_module
+from test_leads_pagination import clear_async_db_overrides, override_async_dbs
+
+FAKE_LLM_LATENCY = 1.5
+
+FAKE_COMPLETION = {
+    # Campos do IntentEngine.classify
+    "pain_point": {"label": "flacidez", "confidence": 0.9},
+    "intent_stage": {"label": "consideration", "confidence": 0.8},
+    "maturity": {"label": "advanced", "score": 80},
+    "is_sp_region": True,
+    "is_elite_neighborhood": True,
+    "detected_location": "Itaim Bibi",
+    "scores": {"fit": 80, "intent": 70, "urgency": 40, "risk": 5, "social_status_signal": 60},
+    "evidence": ["Ultraformer MPT no Itaim"],
+    "risk_flags": [],
+    # Campos do VisionEngine.analyze_profile_image
+    "visual_fit": 70,
+    "socioeconomic_tier": "Gold",
+    "detected_luxury_indicators": ["relógio"],
+    "justification": "Resposta do LLM fake"
+}
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    """Servidor local compatível com /chat/completions da OpenAI, com latência artificial."""
+    requests_served = 0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(FAKE_LLM_LATENCY)
+        FakeLLMHandler.requests_served += 1
+        body = json.dumps({
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": "fake-model",
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": json.dumps(FAKE_COMPLETION)}
+            }],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 10, "total_tokens": 20}
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def test_api_responsive_during_mission():
+    # 1. LLM fake local
+    llm_server = ThreadingHTTPServer(("127.0.0.1", free_port()), FakeLLMHandler)
+    threading.Thread(target=llm_server.serve_forever, daemon=True).start()
+
+    # 2. Banco temporário para a API e para a missão
+    db_path = os.path.join(tempfile.mkdtemp(), "test.db")
+    db_engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=db_engine)
+    TestSession = sessionmaker(autocommit=False, autoflush=False, bind=db_engine)
+
+    def override_get_db():
+        db = TestSession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    original = (settings.LLM_PROVIDER, settings.OPENROUTER_BASE_URL, settings.OPENROUTER_API_KEY,
+                settings.SERPER_API_KEY, settings.MISSION_EXECUTOR, collector_module.SessionLocal, jobs_module.SessionLocal)
+    settings.LLM_PROVIDER = "openrouter"
+    settings.OPENROUTER_BASE_URL = f"http://127.0.0.1:{llm_server.server_port}/v1"
+    settings.OPENROUTER_API_KEY = "fake-key"
+    settings.SERPER_API_KEY = ""
+    settings.MISSION_EXECUTOR = "inline"  # missão roda no próprio processo da API
+    collector_module.SessionLocal = jobs_module.SessionLocal = TestSession
+    app.dependency_overrides[get_db] = override_get_db
+    override_async_dbs(db_engine)
+
+    # 3. API real (uvicorn) em thread separada
+    api_port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=api_port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    try:
+        while not server.started:
+            time.sleep(0.05)
+
+        base = f"http://127.0.0.1:{api_port}/api/v1"
+        with httpx.Client(timeout=30) as client:
+            assert client.post(f"{base}/mission/run").status_code == 200
+
+            # 4. Enquanto a missão aguarda o LLM, /leads deve continuar respondendo rápido
+            latencies = []
+            deadline = time.monotonic() + 1.0 + FAKE_LLM_LATENCY * 2
+            while time.monotonic() < deadline:
+                start = time.monotonic()
+                assert client.get(f"{base}/leads/").status_code == 200
+                latencies.append(time.monotonic() - start)
+                time.sleep(0.05)
+
+        assert FakeLLMHandler.requests_served > 0, "a missão deveria ter chamado o LLM fake"
+        assert max(latencies) < FAKE_LLM_LATENCY / 3, f"event loop bloqueado: {max(latencies):.2f}s"
+        print(f"/leads respondeu em no máximo {max(latencies) * 1000:.0f}ms com missão em andamento")
+    finally:
+        server.should_exit = True
+        llm_server.shutdown()
+        app.dependency_overrides.pop(get_db, None)
+        clear_async_db_overrides()
+        (settings.LLM_PROVIDER, settings.OPENROUTER_BASE_URL, settings.OPENROUTER_API_KEY,
+         settings.SERPER_API_KEY, settings.MISSION_EXECUTOR, collector_module.SessionLocal, jobs_module.SessionLocal) = original
+
+if __name__ == "__main__":
+    test_api_responsive_during_mission()
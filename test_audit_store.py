@@ -0,0 +1,163 @@
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+from app.core.config import settings
+from app.db.audit_store import AuditStore, compact_audit_record, import_audit_logs, lead_digest, reconcile_audit_outbox
+from app.db.batch_writer import LeadBatchWriter
+from app.models.models import AuditLog, AuditOutbox, Lead
+from test_batch_writer import make_session_factory, make_record
+
+def make_analysis_record(i: int):
+    # Mesmo formato que SignalsCollector._build_record produz
+    scores = {"fit": 80, "intent": 70, "urgency": 60, "social_status_signal": 50, "risk": 5,
+              "visual_fit": 90, "visual_justification": "Relógio de luxo", "lead_score": 70.0 + i}
+    labels = {"pain_point": "flacidez", "intent_stage": "decision", "maturity": "advanced",
+              "visual_profile": ["relógio"], "tier": "VIP"}
+    classification = {
+        "pain_point": {"label": "flacidez", "confidence": 0.9},
+        "intent_stage": {"label": "decision", "confidence": 0.8},
+        "maturity": {"label": "advanced", "score": 77},
+        "is_sp_region": True, "detected_location": "Itaim Bibi",
+        "scores": scores, "evidence": ["quero ultraformer"], "risk_flags": []
+    }
+    visual = {"visual_fit": 90, "attributes": ["relógio"], "justification": "Relógio de luxo", "tier": "VIP"}
+    lead = {"clinic_id": 1, "scores": scores, "labels": labels, "evidence_snippets": ["quero ultraformer"]}
+    audit = {"event": "lead_qualification", "actor": "AI_Agent_Tier1", "model_version": "m", "prompt_version": "p",
+             "payload": {"text_analysis": classification, "visual_analysis": visual, "final_score": scores["lead_score"]}}
+    return lead, audit
+
+def test_compact_record_references_lead():
+    lead, audit = make_analysis_record(0)
+    record = compact_audit_record(audit, 7, lead)
+    assert record["lead_id"] == 7 and record["final_score"] == 70.0 and record["tier"] == "VIP"
+    assert record["lead_digest"] == lead_digest(lead["scores"], lead["labels"], lead["evidence_snippets"])
+    text = record["payload"]["text_analysis"]
+    # O que já está no lead sai; o que só a análise tem (confianças, geolocalização) fica
+    assert "scores" not in text and "evidence" not in text and "visual_analysis" not in record["payload"]
+    assert text["pain_point"] == {"confidence": 0.9} and text["maturity"] == {"score": 77}
+    assert text["detected_location"] == "Itaim Bibi"
+    print("Registro compacto referencia o lead OK")
+
+def test_rotation_and_range_scan():
+    store = AuditStore(tempfile.mkdtemp(), segment_max_bytes=2048)
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    for batch in range(20):
+        records = []
+        for i in range(batch * 10, batch * 10 + 10):
+            lead, audit = make_analysis_record(i)
+            records.append(compact_audit_record(audit, i + 1, lead, ts=start + timedelta(hours=i)))
+        store.append(records)
+
+    segments = store.segments()
+    assert len(segments) > 1 and sum(s["records"] for s in segments) == 200
+    assert all(os.path.getsize(s["path"]) <= 2048 for s in segments)
+    assert [r["lead_id"] for r in store.scan(lead_from=41, lead_to=55)] == list(range(41, 56))
+    window = list(store.scan(since=start + timedelta(hours=100), until=start + timedelta(hours=110)))
+    assert [r["lead_id"] for r in window] == list(range(101, 111))
+    assert [r["final_score"] for r in store.history(3)] == [72.0]
+
+    # Linha de índice truncada (queda no meio da gravação) é ignorada
+    with open(segments[-1]["index_path"], "a") as f:
+        f.write('{"offset": 12')
+    assert sum(1 for _ in store.scan()) == 200
+    print("Rotação por tamanho e consultas por faixa OK")
+
+def test_retention_drops_whole_segments():
+    store = AuditStore(tempfile.mkdtemp(), retention_days=30)
+    lead, audit = make_analysis_record(0)
+    old = datetime.now(timezone.utc) - timedelta(days=90)
+    store.append([compact_audit_record(audit, 1, lead, ts=old)])
+    store._segment = None  # próximo lote em segmento novo
+    store.append([compact_audit_record(audit, 2, lead)])
+
+    removed = store.apply_retention()
+    assert removed["segments"] == 1 and removed["records"] == 1
+    assert [r["lead_id"] for r in store.scan()] == [2]
+    assert len(os.listdir(store.path)) == 2  # segmento + índice restantes
+    print("Retenção apaga segmentos antigos inteiros OK")
+
+def test_import_legacy_audit_logs():
+    engine, factory = make_session_factory()
+    original = settings.AUDIT_STORE_ENABLED
+    settings.AUDIT_STORE_ENABLED = False
+    try:
+        writer = LeadBatchWriter(factory, batch_size=20, flush_interval=3600)
+        for i in range(45):
+            writer.add(make_record(i))
+        writer.close()
+    finally:
+        settings.AUDIT_STORE_ENABLED = original
+
+    db = factory()
+    try:
+        assert db.query(AuditLog).count() == 45
+        store = AuditStore(tempfile.mkdtemp())
+        assert import_audit_logs(engine, store, batch_size=20) == 45
+        assert db.query(AuditLog).count() == 0
+        lead = db.query(Lead).filter(Lead.id == 10).one()
+        record = store.history(10)[0]
+        assert record["final_score"] == lead.scores["lead_score"] and record["event"] == "lead_qualification"
+        assert record["lead_digest"] == lead_digest(lead.scores, lead.labels, lead.evidence_snippets)
+    finally:
+        db.close()
+    print("Importação de audit_logs antigos OK")
+
+def test_store_failure_falls_back_to_table():
+    _, factory = make_session_factory()
+    store = AuditStore(tempfile.mkdtemp())
+    store.path = os.path.join(store.path, "inexistente")  # append falha
+    writer = LeadBatchWriter(factory, batch_size=10, flush_interval=3600, audit_store=store)
+    for i in range(10):
+        writer.add(make_record(i))
+    results = writer.close()
+
+    db = factory()
+    try:
+        # Leads gravados uma vez só (sem regravação do lote) e auditoria na tabela antiga
+        assert len(results) == 10 and db.query(Lead).count() == 10
+        assert sorted(a.payload["lead_id"] for a in db.query(AuditLog)) == [r["lead_id"] for r in results]
+    finally:
+        db.close()
+    print("Falha do store cai para audit_logs OK")
+
+def test_reconcile_outbox_after_crash():
+    engine, factory = make_session_factory()
+    store = AuditStore(tempfile.mkdtemp())
+    # Queda antes do close: o lote chegou ao store, mas a linha da outbox ficou
+    writer = LeadBatchWriter(factory, batch_size=10, flush_interval=3600, audit_store=store)
+    for i in range(10):
+        writer.add(make_record(i))
+    writer.flush()
+    # Queda logo depois do commit: os leads estão no banco, a auditoria não chegou ao store
+    writer = LeadBatchWriter(factory, batch_size=10, flush_interval=3600, audit_store=store)
+    writer._append_audit = lambda *args: None
+    for i in range(10, 20):
+        writer.add(make_record(i))
+    writer.flush()
+
+    db = factory()
+    try:
+        assert db.query(AuditOutbox).count() == 2
+        assert sum(segment["records"] for segment in store.segments()) == 10
+    finally:
+        db.close()
+
+    assert reconcile_audit_outbox(engine, store) == {"batches": 0, "records": 0, "skipped": 0}  # lotes recentes
+    totals = reconcile_audit_outbox(engine, store, min_age_seconds=0)
+    assert totals == {"batches": 2, "records": 10, "skipped": 10}
+    db = factory()
+    try:
+        assert db.query(AuditOutbox).count() == 0
+        lead_ids = sorted(r["lead_id"] for r in store.scan())
+        assert lead_ids == sorted(lead.id for lead in db.query(Lead))  # cada lead uma vez
+    finally:
+        db.close()
+    print("Outbox da auditoria reconciliada após queda OK")
+
+if __name__ == "__main__":
+    test_compact_record_references_lead()
+    test_rotation_and_range_scan()
+    test_retention_drops_whole_segments()
+    test_import_legacy_audit_logs()
+    test_store_failure_falls_back_to_table()
+    test_reconcile_outbox_after_crash()
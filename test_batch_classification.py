@@ -0,0 +1,114 @@
+import asyncio
+import json
+import re
+from types import SimpleNamespace
+from app.core.config import settings
+from app.services import rate_limiter
+from app.services.engine import IntentEngine, is_valid_classification
+from test_classification_cache import LLM_RESPONSE
+from test_concurrent_pipeline import make_collector, make_signals
+from test_streaming_pipeline import SIGNALS_PER_QUERY, patch_fetch, run_streaming
+
+BATCH_PAYLOAD_RE = re.compile(r'^\s*(\[\{"id".*\}\])\s*$', re.MULTILINE)
+
+class FakeBatchIntentEngine(IntentEngine):
+    """Responde prompts single e batch; textos com MALFORMED/MISSING simulam respostas ruins no lote."""
+    def __init__(self):
+        super().__init__(provider="openai", model_name="fake-model", use_cache=False)
+        self.prompts = []
+
+    @property
+    def client(self):
+        async def create(model, messages, **kwargs):
+            prompt = messages[-1]["content"]
+            self.prompts.append(prompt)
+            match = BATCH_PAYLOAD_RE.search(prompt)
+            if match:
+                results = []
+                for item in json.loads(match.group(1)):
+                    if "MISSING" in item["text"]:
+                        continue
+                    entry = {**LLM_RESPONSE, "id": item["id"], "evidence": [item["text"]]}
+                    if "MALFORMED" in item["text"]:
+                        del entry["scores"]
+                    results.append(entry)
+                content = json.dumps({"results": results[::-1]})  # ordem embaralhada de propósito
+            else:
+                content = json.dumps({**LLM_RESPONSE, "evidence": ["single"]})
+            message = SimpleNamespace(content=content)
+            usage = SimpleNamespace(prompt_tokens=100, completion_tokens=50)
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+        return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+def test_batch_packs_texts_and_keeps_order():
+    engine = FakeBatchIntentEngine()
+    texts = [f"texto {i}" for i in range(10)]
+
+    results = asyncio.run(engine.classify_batch(texts, batch_size=4))
+
+    assert engine.usage["requests"] == 3
+    assert [r["evidence"][0] for r in results] == texts
+    assert all(is_valid_classification(r) and "lead_score" in r["scores"] for r in results)
+    print("Lote com ordem preservada OK")
+
+def test_malformed_items_fall_back_to_single_calls():
+    engine = FakeBatchIntentEngine()
+    texts = ["texto 0", "texto MALFORMED", "texto 2", "texto MISSING", "texto 4"]
+
+    acquired = []
+
+    class CountingLimiter:
+        async def acquire(self):
+            acquired.append(1)
+
+    original = rate_limiter._limiters.get("openai")
+    rate_limiter._limiters["openai"] = CountingLimiter()
+    try:
+        results = asyncio.run(engine.classify_batch(texts, batch_size=5))
+    finally:
+        rate_limiter._limiters.pop("openai")
+        if original is not None:
+            rate_limiter._limiters["openai"] = original
+
+    assert engine.usage["requests"] == 1 + 2
+    assert len(acquired) == 2  # reclassificações individuais passam pelo limitador
+    assert engine.usage["batch_fallbacks"] == 2
+    assert [r["evidence"][0] for r in results] == ["texto 0", "single", "texto 2", "single", "texto 4"]
+    print("Fallback individual para itens malformados OK")
+
+def test_collector_batch_mode():
+    collector = make_collector()
+    collector.engine = FakeBatchIntentEngine()
+    original = (settings.LLM_BATCH_MODE, settings.LLM_BATCH_SIZE)
+    settings.LLM_BATCH_MODE, settings.LLM_BATCH_SIZE = True, 8
+    try:
+        results = asyncio.run(collector.process_and_save_signals(make_signals(20)))
+    finally:
+        settings.LLM_BATCH_MODE, settings.LLM_BATCH_SIZE = original
+
+    assert len(results) == 20
+    assert collector.engine.usage["requests"] == 3
+    print("Modo batch no collector OK (20 sinais em 3 requisições)")
+
+def test_streaming_batch_mode():
+    collector = make_collector()
+    collector.engine = FakeBatchIntentEngine()
+    patch_fetch(collector, fetch_latency=0.01)
+    original = (settings.LLM_BATCH_MODE, settings.LLM_BATCH_SIZE)
+    settings.LLM_BATCH_MODE, settings.LLM_BATCH_SIZE = True, 8
+    try:
+        results = run_streaming(collector, [f"query_{i}" for i in range(4)], max_concurrency=2)
+    finally:
+        settings.LLM_BATCH_MODE, settings.LLM_BATCH_SIZE = original
+
+    batch_prompts = [p for p in collector.engine.prompts if BATCH_PAYLOAD_RE.search(p)]
+    assert len(results) == 4 * SIGNALS_PER_QUERY
+    assert collector.engine.usage["requests"] == len(batch_prompts) < len(results)
+    assert all(len(json.loads(BATCH_PAYLOAD_RE.search(p).group(1))) <= 8 for p in batch_prompts)
+    print(f"Modo batch no streaming OK ({len(results)} sinais em {len(batch_prompts)} requisições)")
+
+if __name__ == "__main__":
+    test_batch_packs_texts_and_keeps_order()
+    test_malformed_items_fall_back_to_single_calls()
+    test_collector_batch_mode()
+    test_streaming_batch_mode()
@@ -0,0 +1,118 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from app.db.audit_store import AuditStore
+from app.db.batch_writer import LeadBatchWriter
+from app.models.models import Base, Lead, SourceItem, AuditLog, AuditOutbox
+
+def make_session_factory():
+    db_path = os.path.join(tempfile.mkdtemp(), "test.db")
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def make_record(i: int):
+    return {
+        "source_item": {"source": "instagram", "url": f"https://instagram.com/p/{i}", "author_handle": f"@lead_{i}",
+                        "text": f"texto {i}", "timestamp": datetime.now(), "raw_metadata": {}},
+        "lead": {"clinic_id": 1, "scores": {"lead_score": float(i)}, "labels": {"tier": "Standard"},
+                 "evidence_snippets": [], "status": "pending"},
+        "audit": {"event": "lead_qualification", "actor": "test", "payload": {"final_score": float(i)}}
+    }
+
+def test_one_commit_per_batch():
+    engine, factory = make_session_factory()
+    commits = []
+    event.listen(engine, "commit", lambda conn: commits.append(1))
+
+    store = AuditStore(tempfile.mkdtemp())
+    writer = LeadBatchWriter(factory, batch_size=50, flush_interval=3600, audit_store=store)
+    for i in range(120):
+        writer.add(make_record(i))
+    results = writer.close()
+
+    assert len(results) == 120
+    assert len(commits) == 4  # um por lote + a limpeza da outbox do último lote no close
+    db = factory()
+    try:
+        assert db.query(SourceItem).count() == db.query(Lead).count() == 120
+        assert db.query(AuditLog).count() == 0  # auditoria fora do banco principal
+        assert db.query(AuditOutbox).count() == 0  # todos os lotes chegaram ao store
+        # Auditoria referencia o lead gravado no mesmo lote
+        lead = db.query(Lead).order_by(Lead.id.desc()).first()
+        assert [a["final_score"] for a in store.history(lead.id)] == [lead.scores["lead_score"]]
+        assert sum(segment["records"] for segment in store.segments()) == 120
+        assert [r["score"] for r in results] == [float(i) for i in range(120)]
+    finally:
+        db.close()
+    print("Um commit por lote OK")
+
+def test_bad_record_does_not_roll_back_batch():
+    _, factory = make_session_factory()
+    writer = LeadBatchWriter(factory, batch_size=10, flush_interval=3600)
+    for i in range(10):
+        record = make_record(i)
+        if i == 4:
+            record["lead"]["unknown_column"] = True
+        writer.add(record)
+    results = writer.close()
+
+    assert len(results) == 9
+    assert writer.failed == 1
+    db = factory()
+    try:
+        assert db.query(Lead).count() == 9
+        assert db.query(SourceItem).count() == 9
+    finally:
+        db.close()
+    print("Falha isolada por registro OK")
+
+def test_flush_by_time_window():
+    _, factory = make_session_factory()
+    writer = LeadBatchWriter(factory, batch_size=1000, flush_interval=0)
+    writer.add(make_record(1))
+    assert len(writer.results) == 1
+    print("Flush por janela de tempo OK")
+
+def test_async_flush_runs_off_the_event_loop():
+    _, factory = make_session_factory()
+    writer = LeadBatchWriter(factory, batch_size=10, flush_interval=3600, audit_store=AuditStore(tempfile.mkdtemp()))
+    write, threads = writer._write, []
+
+    def slow_write(batch):
+        threads.append(threading.get_ident())
+        time.sleep(0.2)  # commit + fsync lentos
+        return write(batch)
+    writer._write = slow_write
+
+    async def run():
+        ticks = []
+
+        async def ticker():
+            while True:
+                ticks.append(time.perf_counter())
+                await asyncio.sleep(0.01)
+        task = asyncio.create_task(ticker())
+        await asyncio.sleep(0.02)
+        for i in range(25):
+            await writer.aadd(make_record(i))
+        results = await writer.aclose()
+        task.cancel()
+        return results, max(b - a for a, b in zip(ticks, ticks[1:]))
+
+    results, max_gap = asyncio.run(run())
+    assert len(results) == 25 and len(threads) == 3
+    assert threading.get_ident() not in threads
+    assert max_gap < 0.15, max_gap  # com o flush no loop, o ticker pararia 0,2s por lote
+    print("Flush assíncrono fora do loop de eventos OK")
+
+if __name__ == "__main__":
+    test_one_commit_per_batch()
+    test_bad_record_does_not_roll_back_batch()
+    test_flush_by_time_window()
+    test_async_flush_runs_off_the_event_loop()
@@ -0,0 +1,151 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+from app.services.cache import ClassificationCache
+from app.services.engine import IntentEngine, PROMPT_VERSION
+
+LLM_RESPONSE = {
+    "pain_point": {"label": "flacidez", "confidence": 0.9},
+    "intent_stage": {"label": "consideration", "confidence": 0.8},
+    "maturity": {"label": "advanced", "score": 80},
+    "is_sp_region": True,
+    "is_elite_neighborhood": False,
+    "scores": {"fit": 80, "intent": 70, "urgency": 40, "risk": 5, "social_status_signal": 60},
+    "evidence": ["Ultraformer"],
+    "risk_flags": []
+}
+
+def temp_cache(**kwargs) -> ClassificationCache:
+    return ClassificationCache(path=os.path.join(tempfile.mkdtemp(), "cache.db"), **kwargs)
+
+class CountingIntentEngine(IntentEngine):
+    """IntentEngine com um cliente LLM fake que conta as chamadas."""
+    def __init__(self, cache):
+        super().__init__(provider="openai", model_name="fake-model", cache=cache)
+        self.calls = 0
+
+    @property
+    def client(self):
+        async def create(**kwargs):
+            self.calls += 1
+            message = SimpleNamespace(content=json.dumps(LLM_RESPONSE))
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+        return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+def test_key_uses_normalized_text_model_and_prompt_version():
+    key = ClassificationCache.make_key("Quero  Ultraformer\n no Itaim ", "gpt-4o", "v1")
+    assert key == ClassificationCache.make_key("quero ultraformer no itaim", "gpt-4o", "v1")
+    assert key != ClassificationCache.make_key("quero ultraformer no itaim", "gpt-4o-mini", "v1")
+    assert key != ClassificationCache.make_key("quero ultraformer no itaim", "gpt-4o", "v2")
+    print("Chave de cache OK")
+
+def test_persistence_ttl_and_eviction():
+    cache = temp_cache(ttl_seconds=3600, max_entries=3, memory_entries=0)
+    for i in range(4):
+        cache.set(f"k{i}", {"i": i})
+        time.sleep(0.01)
+    assert len(cache) == 3
+    assert cache.get("k0") is None  # mais antigo foi removido
+    assert cache.get("k3") == {"i": 3}
+
+    # Nova instância no mesmo arquivo enxerga os dados persistidos
+    reopened = ClassificationCache(path=cache.path, ttl_seconds=3600, max_entries=3)
+    assert reopened.get("k3") == {"i": 3}
+
+    expiring = temp_cache(ttl_seconds=0.05)
+    expiring.set("k", {"v": 1})
+    time.sleep(0.1)
+    assert expiring.get("k") is None
+    assert len(expiring) == 0
+    print("Persistência, TTL e evicção OK")
+
+def test_memory_layer_counts_hits():
+    cache = temp_cache(memory_entries=10)
+    cache.set("k", {"v": 1})
+    assert cache.get("k") == {"v": 1}
+    assert cache.get("missing") is None
+    assert cache.stats.snapshot() == {"hits": 1, "memory_hits": 1, "misses": 1}
+    print("Camada LRU em memória OK")
+
+def test_hits_batch_access_updates_and_keep_hot_keys():
+    cache = temp_cache(ttl_seconds=3600, max_entries=3, memory_entries=10)
+    for i in range(3):
+        cache.set(f"k{i}", {"i": i})
+        time.sleep(0.01)
+
+    changes = cache._conn.total_changes
+    for _ in range(50):
+        assert cache.get("k0") == {"i": 0}  # acertos da camada em memória
+    assert cache._conn.total_changes == changes  # nenhuma escrita por acerto
+
+    # k0 é o mais quente: a evicção remove k1, não k0
+    cache.set("k3", {"i": 3})
+    assert cache.get("k0") == {"i": 0}
+    assert cache.get("k1") is None
+
+    cache.get("k2")
+    cache.flush()
+    last_access = dict(cache._conn.execute("SELECT key, last_access FROM classification_cache"))
+    assert last_access["k2"] >= last_access["k3"]
+    print("Acessos gravados em lote e LRU com acertos em memória OK")
+
+def test_engine_reuses_cached_classification():
+    cache = temp_cache()
+    engine = CountingIntentEngine(cache)
+
+    first = asyncio.run(engine.classify("Moro no Itaim e quero Ultraformer MPT"))
+    second = asyncio.run(engine.classify("moro no itaim e quero ultraformer mpt  "))
+
+    assert engine.calls == 1
+    assert second["scores"]["lead_score"] == first["scores"]["lead_score"]
+    assert cache.stats.hits == 1 and cache.stats.misses == 1
+    assert engine.prompt_version == PROMPT_VERSION
+    print("IntentEngine reaproveita classificação cacheada OK")
+
+class SlowCommitCache(ClassificationCache):
+    """Cache cujo set demora (fsync lento) e guarda em que thread rodou."""
+    def set_many(self, items):
+        self.set_threads = getattr(self, "set_threads", []) + [threading.get_ident()]
+        time.sleep(0.2)
+        super().set_many(items)
+
+def test_engine_keeps_sqlite_off_the_event_loop():
+    cache = SlowCommitCache(path=os.path.join(tempfile.mkdtemp(), "cache.db"))
+    engine = CountingIntentEngine(cache)
+
+    async def run():
+        ticks = []
+
+        async def ticker():
+            while True:
+                ticks.append(time.perf_counter())
+                await asyncio.sleep(0.01)
+        task = asyncio.create_task(ticker())
+        await asyncio.sleep(0.02)
+        results = await asyncio.gather(
+            engine.classify("Moro no Itaim e quero Ultraformer MPT"),
+            engine.classify_batch(["Quero Morpheus em Moema", "Sou de Osasco, quero botox"])
+        )
+        task.cancel()
+        return results, max(b - a for a, b in zip(ticks, ticks[1:]))
+
+    loop_thread = threading.get_ident()
+    (single, batch), max_gap = asyncio.run(run())
+    assert single["scores"]["lead_score"] > 0 and len(batch) == 2
+    # Sets de 0,2s: no loop, o ticker ficaria parado; em thread, segue a cada ~10ms
+    assert max_gap < 0.15, max_gap
+    assert len(cache) == 3 and loop_thread not in cache.set_threads
+    assert asyncio.run(cache.aget(cache.make_key("Moro no Itaim e quero Ultraformer MPT", "fake-model", PROMPT_VERSION)))
+    print("SQLite do cache fora do loop de eventos OK")
+
+if __name__ == "__main__":
+    test_key_uses_normalized_text_model_and_prompt_version()
+    test_persistence_ttl_and_eviction()
+    test_memory_layer_counts_hits()
+    test_hits_batch_access_updates_and_keep_hot_keys()
+    test_engine_reuses_cached_classification()
+    test_engine_keeps_sqlite_off_the_event_loop()
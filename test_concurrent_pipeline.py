@@ -0,0 +1,113 @@
+import asyncio
+import os
+import random
+import string
+import tempfile
+import time
+from datetime import datetime
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.models.models import Base, Lead, SourceItem
+from app.services.collector import SignalsCollector
+from app.services.rate_limiter import RateLimiter
+
+LLM_LATENCY = 0.2
+
+class FakeIntentEngine:
+    """Simula um LLM com latência fixa e registra o pico de chamadas simultâneas."""
+    provider = "fake"
+    model_name = "fake-model"
+    prompt_version = "test"
+    cache = None
+
+    def __init__(self, latency: float = LLM_LATENCY):
+        self.latency = latency
+        self.in_flight = 0
+        self.peak = 0
+        self.calls = 0
+
+    async def classify(self, text: str):
+        self.calls += 1
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        # Latências diferentes para que a ordem de término não coincida com a de entrada
+        await asyncio.sleep(self.latency * (1 + (hash(text) % 3) / 10))
+        self.in_flight -= 1
+        return {
+            "pain_point": {"label": text, "confidence": 0.9},
+            "intent_stage": {"label": "consideration", "confidence": 0.8},
+            "maturity": {"label": "advanced", "score": 80},
+            "scores": {"fit": 80, "intent": 70, "urgency": 50, "risk": 0, "social_status_signal": 60},
+            "evidence": [text],
+            "risk_flags": []
+        }
+
+def make_collector(latency: float = LLM_LATENCY):
+    db_path = os.path.join(tempfile.mkdtemp(), "test.db")
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    collector = SignalsCollector(session_factory=sessionmaker(autocommit=False, autoflush=False, bind=engine))
+    collector.engine = FakeIntentEngine(latency)
+    return collector
+
+def unique_words(seed: int) -> str:
+    rng = random.Random(seed)
+    return " ".join("".join(rng.choice(string.ascii_lowercase) for _ in range(6)) for _ in range(12))
+
+def make_signals(n: int):
+    # Textos distintos o suficiente para não serem descartados pela deduplicação
+    return [{
+        "source": "instagram",
+        "url": f"https://www.instagram.com/p/{i}",
+        "author_handle": f"@lead_{i}",
+        "text": f"Quero Ultraformer MPT no Itaim, ref {unique_words(i)}",
+        "timestamp": datetime.now(),
+        "raw_metadata": {}
+    } for i in range(n)]
+
+def test_concurrent_processing_is_bounded_and_fast():
+    collector = make_collector()
+    signals = make_signals(20)
+
+    start = time.monotonic()
+    results = asyncio.run(collector.process_and_save_signals(signals, max_concurrency=10))
+    elapsed = time.monotonic() - start
+
+    assert len(results) == 20
+    assert collector.engine.peak == 10
+    # Duas "ondas" de 10 chamadas, muito abaixo de 20 x latência
+    assert elapsed < LLM_LATENCY * 20 / 2
+    print(f"20 sinais em {elapsed:.2f}s (pico de {collector.engine.peak} chamadas simultâneas)")
+
+def test_results_persisted_in_input_order():
+    collector = make_collector()
+    signals = make_signals(12)
+
+    results = asyncio.run(collector.process_and_save_signals(signals))
+
+    db = collector.session_factory()
+    try:
+        rows = db.query(Lead, SourceItem).join(SourceItem, Lead.source_item_id == SourceItem.id).order_by(Lead.id).all()
+        assert [source.author_handle for _, source in rows] == [s["author_handle"] for s in signals]
+        assert [r["lead_id"] for r in results] == [lead.id for lead, _ in rows]
+    finally:
+        db.close()
+    print("Ordem de persistência determinística OK")
+
+def test_rate_limiter_spaces_requests():
+    limiter = RateLimiter(rate=20.0, burst=1)
+
+    async def fire(n):
+        start = time.monotonic()
+        await asyncio.gather(*[limiter.acquire() for _ in range(n)])
+        return time.monotonic() - start
+
+    elapsed = asyncio.run(fire(5))
+    # 5 requisições a 20 req/s sem rajada: ~4 intervalos de 50ms
+    assert elapsed >= 0.19
+    print(f"Rate limiter OK ({elapsed:.2f}s para 5 requisições a 20 req/s)")
+
+if __name__ == "__main__":
+    test_concurrent_processing_is_bounded_and_fast()
+    test_results_persisted_in_input_order()
+    test_rate_limiter_spaces_requests()
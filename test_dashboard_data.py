@@ -0,0 +1,62 @@
+from datetime import datetime
+from sqlalchemy import event
+from app.db.batch_writer import LeadBatchWriter
+from app.models.models import Lead
+from app.services.dashboard_data import get_summary, get_lead_page
+from test_batch_writer import make_session_factory, make_record
+
+def populate(factory, n: int):
+    writer = LeadBatchWriter(factory, batch_size=100, flush_interval=3600)
+    for i in range(n):
+        record = make_record(i)
+        record["source_item"]["raw_metadata"] = {"author_image": f"https://img/{i}.jpg"}
+        writer.add(record)
+    writer.close()
+
+def count_queries(engine, fn):
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        result = fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    return result, len(statements)
+
+def test_constant_query_count():
+    for n_leads in (10, 300):
+        engine, factory = make_session_factory()
+        populate(factory, n_leads)
+        with factory() as db:
+            summary, summary_queries = count_queries(engine, lambda: get_summary(db))
+            page, page_queries = count_queries(engine, lambda: get_lead_page(db, page=1, page_size=200))
+
+        assert summary["total_leads"] == n_leads
+        assert len(page) == min(n_leads, 200)
+        assert (summary_queries, page_queries) == (1, 1)
+
+    # Página já vem com os dados do SourceItem (JOIN) e ordenada por score
+    top = page[0]
+    assert top["lead_score"] == 299.0 and top["is_vip"]
+    assert top["author_handle"] == "@lead_299" and top["text"] == "texto 299"
+    assert top["author_image"] == "https://img/299.jpg"
+    print("Consultas constantes por render OK")
+
+def test_version_changes_when_leads_change():
+    _, factory = make_session_factory()
+    populate(factory, 5)
+    with factory() as db:
+        before = get_summary(db)["version"]
+        lead = db.get(Lead, 1)
+        lead.status = "approved"
+        db.commit()
+        after_status = get_summary(db)["version"]
+        db.add(Lead(clinic_id=1, scores={"lead_score": 1.0}, labels={}, created_at=datetime.now()))
+        db.commit()
+        after_insert = get_summary(db)["version"]
+    assert len({before, after_status, after_insert}) == 3
+    print("Versão de cache invalidada por novos leads/status OK")
+
+if __name__ == "__main__":
+    test_constant_query_count()
+    test_version_changes_when_leads_change()
@@ -0,0 +1,91 @@
+import asyncio
+import subprocess
+import sys
+from app.db.migrations import backfill_source_fingerprints
+from app.models.models import Lead, SourceItem
+from app.services.dedup import TextNormalizer
+from test_concurrent_pipeline import make_collector, make_signals
+
+ORIGINAL = "Meninas, fiz o Ultraformer MPT no Itaim e amei o resultado! Alguém já testou o Morpheus 8 para papada? Quero muito fazer na Clínica Mais."
+NEAR_COPY = "Meninas fiz o Ultraformer MPT no Itaim e amei o resultado!! Alguém já testou o Morpheus 8 pra papada? Quero muito fazer na Clínica Mais"
+DIFFERENT = "Moro em Alphaville e estou procurando uma clínica que tenha o Lavieen original. Ouvi dizer que a Clínica Mais no Itaim é a melhor de SP."
+
+def test_normalize():
+    normalizer = TextNormalizer()
+    assert normalizer.normalize("  Olá,   MUNDO!! https://x.com/abc \n") == "olá mundo"
+    assert normalizer.text_hash("Botox  no Itaim") == normalizer.text_hash("botox no itaim!")
+    print("Normalização OK")
+
+def test_exact_and_near_duplicates():
+    normalizer = TextNormalizer()
+    assert normalizer.check_and_add(ORIGINAL) is False
+    assert normalizer.is_duplicate(normalizer.text_hash(ORIGINAL.upper()))
+    assert normalizer.check_and_add(ORIGINAL.upper()) is True
+    assert normalizer.check_and_add(NEAR_COPY) is True
+    assert normalizer.check_and_add(DIFFERENT) is False
+    print("Dedup exato e quase-duplicatas OK")
+
+def test_rerun_skips_duplicates_before_classification():
+    collector = make_collector()
+    signals = make_signals(5)
+
+    first = asyncio.run(collector.process_and_save_signals(signals))
+    second = asyncio.run(collector.process_and_save_signals(make_signals(5)))
+
+    assert len(first) == 5
+    assert second == []
+    assert collector.mission_stats["duplicates_skipped"] == 5
+    assert collector.engine.calls == 5  # nenhuma chamada ao LLM na segunda execução
+
+    db = collector.session_factory()
+    try:
+        assert db.query(SourceItem).count() == 5
+        assert db.query(Lead).count() == 5
+    finally:
+        db.close()
+    print("Reexecução da missão não duplica leads OK")
+
+def test_index_loads_stored_fingerprints():
+    collector = make_collector()
+    asyncio.run(collector.process_and_save_signals(make_signals(5)))
+
+    db = collector.session_factory()
+    try:
+        # Item antigo, gravado antes da impressão digital existir
+        db.add(SourceItem(source="instagram", url="https://x", author_handle="@old", text=DIFFERENT))
+        db.commit()
+        assert db.query(SourceItem).filter(SourceItem.minhash.isnot(None)).count() == 5
+    finally:
+        db.close()
+
+    calls = []
+    original = TextNormalizer.minhash
+    TextNormalizer.minhash = lambda self, text: calls.append(text) or original(self, text)
+    try:
+        normalizer = collector._load_normalizer()
+        assert calls == [DIFFERENT]  # só o item sem impressão digital é recalculado
+        assert normalizer.check_and_add(make_signals(5)[0]["text"]) is True
+        assert normalizer.check_and_add(NEAR_COPY.replace("Meninas", "Gente")) is False
+
+        assert backfill_source_fingerprints(collector.session_factory.kw["bind"]) == 1
+        calls.clear()
+        collector._load_normalizer()
+        assert calls == []
+    finally:
+        TextNormalizer.minhash = original
+    print("Índice de duplicatas carregado das impressões digitais gravadas OK")
+
+def test_migrations_do_not_import_the_collector():
+    # Interpretador novo: neste processo os testes já importaram o coletor
+    code = ("import sys, app.db.migrations; "
+            "print(any(m in sys.modules for m in ('app.services.collector', 'app.services.engine', 'httpx')))")
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "False"
+    print("Migrações sem dependência do coletor/LLM OK")
+
+if __name__ == "__main__":
+    test_normalize()
+    test_exact_and_near_duplicates()
+    test_rerun_skips_duplicates_before_classification()
+    test_index_loads_stored_fingerprints()
+    test_migrations_do_not_import_the_collector()
@@ -0,0 +1,64 @@
+import os
+import tempfile
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.db.migrations import run_migrations
+from app.models.models import Lead, SourceItem
+from generate_viz import generate_html_report, page_path
+
+def make_db(n_leads: int, evil_first: bool = False) -> str:
+    db_path = os.path.join(tempfile.mkdtemp(), "report.db")
+    engine = create_engine(f"sqlite:///{db_path}")
+    run_migrations(engine)
+    db = sessionmaker(bind=engine)()
+    for i in range(n_leads):
+        item = SourceItem(source="instagram", url=f"https://instagram.com/p/{i}", author_handle=f"@lead_{i}",
+                          text=f"texto {i}", raw_metadata={"author_image": f"https://img/{i}.jpg"})
+        db.add(item)
+        db.flush()
+        db.add(Lead(source_item_id=item.id, clinic_id=1, scores={"lead_score": float(i)},
+                    labels={"visual_profile": ["relógio"]}))
+    if evil_first:
+        item = SourceItem(source="instagram", url="https://instagram.com/p/x", author_handle="@<b>hacker</b>",
+                          text="<script>alert(1)</script>", raw_metadata={"author_image": "javascript:alert(1)"})
+        db.add(item)
+        db.flush()
+        db.add(Lead(source_item_id=item.id, clinic_id=1, labels={"visual_profile": ["<img src=x onerror=alert(1)>"]},
+                    scores={"lead_score": 99.0, "visual_justification": "Relógio & \"bolsa\""}))
+    db.commit()
+    db.close()
+    return db_path
+
+def test_user_content_is_escaped():
+    db_path = make_db(0, evil_first=True)
+    output = os.path.join(os.path.dirname(db_path), "report.html")
+    assert generate_html_report(db_path, output) == 1
+    html = open(output, encoding="utf-8").read()
+
+    assert "<script>alert(1)</script>" not in html and "&lt;script&gt;alert(1)&lt;/script&gt;" in html
+    assert "@&lt;b&gt;hacker&lt;/b&gt;" in html
+    assert "<img src=x" not in html and "Relógio &amp; &quot;bolsa&quot;" in html
+    assert "javascript:" not in html and "No Image" in html
+    print("Escape de conteúdo coletado OK")
+
+def test_report_is_sharded_in_order():
+    db_path = make_db(10)
+    output = os.path.join(os.path.dirname(db_path), "report.html")
+    # Sobra de uma execução anterior com mais páginas
+    open(page_path(output, 9), "w").close()
+
+    assert generate_html_report(db_path, output, page_size=4, chunk_size=3) == 3
+    pages = [open(page_path(output, p), encoding="utf-8").read() for p in (1, 2, 3)]
+    assert not os.path.exists(page_path(output, 4)) and not os.path.exists(page_path(output, 9))
+
+    assert [page.count('class="lead-card"') for page in pages] == [4, 4, 2]
+    assert pages[0].index("@lead_9 <") < pages[0].index("@lead_8 <")  # maior score primeiro
+    assert "@lead_1 <" in pages[2] and "@lead_0 <" in pages[2]
+    assert 'href="report_2.html"' in pages[0] and "Anterior" not in pages[0]
+    assert 'href="report.html"' in pages[1] and 'href="report_3.html"' in pages[1]
+    assert "Próxima" not in pages[2]
+    print("Relatório paginado e ordenado OK")
+
+if __name__ == "__main__":
+    test_user_content_is_escaped()
+    test_report_is_sharded_in_order()
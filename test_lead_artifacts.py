@@ -0,0 +1,47 @@
+import asyncio
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.db.migrations import run_migrations
+from app.models.models import Lead, LeadStats, OutreachDraft
+from app.services import dashboard_data
+from test_concurrent_pipeline import make_collector, make_signals
+from test_lead_columns import make_legacy_engine
+
+def test_artifacts_computed_once_at_save_time():
+    collector = make_collector(latency=0.01)
+    asyncio.run(collector.process_and_save_signals(make_signals(12)))
+
+    with collector.session_factory() as db:
+        leads = db.query(Lead).all()
+        assert len(leads) == 12 and all(lead.estimated_revenue and lead.revenue_service for lead in leads)
+        assert db.query(OutreachDraft).count() == 12
+        assert dashboard_data.get_summary(db)["revenue_sum"] == sum(lead.estimated_revenue for lead in leads)
+
+        # O dashboard só lê: nenhum componente de ROI/SDR é executado no render
+        calls = []
+        original = dashboard_data.build_lead_artifacts
+        dashboard_data.build_lead_artifacts = lambda *args: calls.append(args) or original(*args)
+        try:
+            page = dashboard_data.get_lead_page(db, page=1, page_size=50)
+        finally:
+            dashboard_data.build_lead_artifacts = original
+    assert not calls
+    assert all(lead["outreach"]["opening_statement"] and lead["outreach"]["triage_questions"] for lead in page)
+    print("Artefatos ROI/SDR pré-calculados no salvamento OK")
+
+def test_migration_backfills_artifacts_for_old_leads():
+    engine = make_legacy_engine()
+    run_migrations(engine)
+    run_migrations(engine)  # idempotente: não duplica rascunhos
+
+    with Session(engine) as db:
+        leads = db.query(Lead).order_by(Lead.id).all()
+        assert [lead.estimated_revenue for lead in leads] == [2500.0, 2500.0, 2500.0]
+        assert db.query(OutreachDraft).count() == 3
+        assert db.get(LeadStats, 1).revenue_sum == 7500.0
+        assert db.execute(text("SELECT count(DISTINCT lead_id) FROM outreach_drafts")).scalar() == 3
+    print("Backfill de artefatos em leads antigos OK")
+
+if __name__ == "__main__":
+    test_artifacts_computed_once_at_save_time()
+    test_migration_backfills_artifacts_for_old_leads()
@@ -0,0 +1,76 @@
+import os
+import tempfile
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import sessionmaker
+from app.api.v1.endpoints.stats import get_stats
+from app.db.migrations import run_migrations
+from app.models.models import Lead
+from test_leads_pagination import run_with_async_db
+
+LEGACY_LEADS = """
+CREATE TABLE leads (
+    id INTEGER NOT NULL PRIMARY KEY, source_item_id INTEGER, clinic_id INTEGER,
+    scores JSON, labels JSON, evidence_snippets JSON, status VARCHAR,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+def make_legacy_engine():
+    db_path = os.path.join(tempfile.mkdtemp(), "legacy.db")
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    with engine.begin() as conn:
+        conn.execute(text(LEGACY_LEADS))
+        rows = [
+            ('{"lead_score": 45.5, "is_sp_region": true}', '{"tier": "Gold"}', "pending"),
+            ('{"lead_score": 12, "is_sp_region": false}', '{}', "approved"),
+            ('{}', None, "pending"),
+        ]
+        for scores, labels, status in rows:
+            conn.execute(text("INSERT INTO leads (clinic_id, scores, labels, status) VALUES (1, :s, :l, :st)"),
+                         {"s": scores, "l": labels, "st": status})
+    return engine
+
+def test_migration_backfills_legacy_leads():
+    engine = make_legacy_engine()
+
+    assert run_migrations(engine) == 3
+    assert run_migrations(engine) == 0  # idempotente
+
+    indexes = {index["name"] for index in inspect(engine).get_indexes("leads")}
+    assert {"ix_leads_lead_score", "ix_leads_status", "ix_leads_tier", "ix_leads_is_sp_region",
+            "ix_leads_created_at", "ix_leads_status_lead_score"} <= indexes
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT lead_score, tier, is_sp_region FROM leads ORDER BY id")).all()
+        plan = conn.execute(text("EXPLAIN QUERY PLAN SELECT id FROM leads ORDER BY lead_score DESC LIMIT 10")).all()
+    assert [tuple(r) for r in rows] == [(45.5, "Gold", 1), (12.0, "Standard", 0), (0.0, "Standard", 1)]
+    assert "ix_leads_lead_score" in plan[0][-1]
+    print("Migração e backfill OK")
+
+def test_orm_writes_keep_columns_in_sync_and_stats_use_them():
+    engine = make_legacy_engine()
+    run_migrations(engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        lead = Lead(clinic_id=1, scores={"lead_score": 80.0, "is_sp_region": False}, labels={"tier": "Platinum"})
+        db.add(lead)
+        db.commit()
+        assert (lead.lead_score, lead.tier, lead.is_sp_region) == (80.0, "Platinum", False)
+
+        lead.scores = {**lead.scores, "lead_score": 20.0}
+        db.commit()
+        assert lead.lead_score == 20.0
+
+        top = db.query(Lead).order_by(Lead.lead_score.desc()).first()
+        assert top.lead_score == 45.5
+
+        stats = run_with_async_db(engine, get_stats)
+        assert stats["total_leads"] == 4
+        assert stats["vip_leads"] == 1
+        assert stats["potential_revenue"] == (45.5 + 12 + 0 + 20) * 1000
+    finally:
+        db.close()
+    print("Colunas tipadas sincronizadas e /stats agregado no banco OK")
+
+if __name__ == "__main__":
+    test_migration_backfills_legacy_leads()
+    test_orm_writes_keep_columns_in_sync_and_stats_use_them()
@@ -0,0 +1,68 @@
+from fastapi.testclient import TestClient
+from app.api.v1.endpoints.stats import get_stats
+from app.db.batch_writer import LeadBatchWriter
+from app.main import app
+from app.models.models import Lead, LeadStats, aggregate_lead_stats
+from test_batch_writer import make_session_factory, make_record
+from test_leads_pagination import clear_async_db_overrides, override_async_dbs, run_with_async_db
+
+def assert_counters_match(db):
+    stats = db.get(LeadStats, 1)
+    db.refresh(stats)
+    expected = aggregate_lead_stats(db.connection())
+    actual = {name: getattr(stats, name) for name in expected}
+    assert actual == expected, f"{actual} != {expected}"
+    return actual
+
+def test_counters_follow_inserts_updates_and_deletes():
+    engine, factory = make_session_factory()
+    writer = LeadBatchWriter(factory, batch_size=25, flush_interval=3600)
+    for i in range(60):
+        writer.add(make_record(i))  # lead_score = i
+    writer.close()
+
+    db = factory()
+    try:
+        counters = assert_counters_match(db)
+        assert counters["total_leads"] == 60 and counters["vip_leads"] == 29 and counters["pending_leads"] == 60
+
+        # Mudança de status via API
+        override_async_dbs(engine)
+        try:
+            client = TestClient(app)
+            assert client.put("/api/v1/leads/1", json={"status": "approved"}).status_code == 200
+            assert client.put("/api/v1/leads/2", json={"status": "rejected"}).status_code == 200
+            stats = client.get("/api/v1/stats/").json()
+        finally:
+            clear_async_db_overrides()
+        assert stats["leads_by_status"] == {"pending": 58, "approved": 1, "rejected": 1}
+
+        # Mudança de score e remoção
+        lead = db.get(Lead, 10)
+        lead.scores = {**lead.scores, "lead_score": 99.0}
+        db.delete(db.get(Lead, 50))
+        db.commit()
+        counters = assert_counters_match(db)
+        assert counters["total_leads"] == 59 and counters["vip_leads"] == 29
+    finally:
+        db.close()
+    print("Contadores incrementais consistentes com a agregação SQL")
+
+def test_rolled_back_flush_does_not_change_counters():
+    engine, factory = make_session_factory()
+    db = factory()
+    try:
+        db.add(Lead(clinic_id=1, scores={"lead_score": 50.0}, labels={}))
+        db.commit()
+        db.add(Lead(clinic_id=1, scores={"lead_score": 70.0}, labels={}))
+        db.flush()
+        db.rollback()
+        assert run_with_async_db(engine, get_stats)["vip_leads"] == 1
+        assert_counters_match(db)
+    finally:
+        db.close()
+    print("Rollback preserva contadores")
+
+if __name__ == "__main__":
+    test_counters_follow_inserts_updates_and_deletes()
+    test_rolled_back_flush_does_not_change_counters()
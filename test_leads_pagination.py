@@ -0,0 +1,146 @@
+import asyncio
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+from app.db.session import get_async_read_db, get_db, make_async_engine
+from app.main import app
+from app.models.models import Lead
+from test_batch_writer import make_session_factory
+
+def async_db_override(engine):
+    """Dependência get_async_read_db apontando para o mesmo banco do engine síncrono de teste."""
+    factory = async_sessionmaker(make_async_engine(engine.url.render_as_string(hide_password=False)), expire_on_commit=False)
+
+    async def override_get_async_read_db():
+        async with factory() as session:
+            yield session
+    return override_get_async_read_db
+
+def override_async_dbs(engine):
+    """Leitura (get_async_read_db) e escrita (get_db, o writer síncrono) da API no banco de teste."""
+    app.dependency_overrides[get_async_read_db] = async_db_override(engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def override_get_db():
+        db = factory()
+        try:
+            yield db
+        finally:
+            db.close()
+    app.dependency_overrides[get_db] = override_get_db
+
+def clear_async_db_overrides():
+    app.dependency_overrides.pop(get_db, None)
+    app.dependency_overrides.pop(get_async_read_db, None)
+
+def run_with_async_db(engine, func):
+    """Executa a corrotina func(session) (ex.: um endpoint) com uma AsyncSession no banco de teste."""
+    async def run():
+        async for session in async_db_override(engine)():
+            return await func(session)
+    return asyncio.run(run())
+
+def make_client(n_leads: int = 250):
+    engine, factory = make_session_factory()
+    db = factory()
+    db.add_all([Lead(
+        clinic_id=1,
+        scores={"lead_score": float(i % 50), "is_sp_region": i % 4 != 0},  # muitos empates de score
+        labels={"tier": "Gold" if i % 3 == 0 else "Standard"},
+        evidence_snippets=["trecho longo " * 20],
+        status="approved" if i % 5 == 0 else "pending"
+    ) for i in range(n_leads)])
+    db.commit()
+    db.close()
+
+    override_async_dbs(engine)
+    return TestClient(app)
+
+def test_cursor_walks_all_leads_in_order():
+    client = make_client()
+    try:
+        seen, cursor, pages = [], None, 0
+        while True:
+            params = {"limit": 40, "fields": "id,lead_score"}
+            if cursor:
+                params["cursor"] = cursor
+            response = client.get("/api/v1/leads/", params=params)
+            assert response.status_code == 200
+            seen.extend(response.json())
+            pages += 1
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+
+        assert len(seen) == 250 and len({lead["id"] for lead in seen}) == 250
+        keys = [(lead["lead_score"], lead["id"]) for lead in seen]
+        assert keys == sorted(keys, reverse=True)
+        assert pages == 7
+
+        # skip legado segue a mesma ordenação
+        skipped = client.get("/api/v1/leads/", params={"limit": 40, "skip": 40, "fields": "id"}).json()
+        assert [lead["id"] for lead in skipped] == [lead["id"] for lead in seen[40:80]]
+    finally:
+        clear_async_db_overrides()
+    print("Paginação por cursor sem duplicados/omissões OK")
+
+def test_cursor_pages_through_leads_without_score():
+    engine, factory = make_session_factory()
+    db = factory()
+    db.add_all([Lead(clinic_id=1, scores={"lead_score": float(i % 7)}, labels={}, status="pending") for i in range(60)])
+    db.commit()
+    # Linhas antigas sem lead_score (NULL), misturadas às demais
+    db.execute(update(Lead).where(Lead.id % 3 == 0).values(lead_score=None))
+    db.commit()
+    expected = sorted(((lead.lead_score is not None, lead.lead_score or 0.0, lead.id) for lead in db.query(Lead)), reverse=True)
+    db.close()
+
+    override_async_dbs(engine)
+    try:
+        client = TestClient(app)
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 15, "fields": "id,lead_score"}
+            if cursor:
+                params["cursor"] = cursor
+            response = client.get("/api/v1/leads/", params=params)
+            assert response.status_code == 200
+            seen.extend(response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+        # Com score em ordem decrescente, depois os 20 sem score por id decrescente
+        assert [lead["id"] for lead in seen] == [lead_id for _, _, lead_id in expected]
+        assert [lead["lead_score"] for lead in seen[-20:]] == [None] * 20
+        skipped = client.get("/api/v1/leads/", params={"limit": 15, "skip": 30, "fields": "id"}).json()
+        assert [lead["id"] for lead in skipped] == [lead["id"] for lead in seen[30:45]]
+    finally:
+        clear_async_db_overrides()
+    print("Paginação por cursor com lead_score NULL OK")
+
+def test_filters_and_projection():
+    client = make_client()
+    try:
+        leads = client.get("/api/v1/leads/", params={
+            "status": "pending", "tier": "Gold", "is_sp_region": True, "min_score": 20,
+            "fields": "id,lead_score,tier,status,is_sp_region", "limit": 500
+        }).json()
+        assert leads and all(set(lead) == {"id", "lead_score", "tier", "status", "is_sp_region"} for lead in leads)
+        assert all(lead["status"] == "pending" and lead["tier"] == "Gold" and lead["is_sp_region"]
+                   and lead["lead_score"] >= 20 for lead in leads)
+
+        # Sem fields: formato original (sem evidence_snippets)
+        default = client.get("/api/v1/leads/", params={"limit": 1}).json()[0]
+        assert set(default) == {"id", "source_item_id", "clinic_id", "scores", "labels", "status", "created_at"}
+
+        assert client.get("/api/v1/leads/", params={"fields": "id,password"}).status_code == 400
+        assert client.get("/api/v1/leads/", params={"cursor": "nao-e-um-cursor"}).status_code == 400
+    finally:
+        clear_async_db_overrides()
+    print("Filtros e projeção de campos OK")
+
+if __name__ == "__main__":
+    test_cursor_walks_all_leads_in_order()
+    test_cursor_pages_through_leads_without_score()
+    test_filters_and_projection()
@@ -0,0 +1,57 @@
+import json
+import os
+import tempfile
+from benchmark_llm_offline import RecordingResponder, ReplayResponder, run_benchmark, main
+from stub_llm_server import StubLLMServer, StubResponder
+
+FAST = {"latency_p50": 0.01, "latency_p95": 0.03}
+
+def test_stub_benchmark_reports_percentiles_tokens_and_cache():
+    report = run_benchmark(StubResponder(**FAST), [1, 4], n_signals=8, overlap=0.5, image_ratio=0.0)
+
+    assert [level["concurrency"] for level in report["levels"]] == [1, 4]
+    for level in report["levels"]:
+        cold, warm = level["cold"], level["warm"]
+        assert cold["leads"] == warm["leads"] == 8
+        assert cold["llm_requests"] == 8 and warm["llm_requests"] == 4  # metade vem do cache
+        assert (cold["cache_hit_rate"], warm["cache_hit_rate"]) == (0.0, 0.5)
+        assert cold["tokens_per_lead"] > warm["tokens_per_lead"] > 0
+        lat = cold["llm_latency_s"]
+        assert 0 < lat["p50"] <= lat["p95"] <= lat["p99"]
+    json.dumps(report)  # relatório serializável
+    print("Benchmark stub: percentis, tokens/lead e cache OK")
+
+def test_batch_mode_uses_fewer_requests():
+    report = run_benchmark(StubResponder(**FAST), [4], n_signals=16, overlap=0.0, image_ratio=0.0, batch_mode=True)
+    cold = report["levels"][0]["cold"]
+    assert cold["leads"] == 16 and cold["llm_requests"] == 2  # LLM_BATCH_SIZE = 8
+    print("Benchmark em modo batch OK")
+
+def test_record_then_replay_offline():
+    fixtures = os.path.join(tempfile.mkdtemp(), "fixtures.jsonl")
+    with StubLLMServer(StubResponder(**FAST)) as upstream:
+        recorded = run_benchmark(RecordingResponder(fixtures, upstream.base_url, "fake-key"), [2], n_signals=6, image_ratio=0.5)
+    with open(fixtures) as f:
+        entries = [json.loads(line) for line in f]
+    assert {entry["kind"] for entry in entries} >= {"classify", "vision"}
+
+    replay = ReplayResponder(fixtures, StubResponder(**FAST))
+    replayed = run_benchmark(replay, [2], n_signals=6, image_ratio=0.5)
+    assert replayed["fixture_misses"] == 0
+    for phase in ("cold", "warm"):
+        assert replayed["levels"][0][phase]["tokens_per_lead"] == recorded["levels"][0][phase]["tokens_per_lead"]
+    print("Gravação e replay offline OK")
+
+def test_cli_writes_json():
+    output = os.path.join(tempfile.mkdtemp(), "results.json")
+    main(["--signals", "4", "--concurrency", "2", "--latency-p50", "0.01", "--latency-p95", "0.02", "--output", output])
+    with open(output) as f:
+        report = json.load(f)
+    assert report["config"]["signals"] == 4 and report["levels"][0]["cold"]["leads"] == 4
+    print("Saída JSON da CLI OK")
+
+if __name__ == "__main__":
+    test_stub_benchmark_reports_percentiles_tokens_and_cache()
+    test_batch_mode_uses_fewer_requests()
+    test_record_then_replay_offline()
+    test_cli_writes_json()
@@ -0,0 +1,71 @@
+import asyncio
+import threading
+import time
+from app.core.config import settings
+from app.services.engine import IntentEngine, VisionEngine
+from app.services.llm_clients import get_http_client, get_llm_client, get_provider_semaphore
+from stub_llm_server import StubLLMServer, StubResponder
+
+class PeakResponder(StubResponder):
+    """Stub que mede o pico de requisições simultâneas recebidas."""
+    def __init__(self, delay: float = 0.05):
+        super().__init__(latency_p50=0.01, latency_p95=0.01)
+        self.delay = delay
+        self.in_flight = self.peak = 0
+        self._count_lock = threading.Lock()
+
+    def respond(self, body):
+        with self._count_lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        time.sleep(self.delay)
+        with self._count_lock:
+            self.in_flight -= 1
+        content, usage, _ = super().respond(body)
+        return content, usage, 0.0
+
+def test_engines_share_pooled_clients_per_loop():
+    async def clients():
+        intent_a, intent_b = IntentEngine(provider="openrouter", use_cache=False), IntentEngine(provider="openrouter", use_cache=False)
+        assert intent_a.client is intent_b.client
+        assert intent_a.client is get_llm_client("openrouter")
+        assert IntentEngine(provider="ollama", use_cache=False).client is not intent_a.client
+        # Um único pool httpx para todos os providers (e para o Serper)
+        assert intent_a.client._client is get_http_client()
+        assert IntentEngine(provider="ollama", use_cache=False).client._client is get_http_client()
+        return intent_a.client, get_llm_client("ollama").timeout
+
+    first, ollama_timeout = asyncio.run(clients())
+    second, _ = asyncio.run(clients())
+    assert first is not second  # conexões não atravessam event loops
+    assert ollama_timeout.read == settings.LLM_PROVIDER_TIMEOUTS["ollama"]
+    print("Clientes LLM compartilhados por (provider, base_url, chave) OK")
+
+def test_provider_semaphore_caps_all_engines():
+    original = (settings.LLM_PROVIDER, settings.OPENROUTER_BASE_URL, settings.OPENROUTER_API_KEY, settings.LLM_PROVIDER_CONCURRENCY)
+    responder = PeakResponder()
+    with StubLLMServer(responder) as server:
+        settings.LLM_PROVIDER, settings.OPENROUTER_BASE_URL, settings.OPENROUTER_API_KEY = "openrouter", server.base_url, "fake-key"
+        settings.LLM_PROVIDER_CONCURRENCY = {**original[3], "openrouter": 3}
+        try:
+            async def burst():
+                engines = [IntentEngine(use_cache=False), IntentEngine(use_cache=False)]
+                vision = VisionEngine()
+                calls = [engine.classify(f"texto {i}") for i, engine in enumerate(engines * 4)]
+                calls += [vision.analyze_profile_image(f"https://img/{i}.jpg") for i in range(4)]
+                results = await asyncio.gather(*calls)
+                assert get_provider_semaphore("ollama") is not None and get_provider_semaphore("unknown") is None
+                return results
+
+            results = asyncio.run(burst())
+        finally:
+            settings.LLM_PROVIDER, settings.OPENROUTER_BASE_URL, settings.OPENROUTER_API_KEY, settings.LLM_PROVIDER_CONCURRENCY = original
+
+    assert len(results) == 12 and all("error_in_classification" not in r.get("risk_flags", []) for r in results[:8])
+    assert server.snapshot()["requests"] == 12
+    assert responder.peak == 3
+    print(f"Semáforo por provider: pico de {responder.peak} requisições simultâneas OK")
+
+if __name__ == "__main__":
+    test_engines_share_pooled_clients_per_loop()
+    test_provider_semaphore_caps_all_engines()
@@ -0,0 +1,81 @@
+import asyncio
+from prometheus_client import REGISTRY
+from app.services.engine import IntentEngine
+from benchmark_llm_offline import run_benchmark
+from stub_llm_server import StubResponder
+from test_leads_pagination import clear_async_db_overrides, make_client
+from test_serper_fetch import run_against_stub
+
+FAST = {"latency_p50": 0.01, "latency_p95": 0.03}
+
+def sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+def test_metrics_endpoint_and_api_latency():
+    client = make_client(n_leads=20)
+    try:
+        assert client.get("/api/v1/leads/", params={"limit": 5}).status_code == 200
+        assert client.get("/api/v1/leads/999999").status_code == 404
+        assert client.get("/api/v1/stats/").status_code == 200
+        response = client.get("/metrics")
+    finally:
+        clear_async_db_overrides()
+
+    assert response.status_code == 200 and response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    # Rota pelo template (cardinalidade limitada), não pela URL com o id
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/v1/leads/",status="200"}' in body
+    assert 'route="/api/v1/leads/{lead_id}",status="404"' in body
+    assert 'route="/api/v1/stats/",status="200"' in body
+    assert 'route="/metrics"' not in body
+    print("Endpoint /metrics e latência por rota OK")
+
+def test_pipeline_llm_and_db_metrics():
+    labels = {"provider": "openrouter", "model": "stub-metrics"}
+    before = {
+        "classify": sample("llm_request_duration_seconds_count", operation="classify", outcome="ok", **labels),
+        "vision": sample("llm_request_duration_seconds_count", operation="vision", outcome="ok", **labels),
+        "prompt_tokens": sample("llm_tokens_total", direction="prompt", **labels),
+        "analyzed": sample("pipeline_signals_total", stage="analyzed"),
+        "saved": sample("pipeline_signals_total", stage="saved"),
+        "commits": sample("db_commit_duration_seconds_count"),
+    }
+    report = run_benchmark(StubResponder(**FAST), [2], n_signals=6, overlap=0.0, image_ratio=1.0, model="stub-metrics")
+    leads = sum(phase["leads"] for phase in (report["levels"][0]["cold"], report["levels"][0]["warm"]))
+
+    assert sample("llm_request_duration_seconds_count", operation="classify", outcome="ok", **labels) - before["classify"] == 12
+    assert sample("llm_request_duration_seconds_count", operation="vision", outcome="ok", **labels) - before["vision"] == 12
+    assert sample("llm_tokens_total", direction="prompt", **labels) > before["prompt_tokens"]
+    assert sample("pipeline_signals_total", stage="analyzed") - before["analyzed"] == leads == 12
+    assert sample("pipeline_signals_total", stage="saved") - before["saved"] == 12
+    assert sample("db_commit_duration_seconds_count") > before["commits"]
+    print("Métricas de LLM, tokens, estágios e commits OK")
+
+def test_serper_status_codes():
+    ok, unavailable = sample("serper_request_duration_seconds_count", status="200"), sample("serper_request_duration_seconds_count", status="503")
+    before_fetched = sample("pipeline_signals_total", stage="fetched")
+    signals, _ = run_against_stub(["flaky503", "stable"])
+
+    assert sample("serper_request_duration_seconds_count", status="503") - unavailable == 1
+    assert sample("serper_request_duration_seconds_count", status="200") - ok == 2
+    assert sample("pipeline_signals_total", stage="fetched") - before_fetched == len(signals) == 4
+    print("Latência e status do Serper OK")
+
+def test_classification_fallback_counter():
+    engine = IntentEngine(use_cache=False)
+
+    async def failing_complete(prompt, **kwargs):
+        raise RuntimeError("LLM fora do ar")
+    engine._complete = failing_complete
+
+    before = sample("classification_fallbacks_total", operation="classify")
+    result = asyncio.run(engine.classify("Quero fazer Ultraformer no Itaim"))
+    assert result["risk_flags"] == ["error_in_classification"]
+    assert sample("classification_fallbacks_total", operation="classify") - before == 1
+    print("Contador de fallbacks de classificação OK")
+
+if __name__ == "__main__":
+    test_metrics_endpoint_and_api_latency()
+    test_pipeline_llm_and_db_metrics()
+    test_serper_status_codes()
+    test_classification_fallback_counter()
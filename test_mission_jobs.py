@@ -0,0 +1,130 @@
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer
+from fastapi.testclient import TestClient
+from kombu.exceptions import OperationalError
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.core.config import settings
+from app.db.session import get_db, get_read_db
+from app.main import app
+from app.models.models import Base, Lead, MissionJob
+from app.services.jobs import MissionCancelled, JobProgressReporter, create_job, request_cancel
+from app.worker import celery_app, run_mission_job
+from test_async_llm import FakeLLMHandler, free_port
+from test_concurrent_pipeline import make_collector
+from test_streaming_pipeline import patch_fetch, run_streaming
+
+def test_cancel_stops_running_mission():
+    collector = make_collector(latency=0.05)
+    patch_fetch(collector, fetch_latency=0.05)
+    db = collector.session_factory()
+    job = create_job(db, queries=[f"query_{i}" for i in range(5)])
+    job.status = "running"
+    db.commit()
+
+    reporter = JobProgressReporter(job.id, collector.session_factory, interval=0)
+    cancelled = {}
+
+    def cancel_after_first_leads(stats, force=False):
+        if stats["analyzed"] >= 5 and not cancelled:
+            request_cancel(db, db.get(MissionJob, job.id))
+            cancelled["at"] = stats["analyzed"]
+        reporter(stats, force)
+
+    collector.progress_callback = cancel_after_first_leads
+    try:
+        run_streaming(collector, job.queries, max_concurrency=2)
+        raise AssertionError("a missão deveria ter sido interrompida")
+    except MissionCancelled:
+        pass
+
+    # Leads já analisados foram gravados; o restante da missão não rodou
+    db.expire_all()
+    saved = db.query(Lead).count()
+    assert cancelled["at"] <= saved < 50
+    assert db.get(MissionJob, job.id).progress["analyzed"] >= 5
+    db.close()
+    print(f"Cancelamento interrompeu a missão com {saved} de 50 leads")
+
+def test_queue_worker_runs_jobs():
+    tmp = tempfile.mkdtemp()
+    broker_url = f"sqla+sqlite:///{os.path.join(tmp, 'broker.db')}"
+    db_url = f"sqlite:///{os.path.join(tmp, 'app.db')}"
+    db_engine = create_engine(db_url, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=db_engine)
+    TestSession = sessionmaker(autocommit=False, autoflush=False, bind=db_engine)
+
+    def override_get_db():
+        db = TestSession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    llm_server = ThreadingHTTPServer(("127.0.0.1", free_port()), FakeLLMHandler)
+    threading.Thread(target=llm_server.serve_forever, daemon=True).start()
+
+    original = (celery_app.conf.broker_url, settings.MISSION_EXECUTOR)
+    celery_app.conf.broker_url = broker_url
+    settings.MISSION_EXECUTOR = "queue"
+    app.dependency_overrides[get_db] = app.dependency_overrides[get_read_db] = override_get_db
+    worker = None
+    try:
+        client = TestClient(app)
+        # 1. API só enfileira: sem worker rodando, os jobs ficam na fila
+        first = client.post("/api/v1/mission/run", json={"queries": ["Ultraformer MPT"]}).json()
+        second = client.post("/api/v1/mission/run", json={"queries": ["Morpheus 8"]}).json()
+        assert client.get(f"/api/v1/mission/jobs/{first['job_id']}").json()["status"] == "queued"
+        assert client.post(f"/api/v1/mission/jobs/{second['job_id']}/cancel").json()["status"] == "cancelled"
+        assert client.get("/api/v1/mission/jobs/inexistente").status_code == 404
+
+        # Broker inacessível: 503 e o job não fica "queued" para sempre
+        def broker_down(*args, **kwargs):
+            raise OperationalError("Error 111 connecting to localhost:6379. Connection refused.")
+        run_mission_job.delay = broker_down
+        try:
+            response = client.post("/api/v1/mission/run", json={"queries": ["Lavieen"]})
+        finally:
+            del run_mission_job.delay
+        assert response.status_code == 503
+        failed = client.get("/api/v1/mission/jobs", params={"status": "failed"}).json()
+        assert len(failed) == 1 and failed[0]["error"].startswith("Falha ao enfileirar")
+
+        # 2. Worker Celery em processo separado consome a fila
+        env = {**os.environ, "JOB_BROKER_URL": broker_url, "DATABASE_URL": db_url,
+               "LLM_PROVIDER": "openrouter", "OPENROUTER_API_KEY": "fake-key",
+               "OPENROUTER_BASE_URL": f"http://127.0.0.1:{llm_server.server_port}/v1",
+               "SERPER_API_KEY": "", "CLASSIFICATION_CACHE_ENABLED": "false"}
+        worker = subprocess.Popen(
+            [sys.executable, "-m", "celery", "-A", "app.worker", "worker", "--concurrency", "1", "--loglevel", "warning"],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            job = client.get(f"/api/v1/mission/jobs/{first['job_id']}").json()
+            if job["status"] in ("succeeded", "failed"):
+                break
+            time.sleep(0.5)
+
+        assert job["status"] == "succeeded", job
+        assert job["worker"] and job["result"]["leads_saved"] == len(job["result"]["lead_ids"]) > 0
+        assert client.get(f"/api/v1/mission/jobs/{second['job_id']}").json()["status"] == "cancelled"
+        print(f"Worker processou o job: {job['result']['leads_saved']} leads ({job['worker']})")
+    finally:
+        if worker is not None:
+            worker.terminate()
+            worker.wait(timeout=30)
+        llm_server.shutdown()
+        app.dependency_overrides.pop(get_db, None)
+        app.dependency_overrides.pop(get_read_db, None)
+        celery_app.conf.broker_url, settings.MISSION_EXECUTOR = original
+
+if __name__ == "__main__":
+    test_cancel_stops_running_mission()
+    test_queue_worker_runs_jobs()
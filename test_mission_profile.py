@@ -0,0 +1,142 @@
+import asyncio
+import gzip
+import json
+import time
+from fastapi.testclient import TestClient
+from app.core.config import settings
+from app.api.v1.endpoints.mission import accepts_gzip
+from app.db.session import get_read_db
+from app.main import app
+from app.models.models import MissionProfile
+from app.services.profiler import MissionProfiler, save_profile
+from test_concurrent_pipeline import make_collector, unique_words
+
+RESULTS_PER_QUERY = 6
+
+def patch_serper(collector, latency: float = 0.02):
+    """Serper sintético: latência crescente por query e resultados distintos (passam pela deduplicação)."""
+    async def fake_serper_post(client, payload, trace_key=None):
+        index = int(trace_key.split("_")[1])
+        start = time.perf_counter()
+        await asyncio.sleep(latency * (index + 1))
+        collector._record("serper_request", "fetch", trace_key, start, status=200, attempt=0)
+        if payload["page"] > 1:
+            return {"organic": []}
+        return {"organic": [
+            {"link": f"https://example.com/{trace_key}/{i}", "title": "Ultraformer",
+             "snippet": f"Quero Ultraformer no Itaim {unique_words(index * 1000 + i)}"}
+            for i in range(RESULTS_PER_QUERY)
+        ]}
+    collector._serper_post = fake_serper_post
+
+def run_profiled_mission(streaming: bool = True, queries: int = 4, max_concurrency: int = 3):
+    collector = make_collector(latency=0.02)
+    collector.profiler = MissionProfiler()
+    patch_serper(collector)
+    original_key = settings.SERPER_API_KEY
+    settings.SERPER_API_KEY = "test-key"
+    try:
+        names = [f"query_{i}" for i in range(queries)]
+        if streaming:
+            results = asyncio.run(collector.stream_and_process(names, max_concurrency=max_concurrency))
+        else:
+            signals = asyncio.run(collector.fetch_signals(names))
+            results = asyncio.run(collector.process_and_save_signals(signals, max_concurrency=max_concurrency))
+    finally:
+        settings.SERPER_API_KEY = original_key
+    return collector, results
+
+def test_accept_encoding_q_values():
+    assert accepts_gzip("gzip") and accepts_gzip("deflate, gzip;q=0.5") and accepts_gzip("br, *")
+    assert not accepts_gzip("") and not accepts_gzip("identity") and not accepts_gzip("gzip;q=0")
+    assert not accepts_gzip("gzip; q=0.0, *;q=1") and not accepts_gzip("*;q=0")
+    print("Accept-Encoding com q-values OK")
+
+def test_lanes_and_utilization():
+    profiler = MissionProfiler()
+    t = profiler.origin
+    profiler.capacity["signal"] = 2
+    # Três sinais com duas vagas: o terceiro reaproveita a linha do primeiro
+    for key, (start, end) in enumerate([(0.0, 1.0), (0.0, 2.0), (1.0, 1.5)], start=1):
+        profiler.add("in_slot", "signal", t + start, t + end, key=key)
+        profiler.add("classify", "signal", t + start, t + end, key=key)
+    profiler.add("db_write", "write", t + 2.0, t + 2.5, leads=3, signals=[1, 2, 3])
+    profiler.finish()
+
+    trace = profiler.to_chrome_trace("m1")
+    tids = {e["args"]["key"]: e["tid"] for e in trace["traceEvents"] if e.get("name") == "classify"}
+    assert tids[1] == tids[3] != tids[2]
+    util = trace["otherData"]["utilization"]
+    assert util["llm"]["capacity"] == 2 and util["llm"]["peak_in_use"] == 2
+    assert util["llm"]["utilization"] == 0.875  # 3,5s ocupados em 2 vagas x 2s
+    assert util["db_writer"]["batches"] == 1
+
+    # O sinal 2 é o último do lote a terminar: classificação e gravação formam a cadeia
+    path = trace["otherData"]["critical_path"]
+    assert [(p["stage"], p["signal"], p["dur_ms"]) for p in path] == [("classify", 2, 2000.0), ("db_write", 2, 500.0)]
+    assert any(e["ph"] == "C" and e["name"] == "llm_slots_in_use" for e in trace["traceEvents"])
+    print("Linhas, utilização e caminho crítico do profiler OK")
+
+def test_streaming_mission_profile():
+    collector, results = run_profiled_mission(streaming=True)
+    assert len(results) == 4 * RESULTS_PER_QUERY
+    profile = save_profile(collector.session_factory, "mission-stream", collector.profiler)
+
+    assert profile["signals"] == len(results)
+    for stage in ("serper_query", "serper_request", "classify", "db_write", "fetch", "analyze"):
+        assert stage in profile["stage_ms"], stage
+    stages = [segment["stage"] for segment in profile["critical_path"]]
+    # A cadeia crítica passa pela busca que trouxe o último sinal e termina na gravação
+    assert stages.index("fetch") < stages.index("classify") < stages.index("db_write")
+    assert set(stages) - {"startup", "queue", "batch_wait", "finalize"} <= set(profile["stage_ms"])
+    assert next(s for s in profile["critical_path"] if s["stage"] == "fetch")["query"].startswith("query_")
+    assert abs(sum(s["dur_ms"] for s in profile["critical_path"]) - profile["wall_ms"]) < 5
+    assert profile["utilization"]["llm"]["capacity"] == 3
+    assert profile["utilization"]["llm"]["peak_in_use"] <= 3
+    assert profile["utilization"]["serper"]["peak_in_use"] >= 1
+    print(f"Perfil streaming: {profile['wall_ms']:.0f}ms, caminho crítico {profile['critical_path_ms']}")
+
+def test_batch_mission_profile_and_endpoint():
+    collector, results = run_profiled_mission(streaming=False)
+    save_profile(collector.session_factory, "mission-batch", collector.profiler)
+
+    def override_read_db():
+        db = collector.session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_read_db] = override_read_db
+    try:
+        client = TestClient(app)
+        summary = client.get("/api/v1/mission/mission-batch/profile", params={"summary": True}).json()
+        raw = client.get("/api/v1/mission/mission-batch/profile", headers={"Accept-Encoding": "identity"})
+        compressed = client.get("/api/v1/mission/mission-batch/profile", headers={"Accept-Encoding": "gzip"})
+        refused = client.get("/api/v1/mission/mission-batch/profile", headers={"Accept-Encoding": "gzip;q=0, identity"})
+        missing = client.get("/api/v1/mission/nao-existe/profile")
+    finally:
+        app.dependency_overrides.pop(get_read_db, None)
+
+    assert summary["signals"] == len(results) and "persist" in summary["stage_ms"] and "dedup" in summary["stage_ms"]
+    assert raw.status_code == 200 and "content-encoding" not in raw.headers
+    assert "mission-mission-batch.trace.json" in raw.headers["content-disposition"]
+    trace = raw.json()
+    assert {"X", "i", "C", "M"} <= {e["ph"] for e in trace["traceEvents"]}
+    assert trace["otherData"]["mission_id"] == "mission-batch"
+    # Com gzip aceito, o blob gravado sai sem recompressão
+    assert compressed.headers["content-encoding"] == "gzip" and compressed.json() == trace
+    assert "Accept-Encoding" in compressed.headers["vary"] and "Accept-Encoding" in raw.headers["vary"]
+    # gzip;q=0 recusa gzip explicitamente: o trace sai descomprimido
+    assert "content-encoding" not in refused.headers and refused.json() == trace
+    db = collector.session_factory()
+    assert json.loads(gzip.decompress(db.get(MissionProfile, "mission-batch").trace)) == trace
+    db.close()
+    assert missing.status_code == 404
+    print("Perfil do modo batch e GET /mission/{id}/profile OK")
+
+if __name__ == "__main__":
+    test_accept_encoding_q_values()
+    test_lanes_and_utilization()
+    test_streaming_mission_profile()
+    test_batch_mission_profile_and_endpoint()
@@ -0,0 +1,176 @@
+import atexit
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import inspect, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import sessionmaker
+from app.db.audit_store import AuditStore
+from app.db.batch_writer import LeadBatchWriter
+from app.db.migrations import copy_database, run_migrations
+from app.db.session import make_engine
+from app.main import app
+from app.models.models import Base, Lead, LeadStats, SourceItem, aggregate_lead_stats
+from app.services.engine import LeadScorer
+from app.services.rescoring import rescore_leads
+from test_batch_writer import make_session_factory, make_record
+from test_leads_pagination import clear_async_db_overrides, override_async_dbs
+
+# TEST_POSTGRES_URL=postgresql://user@host:5432/banco usa um servidor existente (o banco é recriado).
+# Sem ela, sobe um cluster descartável com initdb/pg_ctl do PATH (ou de PG_BIN).
+_server = {}
+
+def postgres_url():
+    if os.environ.get("TEST_POSTGRES_URL"):
+        return os.environ["TEST_POSTGRES_URL"]
+    if "url" in _server:
+        return _server["url"]
+    bin_dir = os.environ.get("PG_BIN") or os.path.dirname(shutil.which("pg_ctl") or "")
+    if not bin_dir or not os.path.exists(os.path.join(bin_dir, "initdb")) or os.geteuid() == 0:
+        return None  # PostgreSQL não roda como root
+
+    data_dir = tempfile.mkdtemp()
+    port = 55000 + os.getpid() % 1000
+    subprocess.run([os.path.join(bin_dir, "initdb"), "-D", data_dir, "-U", "postgres", "-A", "trust", "-E", "UTF8"],
+                   check=True, capture_output=True)
+    subprocess.run([os.path.join(bin_dir, "pg_ctl"), "-D", data_dir, "-l", os.path.join(data_dir, "log"), "-w",
+                    "-o", f"-p {port} -k {data_dir} -c listen_addresses=127.0.0.1", "start"], check=True, capture_output=True)
+    atexit.register(subprocess.run, [os.path.join(bin_dir, "pg_ctl"), "-D", data_dir, "-m", "immediate", "stop"],
+                    capture_output=True)
+    _server["url"] = f"postgresql://postgres@127.0.0.1:{port}/postgres"
+    return _server["url"]
+
+def fresh_engine():
+    url = postgres_url()
+    if url is None:
+        pytest.skip("PostgreSQL indisponível (defina TEST_POSTGRES_URL ou PG_BIN)")
+    engine = make_engine(url)
+    Base.metadata.drop_all(bind=engine)
+    return engine
+
+def test_schema_uses_jsonb_and_gin_indexes():
+    engine = fresh_engine()
+    run_migrations(engine)
+    run_migrations(engine)  # idempotente
+    columns = {column["name"]: column["type"] for column in inspect(engine).get_columns("leads")}
+    assert isinstance(columns["scores"], JSONB) and isinstance(columns["labels"], JSONB)
+    indexes = {index["name"] for index in inspect(engine).get_indexes("leads")}
+    assert {"ix_leads_scores_gin", "ix_leads_labels_gin", "ix_leads_status_lead_score"} <= indexes
+
+    # Bancos criados antes do JSONB: json -> jsonb na migração
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX ix_leads_labels_gin"))
+        conn.execute(text("ALTER TABLE leads ALTER COLUMN labels TYPE JSON USING labels::json"))
+    run_migrations(engine)
+    assert isinstance({c["name"]: c["type"] for c in inspect(engine).get_columns("leads")}["labels"], JSONB)
+    assert "ix_leads_labels_gin" in {index["name"] for index in inspect(engine).get_indexes("leads")}
+    engine.dispose()
+    print("Schema PostgreSQL com JSONB e índices GIN OK")
+
+def test_copy_from_sqlite():
+    engine = fresh_engine()
+    sqlite_engine, sqlite_factory = make_session_factory()
+    writer = LeadBatchWriter(sqlite_factory, batch_size=40, flush_interval=3600, audit_store=AuditStore(tempfile.mkdtemp()))
+    for i in range(100):
+        writer.add(make_record(i))
+    writer.close()
+
+    copied = copy_database(sqlite_engine, engine, batch_size=30)
+    assert copied["leads"] == copied["source_items"] == 100
+    factory = sessionmaker(bind=engine)
+    with factory() as db:
+        assert db.get(LeadStats, 1).total_leads == 100
+        assert aggregate_lead_stats(db.connection())["score_sum"] == sum(range(100))
+        # Sequência continua do maior id copiado
+        db.add(Lead(clinic_id=1, scores={"lead_score": 1.0}, labels={}))
+        db.commit()
+        assert db.query(Lead).order_by(Lead.id.desc()).first().id == 101
+
+    try:
+        copy_database(sqlite_engine, engine)
+        assert False, "destino não vazio deveria ser recusado"
+    except RuntimeError:
+        pass
+    engine.dispose()
+    print("Migração SQLite -> PostgreSQL OK")
+
+def test_concurrent_first_flushes_bootstrap_lead_stats():
+    engine = fresh_engine()
+    Base.metadata.create_all(bind=engine)  # sem run_migrations: lead_stats começa vazia
+    factory = sessionmaker(bind=engine)
+    first, errors = factory(), []
+    first.add(Lead(clinic_id=1, scores={"lead_score": 90.0}, labels={}, lead_score=90.0, status="pending"))
+    first.flush()  # insere a linha id=1 (ainda sem commit)
+
+    def second_writer():
+        try:
+            with factory() as db:
+                db.add(Lead(clinic_id=1, scores={"lead_score": 10.0}, labels={}, lead_score=10.0, status="pending"))
+                db.commit()  # espera o lock da linha do primeiro flush
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=second_writer)
+    thread.start()
+    time.sleep(0.5)
+    first.commit()
+    first.close()
+    thread.join(timeout=10)
+
+    assert errors == []
+    with factory() as db:
+        stats = db.get(LeadStats, 1)
+        assert (stats.total_leads, stats.score_sum, stats.vip_leads) == (2, 100.0, 1)
+    engine.dispose()
+    print("Primeiro flush concorrente em lead_stats OK")
+
+def test_async_api_and_rescore_on_postgres():
+    engine = fresh_engine()
+    run_migrations(engine)
+    factory = sessionmaker(bind=engine)
+    with factory() as db:
+        source = SourceItem(source="instagram", url="https://instagram.com/p/1", author_handle="@lead", text="texto")
+        db.add(source)
+        db.flush()
+        db.add_all([Lead(
+            source_item_id=source.id,
+            clinic_id=1,
+            scores={"lead_score": float(i), "fit": i, "visual_fit": 100 - i},
+            labels={"tier": "Standard", "pain_point": "melasma" if i % 3 == 0 else "flacidez"}
+        ) for i in range(60)])
+        db.commit()
+
+    override_async_dbs(engine)
+    try:
+        with TestClient(app) as client:
+            leads = client.get("/api/v1/leads/", params={"pain_point": "melasma", "fields": "id,labels", "limit": 500}).json()
+            assert len(leads) == 20 and all(lead["labels"]["pain_point"] == "melasma" for lead in leads)
+            page = client.get("/api/v1/leads/", params={"limit": 25})
+            assert len(page.json()) == 25 and page.headers.get("X-Next-Cursor")
+            assert client.put("/api/v1/leads/1", json={"status": "approved"}).json()["status"] == "approved"
+            assert client.get("/api/v1/stats/").json()["leads_by_status"]["approved"] == 1
+    finally:
+        clear_async_db_overrides()
+
+    # Re-score em massa no PostgreSQL (jsonb_set mantém scores.lead_score igual à coluna)
+    result = rescore_leads(engine, chunk_size=25)
+    with factory() as db:
+        leads = db.query(Lead).order_by(Lead.id).all()
+        assert result["scanned"] == 60 and result["updated"] > 0
+        assert all(lead.lead_score == LeadScorer().calculate_score(lead.scores) == lead.scores["lead_score"] for lead in leads)
+        assert db.get(LeadStats, 1).score_sum == aggregate_lead_stats(db.connection())["score_sum"]
+    engine.dispose()
+    print("API assíncrona e re-score no PostgreSQL OK")
+
+if __name__ == "__main__":
+    for test in (test_schema_uses_jsonb_and_gin_indexes, test_copy_from_sqlite,
+                 test_concurrent_first_flushes_bootstrap_lead_stats, test_async_api_and_rescore_on_postgres):
+        try:
+            test()
+        except pytest.skip.Exception as skipped:
+            print(f"{test.__name__} ignorado: {skipped.msg}")
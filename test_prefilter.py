@@ -0,0 +1,49 @@
+import asyncio
+from datetime import datetime
+from app.services.prefilter import SignalPrefilter
+from test_concurrent_pipeline import make_collector
+
+def signal(text: str, url: str = "https://www.instagram.com/p/x", source: str = "instagram", image: str = None):
+    return {"source": source, "url": url, "author_handle": "@x", "author_image": image, "text": text,
+            "timestamp": datetime.now(), "raw_metadata": {}}
+
+LEAD = "Meninas, fiz o Ultraformer MPT no Itaim e amei! Alguém já testou o Morpheus 8 para papada?"
+PRICE_QUESTION = "Qual o preço do botox? Tenho rugas na testa que me incomodam muito."
+NO_TREATMENT = "Alguém sabe um restaurante bom nos Jardins para sábado?"
+CLINIC_HOME = "Clínica Estética Itaim: Conheça nossos tratamentos de Ultraformer e botox. Agende já pelo (11) 91234-5678."
+
+def test_prefilter_rules():
+    prefilter = SignalPrefilter(local_model=None)
+    assert prefilter.check(signal(LEAD)) is None
+    assert prefilter.check(signal(PRICE_QUESTION.upper().replace("PREÇO", "PRECO"))) is None  # sem acento/caixa
+    assert prefilter.check(signal(NO_TREATMENT)) == "no_treatment_terms"
+    assert prefilter.check(signal(CLINIC_HOME)) == "commercial_page"
+    # Home page vinda do Google: institucional mesmo sem telefone
+    assert prefilter.check(signal("Clínica X - Botox e preenchimento em SP", url="https://clinicax.com.br/", source="google_web")) == "commercial_page"
+    # Mesmo em página de clínica, um relato em primeira pessoa segue para o LLM
+    assert prefilter.check(signal("Conheça a clínica: quero fazer botox, alguém já foi? Agende sua avaliação")) is None
+    print("Regras do pré-filtro OK")
+
+def test_local_model_hook():
+    prefilter = SignalPrefilter(local_model=lambda text: 0.9 if "Itaim" in text else 0.05, min_probability=0.2)
+    assert prefilter.check(signal(LEAD)) is None
+    assert prefilter.check(signal(PRICE_QUESTION)) == "local_model"
+    broken = SignalPrefilter(local_model=lambda text: 1 / 0)
+    assert broken.check(signal(LEAD)) is None  # erro no modelo local não descarta
+    print("Modelo local opcional OK")
+
+def test_mission_reports_llm_calls_avoided():
+    collector = make_collector(latency=0.01)
+    signals = [signal(LEAD + " 1"), signal(NO_TREATMENT, image="https://img/1.jpg"), signal(CLINIC_HOME), signal(PRICE_QUESTION)]
+    results = asyncio.run(collector.process_and_save_signals(signals))
+
+    assert len(results) == 2 and collector.engine.calls == 2
+    stats = collector.mission_stats
+    assert stats["prefiltered"] == 2 and stats["llm_calls_avoided"] == 3  # o sinal com imagem evitaria visão também
+    assert stats["prefilter_reasons"] == {"no_treatment_terms": 1, "commercial_page": 1}
+    print(f"{stats['llm_calls_avoided']} chamadas ao LLM evitadas na missão OK")
+
+if __name__ == "__main__":
+    test_prefilter_rules()
+    test_local_model_hook()
+    test_mission_reports_llm_calls_avoided()
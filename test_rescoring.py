@@ -0,0 +1,69 @@
+import os
+import random
+import tempfile
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.db.migrations import run_migrations
+from app.models.models import Lead, LeadStats, aggregate_lead_stats
+from app.services.engine import LeadScorer
+from app.services.rescoring import METRICS, calculate_scores, rescore_leads
+
+def random_metrics(rng: random.Random):
+    metrics = {name: rng.randint(0, 100) for name in METRICS}
+    metrics["is_sp_region"] = rng.random() < 0.7
+    metrics["is_elite_neighborhood"] = rng.random() < 0.3
+    return metrics
+
+def test_vectorized_matches_scalar():
+    rng = random.Random(7)
+    samples = [random_metrics(rng) for _ in range(2000)]
+    vector = calculate_scores(
+        {name: np.array([s[name] for s in samples], dtype=float) for name in METRICS},
+        np.array([s["is_sp_region"] for s in samples]), np.array([s["is_elite_neighborhood"] for s in samples])
+    )
+    scalar = [LeadScorer().calculate_score(s) for s in samples]
+    assert np.array_equal(vector, np.array(scalar, dtype=float))
+    print("Score vetorizado idêntico ao LeadScorer OK")
+
+def test_rescore_updates_changed_leads():
+    engine = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'rescore.db')}")
+    run_migrations(engine)
+    factory = sessionmaker(bind=engine)
+    rng = random.Random(3)
+    with factory() as db:
+        for _ in range(120):
+            metrics = random_metrics(rng)
+            db.add(Lead(clinic_id=1, scores={**metrics, "lead_score": LeadScorer().calculate_score(metrics)}, labels={}))
+        # Lead antigo sem componentes: score 0, região padrão (SP)
+        db.add(Lead(clinic_id=1, scores={"lead_score": 12.0}, labels={}))
+        db.commit()
+
+    assert rescore_leads(engine, chunk_size=50)["updated"] == 1  # pesos inalterados: só o lead sem componentes
+
+    original = dict(LeadScorer.WEIGHTS)
+    LeadScorer.WEIGHTS["visual_fit"] = 0.50
+    try:
+        dry = rescore_leads(engine, chunk_size=50, dry_run=True)
+        with factory() as db:
+            before = [lead.lead_score for lead in db.query(Lead).order_by(Lead.id)]
+        result = rescore_leads(engine, chunk_size=50)
+        with factory() as db:
+            leads = db.query(Lead).order_by(Lead.id).all()
+            expected = [LeadScorer().calculate_score(lead.scores) for lead in leads]
+            stats = db.get(LeadStats, 1)
+            aggregated = aggregate_lead_stats(db.connection())
+    finally:
+        LeadScorer.WEIGHTS.clear()
+        LeadScorer.WEIGHTS.update(original)
+
+    assert result["scanned"] == 121 and result["updated"] == dry["updated"] > 0
+    assert before != [lead.lead_score for lead in leads]  # dry-run não gravou
+    assert [lead.lead_score for lead in leads] == expected
+    assert all(lead.scores["lead_score"] == lead.lead_score for lead in leads)  # JSON em sincronia com a coluna
+    assert stats.score_sum == aggregated["score_sum"] and stats.vip_leads == aggregated["vip_leads"] == result["vip_after"]
+    print(f"Re-score em massa: {result['updated']} de {result['scanned']} leads atualizados OK")
+
+if __name__ == "__main__":
+    test_vectorized_matches_scalar()
+    test_rescore_updates_changed_leads()
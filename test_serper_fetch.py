@@ -0,0 +1,97 @@
+import asyncio
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from app.core.config import settings
+from app.services.collector import SignalsCollector
+from test_async_llm import free_port
+
+STUB_LATENCY = 0.3
+
+class SerperStubHandler(BaseHTTPRequestHandler):
+    """Stub local do endpoint /search do Serper: falha a primeira chamada das queries 'flaky'."""
+    attempts = Counter()
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        query = payload["q"].split(" ")[0]
+        page = payload.get("page", 1)
+        SerperStubHandler.attempts[(query, page)] += 1
+        time.sleep(STUB_LATENCY)
+
+        if query.startswith("flaky") and SerperStubHandler.attempts[(query, page)] == 1:
+            status = 429 if query == "flaky429" else 503
+            self._send(status, {"message": "try again"})
+            return
+        organic = [] if page > 2 else [
+            {"title": f"{query} p{page} r{i}", "link": f"https://example.com/{query}/{page}/{i}", "snippet": "comentário"}
+            for i in range(2)
+        ]
+        self._send(200, {"organic": organic})
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+class StubServer(ThreadingHTTPServer):
+    request_queue_size = 64  # backlog padrão (5) derruba SYNs quando todas as queries conectam de uma vez
+
+def run_against_stub(queries, **overrides):
+    server = StubServer(("127.0.0.1", free_port()), SerperStubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    SerperStubHandler.attempts.clear()
+
+    values = {"SERPER_BASE_URL": f"http://127.0.0.1:{server.server_port}", "SERPER_API_KEY": "test-key",
+              "SERPER_BACKOFF_BASE": 0.05, "SERPER_PAGES": 1, "SERPER_MAX_CONCURRENCY": 10, **overrides}
+    original = {name: getattr(settings, name) for name in values}
+    for name, value in values.items():
+        setattr(settings, name, value)
+    try:
+        start = time.monotonic()
+        signals = asyncio.run(SignalsCollector().fetch_signals(queries))
+        return signals, time.monotonic() - start
+    finally:
+        for name, value in original.items():
+            setattr(settings, name, value)
+        server.shutdown()
+
+def test_queries_fetched_concurrently():
+    queries = [f"query{i}" for i in range(8)]
+    signals, elapsed = run_against_stub(queries)
+
+    assert len(signals) == 16
+    # Ordem estável: resultados agrupados na ordem das queries
+    assert [s["raw_metadata"]["query"] for s in signals[::2]] == queries
+    assert elapsed < STUB_LATENCY * 3, f"{elapsed:.2f}s: queries parecem sequenciais"
+    print(f"8 queries em {elapsed:.2f}s")
+
+def test_retries_on_429_and_5xx():
+    signals, _ = run_against_stub(["flaky429", "flaky503", "stable"])
+
+    assert len(signals) == 6
+    assert SerperStubHandler.attempts[("flaky429", 1)] == 2
+    assert SerperStubHandler.attempts[("flaky503", 1)] == 2
+    assert SerperStubHandler.attempts[("stable", 1)] == 1
+    print("Retry com backoff em 429/5xx OK")
+
+def test_multi_page_stops_on_empty_page():
+    signals, _ = run_against_stub(["query"], SERPER_PAGES=5)
+
+    assert len(signals) == 4
+    assert SerperStubHandler.attempts[("query", 3)] == 1
+    assert SerperStubHandler.attempts[("query", 4)] == 0
+    print("Paginação OK")
+
+if __name__ == "__main__":
+    test_queries_fetched_concurrently()
+    test_retries_on_429_and_5xx()
+    test_multi_page_stops_on_empty_page()
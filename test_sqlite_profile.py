@@ -0,0 +1,90 @@
+import os
+import tempfile
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from app.core.config import settings
+from app.db.migrations import run_migrations
+from app.db.session import make_engine, make_read_engine
+
+def make_profile_engines():
+    url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'profile.db')}"
+    engine = make_engine(url)
+    run_migrations(engine)
+    return engine, make_read_engine(url, engine)
+
+def test_writer_and_readers_pragmas():
+    engine, read_engine = make_profile_engines()
+    assert read_engine is not engine
+    assert engine.pool.size() == 1 and read_engine.pool.size() == settings.SQLITE_READ_POOL_SIZE
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1  # NORMAL
+        assert conn.exec_driver_sql("PRAGMA busy_timeout").scalar() == settings.SQLITE_BUSY_TIMEOUT_MS
+        assert conn.exec_driver_sql("PRAGMA mmap_size").scalar() == settings.SQLITE_MMAP_SIZE
+    with read_engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA query_only").scalar() == 1
+        try:
+            conn.execute(text("INSERT INTO leads (clinic_id) VALUES (1)"))
+            assert False, "conexão de leitura não deveria gravar"
+        except OperationalError:
+            pass
+    print("Perfil SQLite: WAL no writer, leitores somente-leitura OK")
+
+def test_open_read_does_not_block_writer():
+    engine, read_engine = make_profile_engines()
+    reader = read_engine.raw_connection()
+    try:
+        # Leitura longa em andamento (snapshot aberto), como uma página do dashboard sendo gerada
+        reader.driver_connection.isolation_level = None
+        reader.driver_connection.execute("BEGIN")
+        before = reader.driver_connection.execute("SELECT count(*) FROM leads").fetchone()[0]
+
+        with engine.begin() as conn:  # no journal padrão, este commit esperaria o leitor terminar
+            conn.execute(text("INSERT INTO leads (clinic_id, lead_score) VALUES (1, 10.0)"))
+
+        assert reader.driver_connection.execute("SELECT count(*) FROM leads").fetchone()[0] == before  # snapshot estável
+        reader.driver_connection.execute("COMMIT")
+        assert reader.driver_connection.execute("SELECT count(*) FROM leads").fetchone()[0] == before + 1
+    finally:
+        reader.close()
+    print("Writer grava com leitura em andamento OK")
+
+def test_profile_can_be_disabled():
+    original = settings.SQLITE_WAL
+    settings.SQLITE_WAL = False
+    try:
+        url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'legacy.db')}"
+        engine = make_engine(url)
+        assert make_read_engine(url, engine) is engine
+        with engine.connect() as conn:
+            assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "delete"
+    finally:
+        settings.SQLITE_WAL = original
+    print("Perfil SQLite desativável (journal padrão) OK")
+
+def test_api_has_a_single_writer():
+    """O engine assíncrono da API só lê; as escritas (PUT) passam pelo writer síncrono (get_db)."""
+    import asyncio
+    import inspect
+    from app.db import session
+    from app.api.v1.endpoints.leads import update_lead
+
+    assert not hasattr(session, "get_async_db") and not hasattr(session, "async_engine")
+    assert not inspect.iscoroutinefunction(update_lead)  # roda no threadpool, sem bloquear o loop
+    assert inspect.signature(update_lead).parameters["db"].default.dependency is session.get_db
+
+    async def query_only():
+        async with session.async_read_engine.connect() as conn:
+            return (await conn.exec_driver_sql("PRAGMA query_only")).scalar()
+    try:
+        if session.uses_sqlite_profile(session.database_url(settings.DATABASE_URL)):
+            assert asyncio.run(query_only()) == 1
+    finally:
+        asyncio.run(session.async_read_engine.dispose())
+    print("API com um único writer por processo OK")
+
+if __name__ == "__main__":
+    test_writer_and_readers_pragmas()
+    test_open_read_does_not_block_writer()
+    test_profile_can_be_disabled()
+    test_api_has_a_single_writer()
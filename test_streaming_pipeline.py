@@ -0,0 +1,86 @@
+import asyncio
+import time
+from datetime import datetime
+from app.core.config import settings
+from app.models.models import Lead
+from test_concurrent_pipeline import make_collector, unique_words
+
+SIGNALS_PER_QUERY = 10
+
+def patch_fetch(collector, fetch_latency: float, repeat_texts: bool = False):
+    """Substitui a busca no Serper por resultados sintéticos com latência crescente por query."""
+    timeline = {"fetch_done": []}
+
+    async def fake_fetch_query(client, semaphore, query):
+        index = int(query.split("_")[1])
+        await asyncio.sleep(fetch_latency * (index + 1))
+        timeline["fetch_done"].append(time.monotonic())
+        return [{
+            "source": "google_web",
+            "url": f"https://example.com/{query}/{i}",
+            "author_handle": "Web User",
+            "text": f"Quero Ultraformer no Itaim {unique_words(i if repeat_texts else index * 1000 + i)}",
+            "timestamp": datetime.now(),
+            "raw_metadata": {"query": query}
+        } for i in range(SIGNALS_PER_QUERY)]
+
+    collector._fetch_query = fake_fetch_query
+    original_classify = collector.engine.classify
+
+    async def timed_classify(text):
+        timeline.setdefault("first_classify", time.monotonic())
+        return await original_classify(text)
+
+    collector.engine.classify = timed_classify
+    return timeline
+
+def run_streaming(collector, queries, **kwargs):
+    original_key = settings.SERPER_API_KEY
+    settings.SERPER_API_KEY = "test-key"
+    try:
+        return asyncio.run(collector.stream_and_process(queries, **kwargs))
+    finally:
+        settings.SERPER_API_KEY = original_key
+
+def test_classification_starts_before_fetch_finishes():
+    collector = make_collector(latency=0.01)
+    timeline = patch_fetch(collector, fetch_latency=0.1)
+
+    results = run_streaming(collector, [f"query_{i}" for i in range(5)])
+
+    assert len(results) == 5 * SIGNALS_PER_QUERY
+    assert timeline["first_classify"] < max(timeline["fetch_done"])
+    print("Classificação começa antes do fim das buscas OK")
+
+def test_in_flight_signals_stay_bounded():
+    collector = make_collector(latency=0.005)
+    patch_fetch(collector, fetch_latency=0.001)
+
+    results = run_streaming(collector, [f"query_{i}" for i in range(40)], queue_size=4, max_concurrency=4)
+
+    assert len(results) == 40 * SIGNALS_PER_QUERY
+    # Conta desde o retorno da busca: filas (3 x 4) + workers (4) + itens em trânsito entre
+    # estágios + resultados já buscados aguardando vaga na fila (um lote por produtor)
+    assert collector.mission_stats["peak_in_flight"] <= 24 + settings.SERPER_MAX_CONCURRENCY * SIGNALS_PER_QUERY
+    db = collector.session_factory()
+    try:
+        assert db.query(Lead).count() == 40 * SIGNALS_PER_QUERY
+    finally:
+        db.close()
+    print(f"Pico de {collector.mission_stats['peak_in_flight']} sinais em memória para 400 sinais OK")
+
+def test_duplicates_dropped_in_stream():
+    collector = make_collector(latency=0.01)
+    patch_fetch(collector, fetch_latency=0.01, repeat_texts=True)
+
+    results = run_streaming(collector, [f"query_{i}" for i in range(3)])
+
+    assert len(results) == SIGNALS_PER_QUERY
+    assert collector.mission_stats["duplicates_skipped"] == 2 * SIGNALS_PER_QUERY
+    assert collector.engine.calls == SIGNALS_PER_QUERY
+    print("Deduplicação no fluxo OK")
+
+if __name__ == "__main__":
+    test_classification_starts_before_fetch_finishes()
+    test_in_flight_signals_stay_bounded()
+    test_duplicates_dropped_in_stream()